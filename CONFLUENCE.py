@@ -335,7 +335,10 @@ class CONFLUENCE:
         observed_data_processor = ObservedDataProcessor(self.config, self.logger)
 
         try:
+            # The domain station is always processed, calibration and evaluation read its file
             observed_data_processor.process_streamflow_data()
+            if observed_data_processor.batch_configured():
+                observed_data_processor.process_streamflow_batch()
             self.logger.info("Observed data processing completed successfully")
         except Exception as e:
             self.logger.error(f"Error during observed data processing: {str(e)}")
@@ -481,6 +484,10 @@ class CONFLUENCE:
         bv = BenchmarkVizualiser(self.config, self.logger)
         bv.visualize_benchmarks(benchmark_results)
 
+        # Multi-gauge and multi-split benchmarking
+        if self.config.get('BENCHMARK_SPLITS', 'midpoint') != 'midpoint' or benchmarker.gauge_input_dir.exists():
+            benchmarker.run_batch_benchmarking()
+
     @get_function_logger    
     def run_postprocessing(self):
         for model in self.config.get('HYDROLOGICAL_MODEL').split(','):
@@ -14,6 +14,10 @@ import pyproj # type: ignore
 import shapefile # type: ignore
 import rasterio # type: ignore
 from rasterstats import zonal_stats # type: ignore
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.dataHandling_utils.forcing_cache_utils import ForcingCache # type: ignore
 
 class forcingResampler:
     def __init__(self, config, logger):
@@ -45,8 +49,21 @@ class forcingResampler:
 
     def run_resampling(self):
         self.logger.info("Starting forcing data resampling process")
+
+        # Basin-averaged forcing, the forcing grid shapefile and the intersection are cached together
+        cache_dirs = {
+            'basin_averaged_data': self.forcing_basin_path,
+            'forcing_shapefile': self.shapefile_path,
+            'with_forcing': self.project_dir / 'shapefiles' / 'catchment_intersection' / 'with_forcing'
+        }
+        forcing_cache = ForcingCache(self.config, self.logger)
+        if forcing_cache.restore('basin_averaged_data', cache_dirs):
+            self.logger.info("Forcing data resampling skipped, using cached basin-averaged forcing")
+            return
+
         self.create_shapefile()
         self.remap_forcing()
+        forcing_cache.save('basin_averaged_data', cache_dirs)
         self.logger.info("Forcing data resampling process completed")
 
     def create_shapefile(self):
@@ -10,12 +10,12 @@ import geopandas as gpd # type: ignore
 import rasterio # type: ignore
 from rasterstats import zonal_stats # type: ignore
 from shapely.geometry import Point # type: ignore
-import csv
-from datetime import datetime
 import xarray as xr # type: ignore
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from utils.dataHandling_utils.variable_utils import VariableHandler # type: ignore
+from utils.dataHandling_utils.observation_store_utils import load_observations # type: ignore
+from utils.dataHandling_utils.streamflow_ingest_utils import PARSERS, ingest_streamflow, BatchStreamflowIngestor # type: ignore
 
 class ProjectInitialisation:
     def __init__(self, config, logger):
@@ -518,6 +518,8 @@ class ObservedDataProcessor:
         self.streamflow_raw_path = self._get_file_path('STREAMFLOW_RAW_PATH', 'observations/streamflow/raw_data', '')
         self.streamflow_processed_path = self._get_file_path('STREAMFLOW_PROCESSED_PATH', 'observations/streamflow/preprocessed', '')
         self.streamflow_raw_name = self.config.get('STREAMFLOW_RAW_NAME')
+        self.batch_stations = self.config.get('STREAMFLOW_BATCH_STATIONS', 'default')
+        self.batch_raw_dir = self.config.get('STREAMFLOW_BATCH_RAW_DIR', 'default')
 
     def _get_file_path(self, file_type, file_def_path, file_name):
         if self.config.get(f'{file_type}') == 'default':
@@ -537,92 +539,72 @@ class ObservedDataProcessor:
 
     def process_streamflow_data(self):
         try:
-            if self.data_provider == 'USGS':
-                self._process_usgs_data()
-            elif self.data_provider == 'WSC':
-                self._process_wsc_data()
-            elif self.data_provider == 'VI':
-                self._process_vi_data()
-            else:
+            if self.data_provider not in PARSERS:
                 self.logger.error(f"Unsupported streamflow data provider: {self.data_provider}")
                 raise ValueError(f"Unsupported streamflow data provider: {self.data_provider}")
+            self.logger.info(f"Processing {self.data_provider} streamflow data")
+            output_file = self.streamflow_processed_path / f'{self.domain_name}_streamflow_processed.csv'
+            resampled_data = ingest_streamflow(self.streamflow_raw_path / self.streamflow_raw_name, self.data_provider,
+                                               output_file, self.get_resample_freq(), self.logger)
+
+            self.logger.info(f"Total rows in processed data: {len(resampled_data)}")
+            self.logger.info(f"Number of non-null values: {resampled_data.count()}")
+            self.logger.info(f"Number of null values: {resampled_data.isnull().sum()}")
         except Exception as e:
             self.logger.error(f'Issue in streamflow data preprocessing: {e}')
 
-    def _process_vi_data(self):
-        self.logger.info("Processing VI (Iceland) streamflow data")
-        vi_data = pd.read_csv(self.streamflow_raw_path / self.streamflow_raw_name, 
-                              sep=';', 
-                              header=None, 
-                              names=['YYYY', 'MM', 'DD', 'qobs', 'qc_flag'],
-                              parse_dates={'datetime': ['YYYY', 'MM', 'DD']},
-                              na_values='',
-                              skiprows = 1)
-
-        vi_data['discharge_cms'] = pd.to_numeric(vi_data['qobs'], errors='coerce')
-        vi_data.set_index('datetime', inplace=True)
-
-        # Filter out data with qc_flag values indicating unreliable measurements
-        # Adjust this based on the specific qc_flag values that indicate reliable data
-        #reliable_data = vi_data[vi_data['qc_flag'] <= 100]
-
-        self._resample_and_save(vi_data['discharge_cms'])
-
-    def _process_usgs_data(self):
-        self.logger.info("Processing USGS streamflow data")
-        usgs_data = pd.read_csv(self.streamflow_raw_path / self.streamflow_raw_name, 
-                                comment='#', sep='\t', 
-                                skiprows=[6],
-                                parse_dates=['datetime'],
-                                date_format='%Y-%m-%d %H:%M',
-                                low_memory=False 
-                                )
-
-        usgs_data = usgs_data.loc[1:]
-        usgs_data['discharge_cfs'] = pd.to_numeric(usgs_data[usgs_data.columns[4]], errors='coerce')
-        usgs_data['discharge_cms'] = usgs_data['discharge_cfs'] * 0.028316847
-        usgs_data['datetime'] = pd.to_datetime(usgs_data['datetime'], format='%Y-%m-%d %H:%M', errors='coerce')
-        usgs_data = usgs_data.dropna(subset=['datetime'])
-        usgs_data.set_index('datetime', inplace=True)
-
-        self._resample_and_save(usgs_data['discharge_cms'])
-
-    def _process_wsc_data(self):
-        self.logger.info("Processing WSC streamflow data")
-        wsc_data = pd.read_csv(self.streamflow_raw_path / self.streamflow_raw_name, 
-                               comment='#', 
-                               low_memory=False)
-
-        wsc_data['ISO 8601 UTC'] = pd.to_datetime(wsc_data['ISO 8601 UTC'], format='ISO8601')
-        wsc_data.set_index('ISO 8601 UTC', inplace=True)
-        wsc_data.index = wsc_data.index.tz_convert('America/Edmonton').tz_localize(None)
-        wsc_data['discharge_cms'] = pd.to_numeric(wsc_data['Value'], errors='coerce')
-
-        self._resample_and_save(wsc_data['discharge_cms'])
-
-    def _resample_and_save(self, data):
-        resample_freq = self.get_resample_freq()
-        resampled_data = data.resample(resample_freq).mean()
-        resampled_data = resampled_data.interpolate(method='time', limit=24)
-        #resampled_data = resampled_data.dropna()
-
-        output_file = self.streamflow_processed_path / f'{self.domain_name}_streamflow_processed.csv'
-        data_to_write = [('datetime', 'discharge_cms')] + list(resampled_data.items())
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(output_file, 'w', newline='') as csvfile:
-            csv_writer = csv.writer(csvfile)
-            for row in data_to_write:
-                if isinstance(row[0], datetime):
-                    formatted_datetime = row[0].strftime('%Y-%m-%d %H:%M:%S')
-                    csv_writer.writerow([formatted_datetime, row[1]])
-                else:
-                    csv_writer.writerow(row)
-
-        self.logger.info(f"Processed streamflow data saved to: {output_file}")
-        self.logger.info(f"Total rows in processed data: {len(resampled_data)}")
-        self.logger.info(f"Number of non-null values: {resampled_data.count()}")
-        self.logger.info(f"Number of null values: {resampled_data.isnull().sum()}")
+    def batch_configured(self) -> bool:
+        """Whether a station list or a directory of raw files is configured for batch processing."""
+        return self.batch_stations not in (None, 'default') or self.batch_raw_dir not in (None, 'default')
+
+    def load_station_list(self) -> pd.DataFrame:
+        """
+        Build the list of stations to process in batch mode.
+
+        STREAMFLOW_BATCH_STATIONS is a CSV with 'station_id' and 'raw_file' columns, and optionally
+        'provider'; relative raw files are taken from STREAMFLOW_BATCH_RAW_DIR, or STREAMFLOW_RAW_PATH.
+        Without a station list, every file in STREAMFLOW_BATCH_RAW_DIR is a station named after
+        the file. Stations without a provider use STREAMFLOW_DATA_PROVIDER.
+
+        Returns:
+            pd.DataFrame: One row per station with 'station_id', 'raw_file' and 'provider' columns
+        """
+        raw_dir = Path(self.batch_raw_dir) if self.batch_raw_dir not in (None, 'default') else self.streamflow_raw_path
+
+        if self.batch_stations not in (None, 'default'):
+            stations = pd.read_csv(self.batch_stations, dtype={'station_id': str})
+            missing = [col for col in ('station_id', 'raw_file') if col not in stations.columns]
+            if missing:
+                raise ValueError(f"Station list {self.batch_stations} is missing columns: {', '.join(missing)}")
+            stations['raw_file'] = [str(f) if Path(f).is_absolute() else str(raw_dir / f) for f in stations['raw_file']]
+        else:
+            raw_files = sorted(f for f in raw_dir.iterdir() if f.is_file() and not f.name.startswith('.'))
+            stations = pd.DataFrame({'station_id': [f.stem for f in raw_files], 'raw_file': [str(f) for f in raw_files]})
+
+        if 'provider' not in stations.columns:
+            stations['provider'] = self.data_provider
+        stations['provider'] = stations['provider'].fillna(self.data_provider).str.upper()
+        return stations[['station_id', 'raw_file', 'provider']]
+
+    def process_streamflow_batch(self) -> pd.DataFrame:
+        """
+        Process the streamflow data of all stations in the station list on a process pool.
+
+        This is run in addition to process_streamflow_data, which writes the domain observation
+        file that calibration, evaluation and reporting read.
+
+        Outputs go to a 'batch' directory in the processed streamflow path, one CSV per station
+        plus a consolidated streamflow_batch_index.csv.
+
+        Returns:
+            pd.DataFrame: The batch index, one row per station
+        """
+        stations = self.load_station_list()
+        unsupported = sorted(set(stations['provider']) - set(PARSERS))
+        if unsupported:
+            raise ValueError(f"Unsupported streamflow data provider(s) in station list: {', '.join(unsupported)}")
+        output_dir = self.streamflow_processed_path / 'batch'
+        return BatchStreamflowIngestor(self.config, self.logger).run(stations, output_dir, self.get_resample_freq())
 
 class BenchmarkPreprocessor:
     def __init__(self, config: dict, logger):
@@ -687,7 +669,7 @@ class BenchmarkPreprocessor:
     def _load_streamflow_data(self) -> pd.DataFrame:
         """Load and basic process streamflow data."""
         streamflow_path = self.project_dir / "observations" / "streamflow" / "preprocessed" / f"{self.config.get('DOMAIN_NAME')}_streamflow_processed.csv"
-        data = pd.read_csv(streamflow_path, parse_dates=['datetime'], index_col='datetime')
+        data = load_observations(streamflow_path, 'native', self.logger).to_frame()
         # Ensure the index is sorted for a faster merge later on
         data.sort_index(inplace=True)
         return data.rename(columns={'discharge_cms': 'streamflow'})
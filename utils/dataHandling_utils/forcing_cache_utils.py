@@ -0,0 +1,170 @@
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Optional
+import geopandas as gpd # type: ignore
+
+MANIFEST_FILE = 'manifest.json'
+
+
+class ForcingCache:
+    """
+    Shared on-disk store of processed forcing, reused across experiments and project directories.
+
+    Entries are organised hierarchically by forcing dataset, domain, time range, a hash of the
+    catchment geometry and HRU ids, and a hash of the forcing variable set. Below that, every
+    processing stage (e.g. basin-averaged forcing, model input forcing) has its own entry, which
+    can hold several directories and depend on additional stage-specific settings. Files are
+    copied in and out of the store rather than hard-linked, because the netCDF writers of later
+    steps overwrite project files in place and would otherwise change the cached copy too.
+
+    Attributes:
+        config (Dict[str, Any]): Configuration settings
+        logger (Any): Logger object for recording processing information
+        enabled (bool): Whether the cache is used
+        cache_root (Path): Root directory of the store
+    """
+
+    def __init__(self, config: Dict[str, Any], logger: Any):
+        self.config = config
+        self.logger = logger
+        self.enabled = str(self.config.get('USE_FORCING_CACHE', True)).lower() in ('true', 'yes', '1')
+        cache_path = self.config.get('FORCING_CACHE_PATH', 'default')
+        if cache_path == 'default' or cache_path is None:
+            self.cache_root = Path(self.config.get('CONFLUENCE_DATA_DIR')) / 'forcing_cache'
+        else:
+            self.cache_root = Path(cache_path)
+        self._key_dir = None
+
+    def _catchment_hash(self) -> str:
+        """Hash the HRU ids and geometries of the catchment shapefile."""
+        project_dir = Path(self.config.get('CONFLUENCE_DATA_DIR')) / f"domain_{self.config.get('DOMAIN_NAME')}"
+        catchment_path = self.config.get('CATCHMENT_PATH')
+        catchment_path = project_dir / 'shapefiles' / 'catchment' if catchment_path in ('default', None) else Path(catchment_path)
+        catchment_name = self.config.get('CATCHMENT_SHP_NAME')
+        if catchment_name == 'default':
+            catchment_name = f"{self.config['DOMAIN_NAME']}_HRUs_{self.config['DOMAIN_DISCRETIZATION']}.shp"
+
+        catchment = gpd.read_file(catchment_path / catchment_name)
+        hru_id_col = self.config.get('CATCHMENT_SHP_HRUID')
+        if hru_id_col in catchment:
+            catchment = catchment.sort_values(hru_id_col)
+
+        digest = hashlib.sha256(str(catchment.crs).encode())
+        if hru_id_col in catchment:
+            digest.update(json.dumps([str(i) for i in catchment[hru_id_col]]).encode())
+        for geom in catchment.geometry:
+            digest.update(geom.wkb if geom is not None else b'')
+        return digest.hexdigest()[:16]
+
+    def _variables_hash(self) -> str:
+        """Hash the forcing variable set."""
+        variables = self.config.get('FORCING_VARIABLES', 'default')
+        variables = sorted(v.strip() for v in str(variables).split(','))
+        return hashlib.sha256(json.dumps(variables).encode()).hexdigest()[:12]
+
+    def key_dir(self) -> Path:
+        """
+        Get the directory of the forcing key of the current configuration.
+
+        Returns:
+            Path: <root>/<dataset>/<domain>/<start>_<end>/<catchment hash>/<variables hash>
+        """
+        if self._key_dir is None:
+            time_range = f"{self.config.get('EXPERIMENT_TIME_START')}_{self.config.get('EXPERIMENT_TIME_END')}"
+            time_range = time_range.replace(' ', 'T').replace(':', '')
+            self._key_dir = (self.cache_root / str(self.config.get('FORCING_DATASET')) / str(self.config.get('DOMAIN_NAME')) /
+                             time_range / self._catchment_hash() / self._variables_hash())
+        return self._key_dir
+
+    def _entry_dir(self, stage: str, extra: Optional[Dict[str, Any]]) -> Path:
+        """Get the entry directory of a stage, keyed by its stage-specific settings."""
+        if extra:
+            stage = f"{stage}_{hashlib.sha256(json.dumps(extra, sort_keys=True, default=str).encode()).hexdigest()[:12]}"
+        return self.key_dir() / stage
+
+    def restore(self, stage: str, targets: Dict[str, Path], extra: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Restore the files of a stage into the project, if the store has a complete entry.
+
+        Args:
+            stage (str): Name of the processing stage
+            targets (Dict[str, Path]): Project directory per entry subdirectory name
+            extra (Optional[Dict[str, Any]]): Stage-specific settings the entry depends on
+
+        Returns:
+            bool: True if the entry was restored, False on a cache miss
+        """
+        if not self.enabled:
+            return False
+
+        try:
+            entry = self._entry_dir(stage, extra)
+        except Exception as e:
+            self.logger.warning(f"Could not compute forcing cache key, not using the cache: {str(e)}")
+            return False
+
+        manifest_file = entry / MANIFEST_FILE
+        if not manifest_file.exists():
+            self.logger.info(f"No cached {stage} forcing found in {entry}")
+            return False
+
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+        if set(manifest['files']) != set(targets):
+            return False
+
+        for name, target in targets.items():
+            target = Path(target)
+            target.mkdir(parents=True, exist_ok=True)
+            for file_name in manifest['files'][name]:
+                destination = target / file_name
+                if destination.exists():
+                    destination.unlink()
+                shutil.copyfile(entry / name / file_name, destination)
+
+        self.logger.info(f"Restored cached {stage} forcing from {entry}")
+        return True
+
+    def save(self, stage: str, sources: Dict[str, Path], extra: Optional[Dict[str, Any]] = None) -> Optional[Path]:
+        """
+        Store the files of a stage, replacing any existing entry.
+
+        Args:
+            stage (str): Name of the processing stage
+            sources (Dict[str, Path]): Project directory per entry subdirectory name
+            extra (Optional[Dict[str, Any]]): Stage-specific settings the entry depends on
+
+        Returns:
+            Optional[Path]: The entry directory, or None if the cache is disabled or storing failed
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            entry = self._entry_dir(stage, extra)
+            tmp_entry = entry.with_name(f"{entry.name}.tmp{os.getpid()}")
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+            files = {}
+            for name, source in sources.items():
+                source = Path(source)
+                (tmp_entry / name).mkdir(parents=True, exist_ok=True)
+                files[name] = sorted(f.name for f in source.iterdir() if f.is_file()) if source.exists() else []
+                for file_name in files[name]:
+                    shutil.copyfile(source / file_name, tmp_entry / name / file_name)
+
+            # Write the manifest last, it marks the entry as complete
+            manifest = {'stage': stage, 'extra': extra, 'files': files}
+            with open(tmp_entry / MANIFEST_FILE, 'w') as f:
+                json.dump(manifest, f, indent=2, default=str)
+
+            shutil.rmtree(entry, ignore_errors=True)
+            tmp_entry.rename(entry)
+            self.logger.info(f"Stored {stage} forcing in the forcing cache at {entry}")
+            return entry
+        except Exception as e:
+            self.logger.warning(f"Could not store {stage} forcing in the forcing cache: {str(e)}")
+            return None
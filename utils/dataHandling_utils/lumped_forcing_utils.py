@@ -0,0 +1,196 @@
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+import xarray as xr # type: ignore
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.dataHandling_utils.variable_utils import VariableHandler # type: ignore
+from utils.dataHandling_utils.forcing_cache_utils import ForcingCache # type: ignore
+
+
+def oudin_pet(temp_data: xr.DataArray, lat: Any) -> xr.DataArray:
+    """
+    Calculate potential evapotranspiration using Oudin's formula.
+
+    Only uses xarray arithmetic, so it stays lazy on dask-backed input.
+
+    Args:
+        temp_data (xr.DataArray): Daily temperature in Kelvin
+        lat (float | xr.DataArray): Latitude of the catchment centroid, or of each HRU along the hru dimension
+
+    Returns:
+        xr.DataArray: PET in mm/day
+    """
+    # Convert temperature to Celsius
+    temp_C = temp_data - 273.15
+
+    # Day of year, kept as a DataArray so it broadcasts against per-HRU latitudes
+    doy = temp_data.time.dt.dayofyear
+
+    # Solar declination and sunset hour angle
+    solar_decl = 0.409 * np.sin(2 * np.pi / 365 * doy - 1.39)
+    lat_rad = np.deg2rad(lat)
+    sunset_angle = np.arccos(-np.tan(lat_rad) * np.tan(solar_decl))
+
+    # Extraterrestrial radiation (Ra)
+    dr = 1 + 0.033 * np.cos(2 * np.pi / 365 * doy)
+    Ra = (24 * 60 / np.pi) * 0.082 * dr * (
+        sunset_angle * np.sin(lat_rad) * np.sin(solar_decl) +
+        np.cos(lat_rad) * np.cos(solar_decl) * np.sin(sunset_angle)
+    )
+
+    # PET = Ra * (T + 5) / 100 if T + 5 > 0, else 0
+    pet = xr.where(temp_C + 5 > 0, Ra * (temp_C + 5) / 100, 0)
+
+    return pet.assign_attrs({
+        'units': 'mm/day',
+        'long_name': 'Potential evapotranspiration',
+        'standard_name': 'water_potential_evaporation_flux'
+    })
+
+
+class LumpedForcingBuilder:
+    """
+    Build daily lumped forcing with PET from the basin-averaged forcing, shared by FUSE and GR.
+
+    The forcing files are opened as dask-chunked arrays, and the unit conversion, area-weighted
+    mean over HRUs, daily resampling and Oudin PET are built as one lazy graph. The graph is
+    computed chunk by chunk while it is written to a cache file, so memory use does not depend on
+    the length of the forcing record. The cache is reused as long as the forcing files, HRU
+    weights and latitude are unchanged, and is also kept in the shared forcing store
+    (see ForcingCache) for re-created project directories. Models with the same variable requirements, such as
+    FUSE and GR, share the cache.
+
+    Attributes:
+        config (Dict[str, Any]): Configuration settings
+        logger (Any): Logger object for recording processing information
+        project_dir (Path): Directory for the current project
+        forcing_basin_path (Path): Directory with the basin-averaged forcing files
+        cache_dir (Path): Directory with the cached lumped forcing
+        chunk_size (int): Number of forcing time steps per dask chunk
+    """
+
+    def __init__(self, config: Dict[str, Any], logger: Any):
+        self.config = config
+        self.logger = logger
+        self.domain_name = self.config.get('DOMAIN_NAME')
+        self.project_dir = Path(self.config.get('CONFLUENCE_DATA_DIR')) / f"domain_{self.domain_name}"
+        self.forcing_basin_path = self.project_dir / 'forcing' / 'basin_averaged_data'
+        self.cache_dir = self.project_dir / 'forcing' / 'lumped_daily'
+        self.chunk_size = int(self.config.get('FORCING_CHUNK_SIZE', 8760))
+
+    def get_forcing(self, lat: float, model: str, catchment: Optional[Any] = None) -> xr.Dataset:
+        """
+        Get daily lumped forcing, computing and caching it if needed.
+
+        Args:
+            lat (float): Latitude of the catchment centroid, used for PET
+            model (str): Model whose variable names and units are used ('FUSE' or 'GR')
+            catchment (Optional[gpd.GeoDataFrame]): HRU shapefile, whose HRU areas are used as weights
+                                                    for the HRU mean. HRUs are weighted equally if None.
+
+        Returns:
+            xr.Dataset: Dask-backed dataset with daily 'pr' (mm/day), 'temp' (degC) and 'pet' (mm/day)
+        """
+        forcing_files = sorted(self.forcing_basin_path.glob('*.nc'))
+        if not forcing_files:
+            raise FileNotFoundError("No forcing files found in basin-averaged data directory")
+
+        hru_areas = self._hru_areas(catchment)
+        signature = self._signature(forcing_files, lat, model, hru_areas)
+        cache_file = self.cache_dir / f"{self.domain_name}_lumped_daily.nc"
+
+        if self._cache_valid(cache_file, signature):
+            self.logger.info(f"Using cached lumped forcing from {cache_file}")
+            return xr.open_dataset(cache_file, chunks={'time': self.chunk_size})
+
+        # Fall back to the shared forcing store before building from scratch
+        forcing_cache = ForcingCache(self.config, self.logger)
+        cache_dirs = {'lumped_daily': self.cache_dir}
+        if forcing_cache.restore('lumped_daily', cache_dirs) and self._cache_valid(cache_file, signature):
+            return xr.open_dataset(cache_file, chunks={'time': self.chunk_size})
+
+        lumped = self.build(forcing_files, lat, model, hru_areas)
+        lumped.attrs['source_signature'] = signature
+        self._write(lumped, cache_file)
+        forcing_cache.save('lumped_daily', cache_dirs)
+        return xr.open_dataset(cache_file, chunks={'time': self.chunk_size})
+
+    def _cache_valid(self, cache_file: Path, signature: str) -> bool:
+        """Check whether a cached lumped forcing file was built from the current inputs."""
+        if not cache_file.exists():
+            return False
+        with xr.open_dataset(cache_file) as cached:
+            return cached.attrs.get('source_signature') == signature
+
+    def build(self, forcing_files: List[Path], lat: float, model: str, hru_areas: Optional[pd.Series] = None) -> xr.Dataset:
+        """
+        Build the lazy graph of daily lumped forcing.
+
+        Args:
+            forcing_files (List[Path]): Basin-averaged forcing files
+            lat (float): Latitude of the catchment centroid, used for PET
+            model (str): Model whose variable names and units are used ('FUSE' or 'GR')
+            hru_areas (Optional[pd.Series]): HRU areas indexed by hruId, used as weights for the HRU mean
+
+        Returns:
+            xr.Dataset: Dask-backed dataset with daily 'pr', 'temp' and 'pet'
+        """
+        ds = xr.open_mfdataset(forcing_files, chunks={'time': self.chunk_size})
+        variable_handler = VariableHandler(config=self.config, logger=self.logger, dataset=self.config['FORCING_DATASET'], model=model)
+        weights = self._hru_weights(ds, hru_areas)
+        ds = variable_handler.process_forcing_data(ds)[['pr', 'temp']]
+
+        ds = ds.weighted(weights).mean(dim='hru') if weights is not None else ds.mean(dim='hru')
+        ds = ds.resample(time='D').mean()
+
+        ds['pet'] = oudin_pet(ds['temp'] + 273.15, lat)
+        ds['pr'].attrs = {'units': 'mm/day', 'long_name': 'Mean daily precipitation'}
+        ds['temp'].attrs = {'units': 'degC', 'long_name': 'Mean daily temperature'}
+        return ds
+
+    def _hru_areas(self, catchment: Optional[Any]) -> Optional[pd.Series]:
+        """Get HRU areas indexed by hruId from the catchment shapefile, or None if not available."""
+        hru_id_col = self.config.get('CATCHMENT_SHP_HRUID')
+        area_col = self.config.get('CATCHMENT_SHP_AREA')
+        if catchment is None or hru_id_col not in catchment or area_col not in catchment:
+            return None
+        return pd.Series(catchment[area_col].values.astype(float),
+                         index=catchment[hru_id_col].values.astype(int))
+
+    def _hru_weights(self, ds: xr.Dataset, hru_areas: Optional[pd.Series]) -> Optional[xr.DataArray]:
+        """Get HRU area weights in forcing order, or None if they cannot be matched to the forcing."""
+        if hru_areas is None or 'hruId' not in ds:
+            return None
+
+        hru_ids = ds['hruId'].isel(time=0) if 'time' in ds['hruId'].dims else ds['hruId']
+        hru_ids = hru_ids.values.astype(int)
+        areas = hru_areas.reindex(hru_ids)
+        if areas.isna().any():
+            self.logger.warning("HRU areas do not match the forcing HRUs, using an unweighted HRU mean")
+            return None
+        return xr.DataArray(areas.values.astype(float), dims='hru')
+
+    def _signature(self, forcing_files: List[Path], lat: float, model: str, hru_areas: Optional[pd.Series]) -> str:
+        """Hash the inputs of the lumped forcing, so that stale caches are detected."""
+        content = {
+            'files': [[f.name, f.stat().st_size, f.stat().st_mtime_ns] for f in forcing_files],
+            'lat': round(float(lat), 6),
+            'requirements': VariableHandler.MODEL_REQUIREMENTS[model],
+            'dataset': self.config.get('FORCING_DATASET'),
+            'areas': None if hru_areas is None else [[int(i), float(a)] for i, a in hru_areas.items()]
+        }
+        return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+    def _write(self, ds: xr.Dataset, cache_file: Path) -> None:
+        """Compute the graph chunk by chunk into the cache file."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp.nc')
+        encoding = {var: {'dtype': 'float32', '_FillValue': -9999.0} for var in ds.data_vars}
+        ds.to_netcdf(tmp_file, encoding=encoding, format='NETCDF4')
+        tmp_file.replace(cache_file)
+        self.logger.info(f"Lumped daily forcing saved to {cache_file}")
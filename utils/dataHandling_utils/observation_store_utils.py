@@ -0,0 +1,160 @@
+import os
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+# Aggregates kept in the store, with their pandas resample frequency (None: as processed)
+RESOLUTIONS = {'native': None, 'hourly': 'h', 'daily': 'D'}
+META_FILE = 'meta.json'
+
+# Attempts and delay in seconds for readers that hit a store while it is being swapped
+LOAD_RETRIES = 5
+LOAD_RETRY_DELAY = 0.1
+
+
+def store_dir_for(obs_file: Path) -> Path:
+    """Get the store directory of a processed observation CSV, next to the CSV."""
+    obs_file = Path(obs_file)
+    return obs_file.parent / f"{obs_file.stem}_store"
+
+
+def _source_signature(obs_file: Path) -> Dict[str, Any]:
+    stat = Path(obs_file).stat()
+    return {'name': Path(obs_file).name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_observation_store(series: pd.Series, obs_file: Path, logger: Optional[Any] = None) -> Path:
+    """
+    Write the binary observation store of a processed observation CSV.
+
+    Every resolution in RESOLUTIONS is stored as two .npy files, the time stamps as int64 seconds
+    since the epoch and the values as float64, so they can be memory-mapped by any number of
+    processes. The store records the size and modification time of the CSV it belongs to.
+    A new store is written to a temporary directory and swapped in with renames: the old store
+    is moved aside before the new one is moved in, and only then deleted, so readers that have
+    it mapped keep their data and readers arriving during the swap retry (see load_observations).
+
+    Args:
+        series (pd.Series): Time-indexed observations, as written to the CSV
+        obs_file (Path): The processed observation CSV, which must already be written
+        logger (Optional[Any]): Logger object for recording processing information
+
+    Returns:
+        Path: The store directory
+    """
+    store_dir = store_dir_for(obs_file)
+    if _store_valid(store_dir, obs_file):
+        return store_dir
+    tmp_dir = store_dir.with_name(f"{store_dir.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    series = series.sort_index()
+    for resolution, freq in RESOLUTIONS.items():
+        aggregate = series if freq is None else series.resample(freq).mean()
+        times = aggregate.index.values.astype('datetime64[s]').astype(np.int64)
+        np.save(tmp_dir / f"{resolution}_time.npy", times)
+        np.save(tmp_dir / f"{resolution}_values.npy", aggregate.values.astype(np.float64))
+
+    with open(tmp_dir / META_FILE, 'w') as f:
+        json.dump({'source': _source_signature(obs_file), 'name': series.name or 'discharge_cms'}, f)
+
+    # Swap the complete store in, concurrent builders may have won the race
+    old_dir = store_dir.with_name(f"{store_dir.name}.old{os.getpid()}")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    try:
+        store_dir.rename(old_dir)
+    except FileNotFoundError:
+        pass
+    try:
+        tmp_dir.rename(store_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    if logger is not None:
+        logger.info(f"Observation store written to {store_dir}")
+    return store_dir
+
+
+def _store_valid(store_dir: Path, obs_file: Path) -> bool:
+    meta_file = store_dir / META_FILE
+    if not meta_file.exists():
+        return False
+    try:
+        with open(meta_file, 'r') as f:
+            return json.load(f)['source'] == _source_signature(obs_file)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def _read_observation_csv(obs_file: Path) -> pd.Series:
+    obs = pd.read_csv(obs_file, usecols=['datetime', 'discharge_cms'])
+    try:
+        times = pd.to_datetime(obs['datetime'], format='ISO8601')
+    except ValueError:
+        # Processed files edited by hand or written by other tools, as read by the visualisers before
+        times = pd.to_datetime(obs['datetime'], format='mixed', dayfirst=True)
+    return pd.Series(obs['discharge_cms'].values, index=pd.DatetimeIndex(times, name='datetime'), name='discharge_cms')
+
+
+def load_observations(obs_file: Path, resolution: str = 'native', logger: Optional[Any] = None) -> pd.Series:
+    """
+    Load processed streamflow observations from the memory-mapped observation store.
+
+    The arrays are opened with mmap_mode='r', so loading takes no parsing and processes on the
+    same node share one page-cache copy. If the store is missing or older than the CSV, the CSV
+    is parsed once and the store is rebuilt. Reads that find the store half swapped by another
+    process are retried.
+
+    Args:
+        obs_file (Path): The processed observation CSV
+        resolution (str): 'native' (as processed), 'hourly' or 'daily' mean
+        logger (Optional[Any]): Logger object for recording processing information
+
+    Returns:
+        pd.Series: Observed discharge (m3/s), indexed by time
+
+    Raises:
+        ValueError: If the resolution is unknown
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown observation resolution: {resolution}. Options: {', '.join(RESOLUTIONS)}")
+
+    obs_file = Path(obs_file)
+    store_dir = store_dir_for(obs_file)
+    if not _store_valid(store_dir, obs_file):
+        if logger is not None:
+            logger.info(f"Building observation store for {obs_file}")
+        series = _read_observation_csv(obs_file)
+        try:
+            write_observation_store(series, obs_file, logger)
+        except OSError as e:
+            # Read-only locations still get the observations, just without a store
+            if logger is not None:
+                logger.warning(f"Could not write observation store {store_dir}: {str(e)}")
+            freq = RESOLUTIONS[resolution]
+            return series if freq is None else series.resample(freq).mean()
+
+    times, values = _load_arrays(store_dir, resolution)
+    index = pd.DatetimeIndex(np.asarray(times).astype('datetime64[s]').astype('datetime64[ns]'), name='datetime')
+    return pd.Series(values, index=index, name='discharge_cms', copy=False)
+
+
+def _load_arrays(store_dir: Path, resolution: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Memory-map the time and value arrays of a resolution, retrying while the store is swapped."""
+    for attempt in range(LOAD_RETRIES):
+        try:
+            times = np.load(store_dir / f"{resolution}_time.npy", mmap_mode='r')
+            values = np.load(store_dir / f"{resolution}_values.npy", mmap_mode='r')
+            if len(times) == len(values):
+                return times, values
+        except FileNotFoundError:
+            if attempt == LOAD_RETRIES - 1:
+                raise
+        time.sleep(LOAD_RETRY_DELAY * (attempt + 1))
+    raise OSError(f"Observation store {store_dir} changed while it was read")
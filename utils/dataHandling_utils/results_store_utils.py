@@ -0,0 +1,112 @@
+import json
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+import pandas as pd # type: ignore
+import pyarrow as pa # type: ignore
+import pyarrow.parquet as pq # type: ignore
+
+METADATA_KEY = b'confluence_result'
+
+
+class ResultsStore:
+    """
+    Columnar store of the simulated time series of one experiment, keyed by model and variable.
+
+    Every (model, variable) series is a separate Parquet file, so adding the results of a model
+    writes only that model's file and never reads or rewrites the results of the other models.
+    The combined '<experiment>_results.csv', with one '<model>_<variable>' column per series, is
+    exported from the store for tools that read it.
+
+    Attributes:
+        config (Dict[str, Any]): Configuration settings
+        logger (Any): Logger object for recording processing information
+        store_dir (Path): Directory with one Parquet file per series
+        csv_file (Path): Combined results CSV exported from the store
+    """
+
+    def __init__(self, config: Dict[str, Any], logger: Any):
+        self.config = config
+        self.logger = logger
+        project_dir = Path(self.config.get('CONFLUENCE_DATA_DIR')) / f"domain_{self.config.get('DOMAIN_NAME')}"
+        results_dir = project_dir / 'results'
+        self.store_dir = results_dir / f"{self.config['EXPERIMENT_ID']}_store"
+        self.csv_file = results_dir / f"{self.config['EXPERIMENT_ID']}_results.csv"
+
+    @staticmethod
+    def column_name(model: str, variable: str) -> str:
+        """Name of a series in the combined results, e.g. 'HYPE_discharge_cms'."""
+        return f"{model}_{variable}"
+
+    def _series_file(self, model: str, variable: str) -> Path:
+        return self.store_dir / f"{model}__{variable}.parquet"
+
+    def append(self, model: str, variable: str, series: pd.Series, attrs: Optional[Dict[str, Any]] = None,
+               export_csv: bool = True) -> Path:
+        """
+        Store a simulated series, replacing an earlier series of the same model and variable.
+
+        Args:
+            model (str): Model name, e.g. 'HYPE'
+            variable (str): Variable name including units, e.g. 'discharge_cms'
+            series (pd.Series): Time-indexed values
+            attrs (Optional[Dict[str, Any]]): Metadata stored with the series, e.g. units
+            export_csv (bool): Whether to re-export the combined results CSV
+
+        Returns:
+            Path: The combined results CSV if exported, otherwise the series file
+        """
+        if not self.store_dir.exists():
+            self.store_dir.mkdir(parents=True)
+            self._import_csv()
+        frame = pd.DataFrame({self.column_name(model, variable): pd.Series(series).values},
+                             index=pd.DatetimeIndex(pd.Series(series).index, name='time'))
+
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+        metadata = {'model': model, 'variable': variable, **(attrs or {})}
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               METADATA_KEY: json.dumps(metadata, default=str).encode()})
+
+        series_file = self._series_file(model, variable)
+        tmp_file = series_file.with_name(f"{series_file.name}.tmp")
+        pq.write_table(table, tmp_file)
+        tmp_file.replace(series_file)
+        self.logger.info(f"Stored {model} {variable} in the results store at {series_file}")
+
+        return self.export_csv() if export_csv else series_file
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read stored series into one time-indexed frame.
+
+        Args:
+            columns (Optional[List[str]]): '<model>_<variable>' names to read, all series if None
+
+        Returns:
+            pd.DataFrame: One column per series, on the union of their time indices
+        """
+        frames = []
+        for series_file in sorted(self.store_dir.glob('*__*.parquet')):
+            model, variable = series_file.stem.split('__', 1)
+            if columns is not None and self.column_name(model, variable) not in columns:
+                continue
+            frames.append(pq.read_table(series_file).to_pandas())
+        if not frames:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='time'))
+        return pd.concat(frames, axis=1).sort_index()
+
+    def _import_csv(self) -> None:
+        """Copy the series of a combined results CSV written before the store existed into the store."""
+        if not self.csv_file.exists():
+            return
+        existing = pd.read_csv(self.csv_file, index_col=0, parse_dates=True)
+        for column in existing.columns:
+            if '_' in column:
+                model, variable = column.split('_', 1)
+                self.append(model, variable, existing[column].dropna(), export_csv=False)
+        self.logger.info(f"Imported {len(existing.columns)} series from {self.csv_file} into the results store")
+
+    def export_csv(self) -> Path:
+        """Write the combined results CSV from the store."""
+        self.read().to_csv(self.csv_file)
+        self.logger.info(f"Combined results exported to {self.csv_file}")
+        return self.csv_file
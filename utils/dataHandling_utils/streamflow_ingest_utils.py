@@ -0,0 +1,239 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.dataHandling_utils.observation_store_utils import write_observation_store # type: ignore
+
+CFS_TO_CMS = 0.028316847
+INTERPOLATION_LIMIT = 24
+
+
+def parse_usgs(raw_file: Path) -> pd.Series:
+    """
+    Parse a USGS NWIS RDB (tab-separated) instantaneous or daily values file.
+
+    Only the datetime and first value column are read. The RDB column-format row does not parse
+    as a date and is dropped together with any other unparseable rows.
+
+    Args:
+        raw_file (Path): Raw USGS file
+
+    Returns:
+        pd.Series: Discharge in m3/s, indexed by time
+    """
+    raw = pd.read_csv(raw_file, comment='#', sep='\t', usecols=[2, 4], dtype=str, engine='c')
+    times = pd.to_datetime(raw.iloc[:, 0], format='%Y-%m-%d %H:%M', errors='coerce')
+    # Daily value files have no time of day
+    missing = times.isna()
+    if missing.any():
+        times[missing] = pd.to_datetime(raw.iloc[:, 0][missing], format='%Y-%m-%d', errors='coerce')
+    values = pd.to_numeric(raw.iloc[:, 1], errors='coerce').to_numpy() * CFS_TO_CMS
+    return _to_series(times.to_numpy(), values)
+
+
+def parse_wsc(raw_file: Path) -> pd.Series:
+    """
+    Parse a Water Survey of Canada real-time hydrometric CSV file.
+
+    Args:
+        raw_file (Path): Raw WSC file
+
+    Returns:
+        pd.Series: Discharge in m3/s, indexed by local standard time (America/Edmonton)
+    """
+    raw = pd.read_csv(raw_file, comment='#', usecols=['ISO 8601 UTC', 'Value'], engine='c')
+    times = pd.to_datetime(raw['ISO 8601 UTC'], format='ISO8601', utc=True)
+    times = times.dt.tz_convert('America/Edmonton').dt.tz_localize(None)
+    return _to_series(times.to_numpy(), pd.to_numeric(raw['Value'], errors='coerce').to_numpy())
+
+
+def parse_vi(raw_file: Path) -> pd.Series:
+    """
+    Parse an Icelandic Met Office (VI) daily discharge file.
+
+    Args:
+        raw_file (Path): Raw VI file, ';'-separated YYYY, MM, DD, qobs and qc_flag columns
+
+    Returns:
+        pd.Series: Discharge in m3/s, indexed by time
+    """
+    raw = pd.read_csv(raw_file, sep=';', header=None, names=['year', 'month', 'day', 'qobs', 'qc_flag'],
+                      usecols=['year', 'month', 'day', 'qobs'], skiprows=1, na_values='', engine='c')
+    times = pd.to_datetime(raw[['year', 'month', 'day']], errors='coerce')
+    return _to_series(times.to_numpy(), pd.to_numeric(raw['qobs'], errors='coerce').to_numpy())
+
+
+PARSERS: Dict[str, Callable[[Path], pd.Series]] = {
+    'USGS': parse_usgs,
+    'WSC': parse_wsc,
+    'VI': parse_vi,
+}
+
+
+def _to_series(times: np.ndarray, values: np.ndarray) -> pd.Series:
+    keep = ~np.isnat(times)
+    return pd.Series(np.asarray(values, dtype=np.float64)[keep],
+                     index=pd.DatetimeIndex(times[keep], name='datetime'), name='discharge_cms')
+
+
+def resample_observations(series: pd.Series, freq: str) -> pd.Series:
+    """
+    Validate and resample parsed observations in one pass.
+
+    Negative and non-finite discharges are treated as missing, duplicate time stamps are averaged
+    by the resampling, and gaps of up to INTERPOLATION_LIMIT steps are interpolated in time.
+
+    Args:
+        series (pd.Series): Parsed discharge, indexed by time
+        freq (str): Pandas resample frequency
+
+    Returns:
+        pd.Series: Resampled discharge named 'discharge_cms'
+    """
+    values = series.to_numpy(dtype=np.float64, copy=True)
+    values[~np.isfinite(values) | (values < 0)] = np.nan
+    series = pd.Series(values, index=series.index, name='discharge_cms')
+    if not series.index.is_monotonic_increasing:
+        series = series.sort_index(kind='stable')
+    resampled = series.resample(freq).mean()
+    return resampled.interpolate(method='time', limit=INTERPOLATION_LIMIT)
+
+
+def write_observation_csv(series: pd.Series, output_file: Path) -> Path:
+    """
+    Write resampled observations as the processed streamflow CSV in a single bulk write.
+
+    Time stamps are formatted for the whole column at once, as 'YYYY-MM-DD HH:MM:SS'.
+
+    Args:
+        series (pd.Series): Resampled discharge, indexed by time
+        output_file (Path): Processed streamflow CSV
+
+    Returns:
+        Path: The written CSV
+    """
+    stamps = np.datetime_as_string(series.index.to_numpy().astype('datetime64[s]'), unit='s')
+    frame = pd.DataFrame({'datetime': np.char.replace(stamps, 'T', ' '),
+                          'discharge_cms': series.to_numpy(dtype=np.float64)})
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    frame.to_csv(output_file, index=False, na_rep='nan', chunksize=1_000_000)
+    return output_file
+
+
+def ingest_streamflow(raw_file: Path, provider: str, output_file: Path, freq: str,
+                      logger: Optional[Any] = None) -> pd.Series:
+    """
+    Parse, validate, resample and write the streamflow observations of one station.
+
+    Writes the processed CSV and its memory-mapped observation store. The function only takes
+    paths and plain values, so it can be run for many stations in worker processes.
+
+    Args:
+        raw_file (Path): Raw provider file
+        provider (str): Data provider, one of PARSERS
+        output_file (Path): Processed streamflow CSV
+        freq (str): Pandas resample frequency
+        logger (Optional[Any]): Logger object for recording processing information
+
+    Returns:
+        pd.Series: Resampled discharge
+
+    Raises:
+        ValueError: If the provider is not supported
+    """
+    provider = provider.upper()
+    if provider not in PARSERS:
+        raise ValueError(f"Unsupported streamflow data provider: {provider}")
+
+    resampled = resample_observations(PARSERS[provider](Path(raw_file)), freq)
+    write_observation_csv(resampled, output_file)
+    write_observation_store(resampled, output_file, logger)
+    if logger is not None:
+        logger.info(f"Processed streamflow data saved to: {output_file}")
+    return resampled
+
+
+def _ingest_task(task: Tuple[str, str, str, str, str]) -> Dict[str, Any]:
+    """Ingest one station in a worker process and summarise the result for the batch index."""
+    station_id, provider, raw_file, output_file, freq = task
+    entry = {'station_id': station_id, 'provider': provider, 'raw_file': raw_file, 'processed_file': output_file,
+             'start': None, 'end': None, 'n_steps': 0, 'n_values': 0, 'status': 'ok', 'error': ''}
+    try:
+        resampled = ingest_streamflow(Path(raw_file), provider, Path(output_file), freq)
+        valid = resampled.dropna()
+        entry.update({'start': valid.index.min() if len(valid) else None,
+                      'end': valid.index.max() if len(valid) else None,
+                      'n_steps': len(resampled), 'n_values': len(valid)})
+    except Exception as e:
+        entry.update({'status': 'failed', 'error': str(e)})
+    return entry
+
+
+class BatchStreamflowIngestor:
+    """
+    Process the raw streamflow files of many stations concurrently.
+
+    Every station is ingested with ingest_streamflow in a worker process and written to its own
+    '<station_id>_streamflow_processed.csv' (plus observation store). A consolidated index lists
+    the processed file, period and number of values of every station, and the error of stations
+    that failed, so one bad file does not stop the batch.
+
+    Attributes:
+        config (Dict[str, Any]): Configuration settings
+        logger (Any): Logger object for recording processing information
+        num_processes (int): Number of worker processes
+    """
+
+    INDEX_NAME = 'streamflow_batch_index.csv'
+
+    def __init__(self, config: Dict[str, Any], logger: Any):
+        self.config = config
+        self.logger = logger
+        self.num_processes = max(1, int(self.config.get('MPI_PROCESSES', 1)))
+
+    @staticmethod
+    def output_file(output_dir: Path, station_id: str) -> Path:
+        """Processed streamflow CSV of a station in the batch output directory."""
+        return Path(output_dir) / f"{station_id}_streamflow_processed.csv"
+
+    def run(self, stations: pd.DataFrame, output_dir: Path, freq: str) -> pd.DataFrame:
+        """
+        Ingest all stations and write the consolidated index.
+
+        Args:
+            stations (pd.DataFrame): One row per station with 'station_id', 'raw_file' and 'provider' columns
+            output_dir (Path): Directory for the per-station outputs and the index
+            freq (str): Pandas resample frequency
+
+        Returns:
+            pd.DataFrame: The batch index, one row per station
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        tasks = [(str(row.station_id), str(row.provider).upper(), str(row.raw_file),
+                  str(self.output_file(output_dir, row.station_id)), freq)
+                 for row in stations.itertuples(index=False)]
+        self.logger.info(f"Processing streamflow data of {len(tasks)} stations with {min(self.num_processes, max(len(tasks), 1))} processes")
+
+        if self.num_processes > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.num_processes, len(tasks))) as executor:
+                futures = [executor.submit(_ingest_task, task) for task in tasks]
+                entries: List[Dict[str, Any]] = [future.result() for future in as_completed(futures)]
+        else:
+            entries = [_ingest_task(task) for task in tasks]
+
+        index = pd.DataFrame(entries, columns=['station_id', 'provider', 'raw_file', 'processed_file', 'start',
+                                               'end', 'n_steps', 'n_values', 'status', 'error'])
+        index = index.sort_values('station_id').reset_index(drop=True)
+        index_file = output_dir / self.INDEX_NAME
+        index.to_csv(index_file, index=False)
+
+        for entry in index[index['status'] != 'ok'].itertuples(index=False):
+            self.logger.error(f"Streamflow processing failed for station {entry.station_id}: {entry.error}")
+        self.logger.info(f"Processed {int((index['status'] == 'ok').sum())} of {len(index)} stations, index saved to {index_file}")
+        return index
@@ -0,0 +1,342 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Tuple, Optional
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from hydrobm.calculate import calc_bm # type: ignore
+
+BENCHMARKS = [
+    # Streamflow benchmarks
+    "mean_flow",
+    "median_flow",
+    "annual_mean_flow",
+    "annual_median_flow",
+    "monthly_mean_flow",
+    "monthly_median_flow",
+    "daily_mean_flow",
+    "daily_median_flow",
+
+    # Long-term rainfall-runoff ratio benchmarks
+    "rainfall_runoff_ratio_to_all",
+    "rainfall_runoff_ratio_to_annual",
+    "rainfall_runoff_ratio_to_monthly",
+    "rainfall_runoff_ratio_to_daily",
+    "rainfall_runoff_ratio_to_timestep",
+
+    # Short-term rainfall-runoff ratio benchmarks
+    "monthly_rainfall_runoff_ratio_to_monthly",
+    "monthly_rainfall_runoff_ratio_to_daily",
+    "monthly_rainfall_runoff_ratio_to_timestep",
+
+    # Schaefli & Gupta (2007) benchmarks
+    "scaled_precipitation_benchmark",  # equivalent to "rainfall_runoff_ratio_to_daily"
+    "adjusted_precipitation_benchmark",
+    "adjusted_smoothed_precipitation_benchmark",
+]
+
+METRICS = ['nse', 'kge', 'mse', 'rmse']
+
+# Benchmarks that only depend on the calibration period climatology, with the calendar key
+# (calendar month or day of year) they are grouped by, or None for a constant per gauge
+CLIMATOLOGY_BENCHMARKS = {
+    'mean_flow': None,
+    'median_flow': None,
+    'monthly_mean_flow': 'month',
+    'monthly_median_flow': 'month',
+    'daily_mean_flow': 'doy',
+    'daily_median_flow': 'doy',
+}
+
+MIN_PERIOD_POINTS = 30
+
+# Largest absolute difference between batch and hydrobm scores accepted by the agreement check
+HYDROBM_CHECK_TOLERANCE = 1e-6
+
+
+def year_splits(years: List[int], scheme: str = 'midpoint', n_folds: int = 5, min_cal_years: int = 1) -> List[Dict[str, Any]]:
+    """
+    Define calibration/validation splits by year.
+
+    Args:
+        years (List[int]): Available years
+        scheme (str): 'midpoint' (calibrate before the middle year, validate from it), 'kfold'
+                      (each block of consecutive years is validated once, calibrating on the others)
+                      or 'rolling' (rolling origin: validate each year on all years before it)
+        n_folds (int): Number of folds for 'kfold'
+        min_cal_years (int): Minimum number of calibration years for 'rolling'
+
+    Returns:
+        List[Dict[str, Any]]: One dict per split with 'name', 'cal_years' and 'val_years'
+
+    Raises:
+        ValueError: If the scheme is unknown
+    """
+    years = sorted(int(year) for year in years)
+    if scheme == 'midpoint':
+        mid_year = years[len(years) // 2]
+        return [{'name': f"midpoint_{mid_year}",
+                 'cal_years': [year for year in years if year < mid_year],
+                 'val_years': [year for year in years if year >= mid_year]}]
+    if scheme == 'kfold':
+        folds = np.array_split(np.array(years), min(int(n_folds), len(years)))
+        return [{'name': f"fold_{i + 1}",
+                 'cal_years': [year for year in years if year not in fold],
+                 'val_years': fold.tolist()} for i, fold in enumerate(folds)]
+    if scheme == 'rolling':
+        return [{'name': f"origin_{years[i]}", 'cal_years': years[:i], 'val_years': [years[i]]}
+                for i in range(max(1, int(min_cal_years)), len(years))]
+    raise ValueError(f"Unknown benchmark split scheme: {scheme}. Options: midpoint, kfold, rolling")
+
+
+def scores_from_sums(sums: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute NSE, KGE, MSE and RMSE from per-group sums of observations and benchmark flows.
+
+    Args:
+        sums (pd.DataFrame): Columns n, o, o2, s, s2 and os: number of pairs, and sums of the
+                             observations, squared observations, benchmark flows, squared
+                             benchmark flows and their products
+
+    Returns:
+        pd.DataFrame: One column per metric, same index as sums. Groups with fewer than
+                      MIN_PERIOD_POINTS pairs are NaN. As in hydrobm, the KGE correlation term
+                      is 0 when the observations or the benchmark flows are constant.
+    """
+    n = sums['n'].where(sums['n'] >= MIN_PERIOD_POINTS)
+    mean_o, mean_s = sums['o'] / n, sums['s'] / n
+    # Variances from sums carry rounding noise, so constant series are detected relative to their mean
+    var_o = sums['o2'] / n - mean_o ** 2
+    var_o = var_o.where(var_o > 1e-12 * mean_o ** 2, 0.0)
+    var_s = sums['s2'] / n - mean_s ** 2
+    var_s = var_s.where(var_s > 1e-12 * mean_s ** 2, 0.0)
+    cov = sums['os'] / n - mean_o * mean_s
+    mse = (sums['o2'] - 2 * sums['os'] + sums['s2']) / n
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (cov / np.sqrt(var_o * var_s)).where((var_o > 0) & (var_s > 0), 0.0).where(n.notna())
+        alpha = np.sqrt(var_s / var_o)
+        beta = mean_s / mean_o
+        kge = 1 - np.sqrt((r - 1) ** 2 + (alpha - 1) ** 2 + (beta - 1) ** 2)
+        nse = 1 - mse / var_o
+
+    return pd.DataFrame({'nse': nse, 'kge': kge, 'mse': mse, 'rmse': np.sqrt(mse)}, index=sums.index)
+
+
+def _hydrobm_task(task: Tuple[str, Dict[str, Any], pd.DataFrame, List[str], List[str]]) -> Tuple[str, str, Optional[pd.DataFrame], Optional[str]]:
+    """
+    Run hydrobm for one gauge and one split. Runs in a worker process.
+
+    Args:
+        task (Tuple): Gauge id, split definition, gauge input data, benchmarks and metrics
+
+    Returns:
+        Tuple[str, str, Optional[pd.DataFrame], Optional[str]]: Gauge id, split name, scores
+            (None on failure) and the error message on failure
+    """
+    gauge, split, gauge_data, benchmarks, metrics = task
+    try:
+        years = gauge_data.index.year
+        gauge_data = gauge_data[years.isin(split['cal_years'] + split['val_years'])]
+        years = gauge_data.index.year
+        data = gauge_data.to_xarray()
+        _, scores = calc_bm(
+            data,
+            np.asarray(years.isin(split['cal_years'])),
+            val_mask=np.asarray(years.isin(split['val_years'])),
+            precipitation="precipitation",
+            streamflow="streamflow",
+            benchmarks=benchmarks,
+            metrics=metrics,
+            calc_snowmelt=True,
+            temperature="temperature",
+            snowmelt_threshold=273.15,
+            snowmelt_rate=3.0
+        )
+        return gauge, split['name'], pd.DataFrame(scores), None
+    except Exception as e:
+        return gauge, split['name'], None, str(e)
+
+
+class BatchBenchmarker:
+    """
+    Compute hydrobm benchmark scores for many gauges and many calibration/validation splits at once.
+
+    The gauges are stacked into one long table. Benchmarks that only depend on the calibration
+    flow climatology (see CLIMATOLOGY_BENCHMARKS) are computed for all gauges with groupby
+    reductions: the sums and counts behind the mean flow climatologies are aggregated per gauge
+    and year once and shared by all splits, and the scores of all gauges follow from per-group
+    sums of a single table per split. The remaining benchmarks, including all rainfall-runoff
+    ratio benchmarks (which depend on the period precipitation and the snowmelt-adjusted input),
+    are computed with hydrobm, with the (gauge, split) pairs distributed over a process pool.
+    Unless BENCHMARK_CHECK_HYDROBM is False, the batch scores of the first gauge and split are
+    compared against hydrobm before the batch is run.
+
+    Attributes:
+        config (Dict[str, Any]): Configuration settings
+        logger (Any): Logger object for recording processing information
+        benchmarks (List[str]): Benchmarks to compute
+        metrics (List[str]): Metrics to compute
+        num_processes (int): Number of worker processes for the hydrobm benchmarks
+    """
+
+    def __init__(self, config: Dict[str, Any], logger: Any, benchmarks: Optional[List[str]] = None,
+                 metrics: Optional[List[str]] = None):
+        self.config = config
+        self.logger = logger
+        self.benchmarks = benchmarks or BENCHMARKS
+        self.metrics = metrics or METRICS
+        self.num_processes = max(1, int(self.config.get('MPI_PROCESSES', 1)))
+
+    def run(self, gauge_data: Dict[str, pd.DataFrame], splits: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Compute benchmark scores for all gauges and splits.
+
+        Args:
+            gauge_data (Dict[str, pd.DataFrame]): Daily benchmark input per gauge id, with a datetime
+                                                  index and streamflow, precipitation and temperature columns
+            splits (List[Dict[str, Any]]): Split definitions, see year_splits
+
+        Returns:
+            pd.DataFrame: One row per gauge, split and benchmark, with '<metric>_cal' and '<metric>_val' columns
+        """
+        self.logger.info(f"Benchmarking {len(gauge_data)} gauges over {len(splits)} splits")
+        results = []
+
+        climatology = [b for b in self.benchmarks if b in CLIMATOLOGY_BENCHMARKS]
+        if climatology and gauge_data and splits and self.config.get('BENCHMARK_CHECK_HYDROBM', True):
+            self.check_against_hydrobm(gauge_data, splits, climatology)
+        if climatology:
+            results.append(self._climatology_scores(self._stack(gauge_data), splits, climatology))
+
+        remaining = [b for b in self.benchmarks if b not in CLIMATOLOGY_BENCHMARKS]
+        if remaining:
+            results.append(self._hydrobm_scores(gauge_data, splits, remaining))
+
+        return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+    def check_against_hydrobm(self, gauge_data: Dict[str, pd.DataFrame], splits: List[Dict[str, Any]],
+                              benchmarks: List[str]) -> float:
+        """
+        Check that the batch climatology scores agree with hydrobm for the first gauge and split.
+
+        Args:
+            gauge_data (Dict[str, pd.DataFrame]): Daily benchmark input per gauge id
+            splits (List[Dict[str, Any]]): Split definitions, see year_splits
+            benchmarks (List[str]): Climatology benchmarks to check
+
+        Returns:
+            float: Largest absolute score difference (NaN if hydrobm failed)
+        """
+        gauge, data = next(iter(gauge_data.items()))
+        split = splits[0]
+        batch = self._climatology_scores(self._stack({gauge: data}), [split], benchmarks)
+        _, _, reference, error = _hydrobm_task((str(gauge), split, data.dropna(), benchmarks, self.metrics))
+        if reference is None:
+            self.logger.warning(f"Could not check batch benchmark scores against hydrobm for gauge {gauge}: {error}")
+            return float('nan')
+
+        columns = [c for c in batch.columns if c.endswith(('_cal', '_val')) and c in reference.columns]
+        merged = batch.merge(reference, on='benchmarks', suffixes=('_batch', '_hydrobm'))
+        batch_values = merged[[f"{c}_batch" for c in columns]].to_numpy(dtype=float)
+        reference_values = merged[[f"{c}_hydrobm" for c in columns]].to_numpy(dtype=float)
+        mismatch = np.isnan(batch_values) != np.isnan(reference_values)
+        with np.errstate(invalid='ignore'):
+            both = np.isfinite(batch_values) & np.isfinite(reference_values)
+            diff = np.abs(batch_values - reference_values)[both]
+        max_diff = float(diff.max()) if diff.size else 0.0
+
+        if mismatch.any() or max_diff > HYDROBM_CHECK_TOLERANCE:
+            self.logger.warning(f"Batch benchmark scores differ from hydrobm for gauge {gauge}, split {split['name']}: "
+                                f"max difference {max_diff:.3g}, {int(mismatch.sum())} scores missing in one of them")
+        else:
+            self.logger.info(f"Batch benchmark scores agree with hydrobm for gauge {gauge}, split {split['name']} "
+                             f"(max difference {max_diff:.3g})")
+        return max_diff
+
+    @staticmethod
+    def _stack(gauge_data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Stack the gauge inputs into one long table with calendar keys."""
+        frames = []
+        for gauge, data in gauge_data.items():
+            # Drop the same rows as the hydrobm input
+            data = data.dropna()
+            frames.append(pd.DataFrame({
+                'gauge': str(gauge),
+                'year': data.index.year,
+                'month': data.index.month,
+                'doy': data.index.dayofyear,
+                'streamflow': data['streamflow'].values,
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    def _climatology_scores(self, data: pd.DataFrame, splits: List[Dict[str, Any]], benchmarks: List[str]) -> pd.DataFrame:
+        """Compute the climatology benchmarks and their scores for all gauges and splits."""
+        # Sums and counts per gauge and year, shared by all splits
+        year_sums = {key: data.groupby(['gauge', 'year'] + ([key] if key else []))['streamflow'].agg(['sum', 'count'])
+                     for key in {CLIMATOLOGY_BENCHMARKS[b] for b in benchmarks}}
+
+        results = []
+        for split in splits:
+            rows = data[data['year'].isin(split['cal_years'] + split['val_years'])]
+            cal_rows = rows[rows['year'].isin(split['cal_years'])]
+            period = np.where(rows['year'].isin(split['cal_years']), 'cal', 'val')
+            gauge_index = pd.Index(rows['gauge'])
+
+            flows = {}
+            for benchmark in benchmarks:
+                key = CLIMATOLOGY_BENCHMARKS[benchmark]
+                lookup = gauge_index if key is None else pd.MultiIndex.from_arrays([rows['gauge'], rows[key]])
+
+                if 'median' in benchmark:
+                    values = cal_rows.groupby(['gauge'] + ([key] if key else []))['streamflow'].median()
+                else:
+                    # Means follow from the shared per-year sums of the calibration years
+                    sums = year_sums[key]
+                    sums = sums[sums.index.get_level_values('year').isin(split['cal_years'])]
+                    sums = sums.groupby(level=['gauge'] + ([key] if key else [])).sum()
+                    values = sums['sum'] / sums['count']
+
+                flows[benchmark] = values.reindex(lookup).values
+
+            results.append(self._score_flows(rows, period, flows, split['name']))
+
+        return pd.concat(results, ignore_index=True)
+
+    def _score_flows(self, rows: pd.DataFrame, period: np.ndarray, flows: Dict[str, np.ndarray], split_name: str) -> pd.DataFrame:
+        """Score the benchmark flows of one split against the observations, per gauge and period."""
+        obs = rows['streamflow'].values
+        results = []
+        for benchmark, sim in flows.items():
+            valid = np.isfinite(sim) & np.isfinite(obs)
+            o, s = np.where(valid, obs, 0.0), np.where(valid, sim, 0.0)
+            terms = pd.DataFrame({'gauge': rows['gauge'].values, 'period': period, 'n': valid.astype(int),
+                                  'o': o, 'o2': o * o, 's': s, 's2': s * s, 'os': o * s})
+            scores = scores_from_sums(terms.groupby(['gauge', 'period']).sum())[self.metrics].unstack('period')
+            scores.columns = [f"{metric}_{p}" for metric, p in scores.columns]
+            scores = scores.reset_index()
+            scores.insert(1, 'split', split_name)
+            scores.insert(2, 'benchmarks', benchmark)
+            results.append(scores)
+        return pd.concat(results, ignore_index=True)
+
+    def _hydrobm_scores(self, gauge_data: Dict[str, pd.DataFrame], splits: List[Dict[str, Any]], benchmarks: List[str]) -> pd.DataFrame:
+        """Compute the remaining benchmarks with hydrobm for every gauge and split."""
+        tasks = [(str(gauge), split, data.dropna(), benchmarks, self.metrics)
+                 for gauge, data in gauge_data.items() for split in splits]
+        self.logger.info(f"Running hydrobm for {len(benchmarks)} benchmarks on {len(tasks)} gauge/split pairs")
+
+        if self.num_processes > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.num_processes, len(tasks))) as executor:
+                futures = [executor.submit(_hydrobm_task, task) for task in tasks]
+                outputs = [future.result() for future in as_completed(futures)]
+        else:
+            outputs = [_hydrobm_task(task) for task in tasks]
+
+        results = []
+        for gauge, split_name, scores, error in outputs:
+            if scores is None:
+                self.logger.error(f"hydrobm failed for gauge {gauge}, split {split_name}: {error}")
+                continue
+            scores.insert(0, 'gauge', gauge)
+            scores.insert(1, 'split', split_name)
+            results.append(scores)
+        return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
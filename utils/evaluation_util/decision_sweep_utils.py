@@ -0,0 +1,333 @@
+import os
+import sys
+import csv
+import shutil
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+import xarray as xr # type: ignore
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.evaluation_util.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE # type: ignore
+from utils.dataHandling_utils.observation_store_utils import load_observations # type: ignore
+
+# MPI message tags of the sweep master-worker protocol
+TAG_TASK = 1
+TAG_RESULT = 2
+TAG_STOP = 3
+
+
+def decision_metrics(obs_file_path: Path, sim_file_path: Path, sim_reach_ID: Any) -> Tuple[float, float, float, float, float]:
+    """
+    Calculate performance metrics of routed SUMMA runoff against hourly observations.
+
+    Args:
+        obs_file_path (Path): Path to the preprocessed streamflow observations.
+        sim_file_path (Path): Path to the mizuRoute output file.
+        sim_reach_ID (Any): Id of the evaluated river reach.
+
+    Returns:
+        Tuple[float, float, float, float, float]: KGE, KGEp, NSE, MAE and RMSE.
+    """
+    dfObs = load_observations(obs_file_path, 'hourly')
+
+    with xr.open_dataset(sim_file_path, engine='netcdf4') as dfSim:
+        segment_index = dfSim['reachID'].values == int(sim_reach_ID)
+        dfSim = dfSim.sel(seg=segment_index)
+        dfSim = dfSim['IRFroutedRunoff'].to_dataframe().reset_index()
+    dfSim.set_index('time', inplace=True)
+    dfSim.index = dfSim.index.round(freq='h')
+
+    dfObs = dfObs.reindex(dfSim.index).dropna()
+    dfSim = dfSim.reindex(dfObs.index).dropna()
+    obs = dfObs.values
+    sim = dfSim['IRFroutedRunoff'].values
+
+    return (get_KGE(obs, sim, transfo=1), get_KGEp(obs, sim, transfo=1), get_NSE(obs, sim, transfo=1),
+            get_MAE(obs, sim, transfo=1), get_RMSE(obs, sim, transfo=1))
+
+
+def _set_keyed_lines(path: Path, values: Dict[str, str], quote: bool) -> None:
+    """Replace the value of 'key value ! comment' lines, as used by SUMMA and mizuRoute control files."""
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        for key, value in values.items():
+            if stripped.split() and stripped.split()[0] == key:
+                comment = f"    ! {line.split('!', 1)[1].strip()}" if '!' in line else ''
+                value = f"'{value}'" if quote else value
+                lines[i] = f"{key.ljust(20)} {value}{comment}\n"
+
+    with open(path, 'w') as f:
+        f.writelines(lines)
+
+
+def run_decision_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run SUMMA and mizuRoute for one decision combination in its sandbox and evaluate the result.
+
+    Runs in a worker process or on an MPI rank.
+
+    Args:
+        task (Dict[str, Any]): Iteration, combination, sandbox paths and executables prepared by DecisionSweep.
+
+    Returns:
+        Dict[str, Any]: Iteration, combination and either the metrics or an error message.
+    """
+    result = {'iteration': task['iteration'], 'combination': task['combination']}
+    try:
+        for model, command in (('SUMMA', task['summa_command']), ('mizuRoute', task['mizu_command'])):
+            log_file_path = Path(task['log_dir']) / f"{model}_log.txt"
+            with open(log_file_path, 'w') as log_file:
+                run = subprocess.run(command, check=False, stdout=log_file, stderr=subprocess.STDOUT)
+            if run.returncode != 0:
+                raise RuntimeError(f"{model} failed with return code {run.returncode}, see {log_file_path}")
+
+        result['metrics'] = decision_metrics(task['obs_file'], task['sim_file'], task['sim_reach_id'])
+
+        if task['cleanup']:
+            shutil.rmtree(task['summa_output'], ignore_errors=True)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+class DecisionSweep:
+    """
+    Run SUMMA decision combinations in parallel, each in its own lightweight sandbox.
+
+    A sandbox only holds a private modelDecisions file, SUMMA file manager and mizuRoute control
+    file, plus the run outputs. All other settings, forcing and ancillary files are shared with
+    the experiment. Combinations run across a local process pool, or across MPI ranks when the
+    analysis is launched with more than one rank, and their metrics are appended to the
+    comparison CSV as they arrive.
+
+    Attributes:
+        config (Dict[str, Any]): Configuration settings.
+        logger (Any): Logger object for recording run information.
+        decision_options (Dict[str, List[str]]): Options to test per SUMMA decision.
+        sweep_dir (Path): Directory with one sandbox per combination.
+        num_processes (int): Number of local worker processes.
+    """
+
+    def __init__(self, config: Dict[str, Any], logger: Any, decision_options: Dict[str, List[str]]):
+        self.config = config
+        self.logger = logger
+        self.decision_options = decision_options
+        self.root_path = Path(self.config.get('CONFLUENCE_DATA_DIR'))
+        self.project_dir = self.root_path / f"domain_{self.config.get('DOMAIN_NAME')}"
+        self.experiment_id = self.config.get('EXPERIMENT_ID')
+        self.sweep_dir = self.project_dir / 'simulations' / self.experiment_id / 'decision_sweep'
+        self.num_processes = int(self.config.get('MPI_PROCESSES', multiprocessing.cpu_count()))
+        self.cleanup = str(self.config.get('DECISION_SWEEP_CLEANUP', True)).lower() in ('true', 'yes', '1')
+
+        self.summa_settings = self._get_path('SETTINGS_SUMMA_PATH', 'settings/SUMMA')
+        self.mizu_settings = self._get_path('SETTINGS_MIZU_PATH', 'settings/mizuRoute')
+
+    @property
+    def is_master(self) -> bool:
+        """Whether this process writes the comparison CSV, i.e. it is not an MPI worker rank."""
+        comm = _mpi_comm()
+        return comm is None or comm.Get_rank() == 0
+
+    def _get_path(self, path_key: str, default_subpath: str) -> Path:
+        path_value = self.config.get(path_key)
+        if path_value == 'default' or path_value is None:
+            return self.project_dir / default_subpath
+        return Path(path_value)
+
+    def _executable(self, path_key: str, default_subpath: str, exe_key: str) -> str:
+        install_path = self.config.get(path_key)
+        install_path = self.root_path / default_subpath if install_path == 'default' else Path(install_path)
+        return str(install_path / self.config.get(exe_key))
+
+    def prepare_sandbox(self, iteration: int, combination: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Create the sandbox of a combination and describe its run.
+
+        Args:
+            iteration (int): 1-based number of the combination.
+            combination (Tuple[str, ...]): Option per decision, in DECISION_OPTIONS order.
+
+        Returns:
+            Dict[str, Any]: Task passed to run_decision_task.
+        """
+        run_id = f"{self.experiment_id}_dec{iteration:04d}"
+        sandbox = self.sweep_dir / run_id
+        settings_dir = sandbox / 'run_settings'
+        summa_output = sandbox / 'SUMMA'
+        mizu_output = sandbox / 'mizuRoute'
+        log_dir = sandbox / 'logs'
+        for directory in (settings_dir, summa_output, mizu_output, log_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        # Private decisions file with the options of this combination
+        decisions_file = settings_dir / 'modelDecisions.txt'
+        shutil.copy(self.summa_settings / 'modelDecisions.txt', decisions_file)
+        write_model_decisions(decisions_file, dict(zip(self.decision_options.keys(), combination)))
+
+        # Private file manager: shared settings, private decisions file and outputs. SUMMA prefixes
+        # decisionsFile with settingsPath, so the private file is referenced relative to it.
+        filemanager = settings_dir / self.config.get('SETTINGS_SUMMA_FILEMANAGER')
+        shutil.copy(self.summa_settings / self.config.get('SETTINGS_SUMMA_FILEMANAGER'), filemanager)
+        _set_keyed_lines(filemanager, {
+            'decisionsFile': os.path.relpath(decisions_file, self.summa_settings),
+            'outputPath': f"{summa_output}/",
+            'outFilePrefix': run_id
+        }, quote=True)
+
+        # Private mizuRoute control file reading the sandbox SUMMA output
+        control_file = settings_dir / self.config.get('SETTINGS_MIZU_CONTROL_FILE')
+        shutil.copy(self.mizu_settings / self.config.get('SETTINGS_MIZU_CONTROL_FILE'), control_file)
+        _set_keyed_lines(control_file, {
+            '<input_dir>': f"{summa_output}/",
+            '<output_dir>': f"{mizu_output}/",
+            '<case_name>': run_id,
+            '<fname_qsim>': f"{run_id}_timestep.nc"
+        }, quote=False)
+
+        obs_file = self.config.get('OBSERVATIONS_PATH')
+        if obs_file == 'default':
+            obs_file = self.project_dir / 'observations' / 'streamflow' / 'preprocessed' / f"{self.config['DOMAIN_NAME']}_streamflow_processed.csv"
+        # mizuRoute output named like SIMULATIONS_PATH, with the run id in place of the experiment id
+        sim_path = self.config.get('SIMULATIONS_PATH')
+        if sim_path in (None, 'default'):
+            start_year = self.config.get('EXPERIMENT_TIME_START').split('-')[0]
+            sim_name = f"{run_id}.h.{start_year}-01-01-03600.nc"
+        else:
+            sim_name = Path(sim_path).name
+            if sim_name.startswith(self.experiment_id):
+                sim_name = run_id + sim_name[len(self.experiment_id):]
+
+        return {
+            'iteration': iteration,
+            'combination': combination,
+            'summa_command': [self._executable('SUMMA_INSTALL_PATH', 'installs/summa/bin', 'SUMMA_EXE'), '-m', str(filemanager)],
+            'mizu_command': [self._executable('INSTALL_PATH_MIZUROUTE', 'installs/mizuRoute/route/bin', 'EXE_NAME_MIZUROUTE'), str(control_file)],
+            'log_dir': str(log_dir),
+            'summa_output': str(summa_output),
+            'sim_file': str(mizu_output / sim_name),
+            'obs_file': str(obs_file),
+            'sim_reach_id': self.config.get('SIM_REACH_ID'),
+            'cleanup': self.cleanup
+        }
+
+    def run(self, combinations: List[Tuple[str, ...]], master_file: Path) -> Path:
+        """
+        Run all combinations and stream their metrics into the comparison CSV.
+
+        Args:
+            combinations (List[Tuple[str, ...]]): Decision combinations to run.
+            master_file (Path): Comparison CSV, whose header has already been written.
+
+        Returns:
+            Path: Path to the comparison CSV, only written by the master process.
+        """
+        comm = _mpi_comm()
+        if comm is not None and comm.Get_size() > 1:
+            if comm.Get_rank() != 0:
+                self._mpi_worker(comm)
+                return master_file
+            results = self._mpi_master(comm, combinations)
+        else:
+            results = self._pool(combinations)
+
+        for result in results:
+            self._write_result(master_file, result, len(combinations))
+        return master_file
+
+    def _pool(self, combinations: List[Tuple[str, ...]]):
+        """Run the combinations on a local process pool, yielding results as they complete."""
+        tasks = [self.prepare_sandbox(i, combination) for i, combination in enumerate(combinations, 1)]
+        workers = max(1, min(self.num_processes, len(tasks)))
+        self.logger.info(f"Running {len(tasks)} decision combinations on {workers} local processes")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_decision_task, task) for task in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _mpi_master(self, comm: Any, combinations: List[Tuple[str, ...]]):
+        """Hand out combinations to MPI worker ranks one at a time, yielding results as they arrive."""
+        from mpi4py import MPI # type: ignore
+
+        tasks = [self.prepare_sandbox(i, combination) for i, combination in enumerate(combinations, 1)]
+        self.logger.info(f"Running {len(tasks)} decision combinations on {comm.Get_size() - 1} MPI worker ranks")
+        status = MPI.Status()
+        pending = 0
+        for worker in range(1, comm.Get_size()):
+            if tasks:
+                comm.send(tasks.pop(0), dest=worker, tag=TAG_TASK)
+                pending += 1
+            else:
+                comm.send(None, dest=worker, tag=TAG_STOP)
+
+        while pending:
+            result = comm.recv(source=MPI.ANY_SOURCE, tag=TAG_RESULT, status=status)
+            pending -= 1
+            if tasks:
+                comm.send(tasks.pop(0), dest=status.Get_source(), tag=TAG_TASK)
+                pending += 1
+            else:
+                comm.send(None, dest=status.Get_source(), tag=TAG_STOP)
+            yield result
+
+    def _mpi_worker(self, comm: Any) -> None:
+        """Run combinations received from the master rank until told to stop."""
+        from mpi4py import MPI # type: ignore
+
+        status = MPI.Status()
+        while True:
+            task = comm.recv(source=0, tag=MPI.ANY_TAG, status=status)
+            if status.Get_tag() == TAG_STOP:
+                break
+            comm.send(run_decision_task(task), dest=0, tag=TAG_RESULT)
+
+    def _write_result(self, master_file: Path, result: Dict[str, Any], n_combinations: int) -> None:
+        """Append the result of one combination to the comparison CSV."""
+        i, combination = result['iteration'], list(result['combination'])
+        with open(master_file, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if 'metrics' in result:
+                writer.writerow([i] + combination + list(result['metrics']))
+            else:
+                writer.writerow([i] + combination + ['erroneous combination'])
+
+        if 'metrics' in result:
+            kge, kgep, nse, mae, rmse = result['metrics']
+            self.logger.info(f"Combination {i} of {n_combinations} completed: KGE={kge:.3f}, KGEp={kgep:.3f}, "
+                             f"NSE={nse:.3f}, MAE={mae:.3f}, RMSE={rmse:.3f}")
+        else:
+            self.logger.error(f"Error in combination {i} of {n_combinations}: {result['error']}")
+
+
+def write_model_decisions(decisions_file: Path, option_map: Dict[str, str]) -> None:
+    """
+    Set decision options in a SUMMA modelDecisions file.
+
+    Args:
+        decisions_file (Path): Path to the modelDecisions file to update in place.
+        option_map (Dict[str, str]): Option per decision name.
+    """
+    with open(decisions_file, 'r') as f:
+        lines = f.readlines()
+
+    for i, line in enumerate(lines):
+        for option, value in option_map.items():
+            if line.strip().startswith(option):
+                lines[i] = f"{option.ljust(30)} {value.ljust(15)} ! {line.split('!')[-1].strip()}\n"
+
+    with open(decisions_file, 'w') as f:
+        f.writelines(lines)
+
+
+def _mpi_comm() -> Optional[Any]:
+    """Get the MPI world communicator if mpi4py is available."""
+    try:
+        from mpi4py import MPI # type: ignore
+    except ImportError:
+        return None
+    return MPI.COMM_WORLD
@@ -1,24 +1,21 @@
 import pandas as pd # type: ignore
-import numpy as np # type: ignore
 import sys
 import csv
 from hydrobm.calculate import calc_bm # type: ignore
 import matplotlib.pyplot as plt # type: ignore
 from pathlib import Path 
-from pyviscous import viscous # type: ignore
-from SALib.analyze import sobol, rbd_fast # type: ignore
-from SALib.sample import sobol as sobol_sample # type: ignore
+from SALib.analyze import rbd_fast # type: ignore
 from scipy.stats import spearmanr  # type: ignore
-from tqdm import tqdm # type: ignore
 import itertools
 from typing import Dict, List, Tuple, Any
-import xarray as xr # type: ignore
 from datetime import datetime
 import json
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
-from utils.evaluation_util.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE # type: ignore
-from utils.models_utils.model_utils import SummaRunner, MizuRouteRunner # type: ignore
+from utils.evaluation_util.decision_sweep_utils import DecisionSweep, decision_metrics # type: ignore
+from utils.evaluation_util.sobol_surrogate_utils import SurrogateSobolAnalyzer # type: ignore
+from utils.evaluation_util.viscous_utils import ViscousRunner # type: ignore
+from utils.evaluation_util.benchmark_utils import BatchBenchmarker, BENCHMARKS, METRICS, year_splits # type: ignore
 
 class SensitivityAnalyzer:
     def __init__(self, config, logger):
@@ -49,32 +46,17 @@ class SensitivityAnalyzer:
         x = samples[parameter_columns].values
         y = samples[metric].values.reshape(-1, 1)
         
-        sensitivities = []
-        
-        for i, param in tqdm(enumerate(parameter_columns), total=len(parameter_columns), desc="Calculating sensitivities"):
-            try:
-                try:
-                    sensitivity_result = viscous(x, y, i, sensType='total')
-                except ValueError:
-                    sensitivity_result = viscous(x, y, i, sensType='single')
-                
-                if isinstance(sensitivity_result, tuple):
-                    sensitivity = sensitivity_result[0]
-                else:
-                    sensitivity = sensitivity_result
-                
-                sensitivities.append(sensitivity)
-                self.logger.info(f"Successfully calculated sensitivity for {param}")
-            except Exception as e:
-                self.logger.error(f"Error in sensitivity analysis for parameter {param}: {str(e)}")
-                sensitivities.append(-999)
+        runner = ViscousRunner(self.config, self.logger, self.output_folder / 'viscous_cache.json')
+        sensitivities = runner.run(x, y, parameter_columns)
         
         self.logger.info("Sensitivity analysis completed")
-        return pd.Series(sensitivities, index=parameter_columns)
+        return sensitivities
 
     def perform_sobol_analysis(self, samples, metric='RMSE'):
         self.logger.info(f"Performing Sobol analysis using {metric} metric")
-        parameter_columns = [col for col in samples.columns if col not in ['Iteration', 'RMSE', 'KGE', 'KGEp', 'NSE', 'MAE']]
+        metric_columns = ['RMSE', 'KGE', 'KGEp', 'KGEnp', 'NSE', 'MAE']
+        excluded = ['Iteration'] + metric_columns + [f'Calib_{m}' for m in metric_columns]
+        parameter_columns = [col for col in samples.columns if col not in excluded]
         
         problem = {
             'num_vars': len(parameter_columns),
@@ -82,18 +64,16 @@ class SensitivityAnalyzer:
             'bounds': [[samples[col].min(), samples[col].max()] for col in parameter_columns]
         }
         
-        param_values = sobol_sample.sample(problem, 1024)
-        
-        Y = np.zeros(param_values.shape[0])
-        for i in range(param_values.shape[0]):
-            interpolated_values = []
-            for j, col in enumerate(parameter_columns):
-                interpolated_values.append(np.interp(param_values[i, j], 
-                                                     samples[col].sort_values().values, 
-                                                     samples[metric].values[samples[col].argsort()]))
-            Y[i] = np.mean(interpolated_values)
-        
-        Si = sobol.analyze(problem, Y)
+        # Fit one surrogate on the calibration history and evaluate the Saltelli sample on it in a single call
+        analyzer = SurrogateSobolAnalyzer(self.logger,
+                                          num_samples=int(self.config.get('SOBOL_SAMPLES', 1024)),
+                                          num_resamples=int(self.config.get('SOBOL_BOOTSTRAP_RESAMPLES', 100)),
+                                          n_jobs=int(self.config.get('MPI_PROCESSES', -1)))
+        analyzer.fit(samples[parameter_columns].values, samples[metric].values)
+        Si = analyzer.analyze(problem)
+
+        pd.DataFrame({key: Si[key] for key in ['S1', 'S1_conf', 'ST', 'ST_conf']},
+                     index=parameter_columns).to_csv(self.output_folder / 'sobol_indices.csv')
 
         self.logger.info("Sobol analysis completed")
         return pd.Series(Si['ST'], index=parameter_columns)
@@ -192,11 +172,6 @@ class DecisionAnalyzer:
         self.project_dir = self.data_dir / f"domain_{self.domain_name}"
         self.output_folder = self.project_dir / "plots" / "decision_analysis"
         self.output_folder.mkdir(parents=True, exist_ok=True)
-        self.model_decisions_path = self.project_dir / "settings" / "SUMMA" / "modelDecisions.txt"
-
-        # Initialize SummaRunner and MizuRouteRunner
-        self.summa_runner = SummaRunner(config, logger)
-        self.mizuroute_runner = MizuRouteRunner(config, logger)
 
         # Get decision options from config
         self.decision_options = self.config.get('DECISION_OPTIONS', {})
@@ -204,25 +179,6 @@ class DecisionAnalyzer:
     def generate_combinations(self) -> List[Tuple[str, ...]]:
         return list(itertools.product(*self.decision_options.values()))
 
-    def update_model_decisions(self, combination: Tuple[str, ...]):
-        decision_keys = list(self.decision_options.keys())
-        with open(self.model_decisions_path, 'r') as f:
-            lines = f.readlines()
-        
-        option_map = dict(zip(decision_keys, combination))
-        
-        for i, line in enumerate(lines):
-            for option, value in option_map.items():
-                if line.strip().startswith(option):
-                    lines[i] = f"{option.ljust(30)} {value.ljust(15)} ! {line.split('!')[-1].strip()}\n"
-        
-        with open(self.model_decisions_path, 'w') as f:
-            f.writelines(lines)
-
-    def run_models(self):
-        self.summa_runner.run_summa()
-        self.mizuroute_runner.run_mizuroute()
-
     def calculate_performance_metrics(self) -> Tuple[float, float, float, float, float]:
         obs_file_path = self.config.get('OBSERVATIONS_PATH')
         if obs_file_path == 'default':
@@ -237,28 +193,7 @@ class DecisionAnalyzer:
         else:
             sim_file_path = Path(self.config.get('SIMULATIONS_PATH'))
 
-        dfObs = pd.read_csv(obs_file_path, index_col='datetime', parse_dates=True)
-        dfObs = dfObs['discharge_cms'].resample('h').mean()
-
-        dfSim = xr.open_dataset(sim_file_path, engine='netcdf4')  
-        segment_index = dfSim['reachID'].values == int(sim_reach_ID)
-        dfSim = dfSim.sel(seg=segment_index) 
-        dfSim = dfSim['IRFroutedRunoff'].to_dataframe().reset_index()
-        dfSim.set_index('time', inplace=True)
-        dfSim.index = dfSim.index.round(freq='h')
-
-        dfObs = dfObs.reindex(dfSim.index).dropna()
-        dfSim = dfSim.reindex(dfObs.index).dropna()
-        obs = dfObs.values
-
-        sim = dfSim['IRFroutedRunoff'].values
-        kge = get_KGE(obs, sim, transfo=1)
-        kgep = get_KGEp(obs, sim, transfo=1)
-        nse = get_NSE(obs, sim, transfo=1)
-        mae = get_MAE(obs, sim, transfo=1)
-        rmse = get_RMSE(obs, sim, transfo=1)
-
-        return kge, kgep, nse, mae, rmse
+        return decision_metrics(obs_file_path, sim_file_path, sim_reach_ID)
 
     def run_decision_analysis(self):
         self.logger.info("Starting decision analysis")
@@ -270,29 +205,16 @@ class DecisionAnalyzer:
 
         master_file = self.project_dir / 'optimisation' / f"{self.config.get('EXPERIMENT_ID')}_model_decisions_comparison.csv"
 
-        with open(master_file, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Iteration'] + list(self.decision_options.keys()) + ['kge', 'kgep', 'nse', 'mae', 'rmse'])
+        # Each combination runs in its own sandbox, so combinations can run in parallel
+        sweep = DecisionSweep(self.config, self.logger, self.decision_options)
+        if sweep.is_master:
+            with open(master_file, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['Iteration'] + list(self.decision_options.keys()) + ['kge', 'kgep', 'nse', 'mae', 'rmse'])
 
-        for i, combination in enumerate(combinations, 1):
-            self.logger.info(f"Running combination {i} of {len(combinations)}")
-            self.update_model_decisions(combination)
-            
-            try:
-                self.run_models()
-                kge, kgep, nse, mae, rmse = self.calculate_performance_metrics()
-
-                with open(master_file, 'a', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([i] + list(combination) + [kge, kgep, nse, mae, rmse])
-
-                self.logger.info(f"Combination {i} completed: KGE={kge:.3f}, KGEp={kgep:.3f}, NSE={nse:.3f}, MAE={mae:.3f}, RMSE={rmse:.3f}")
-
-            except Exception as e:
-                self.logger.error(f"Error in combination {i}: {str(e)}")
-                with open(master_file, 'a', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([i] + list(combination) + ['erroneous combination'])
+        sweep.run(combinations, master_file)
+        if not sweep.is_master:
+            return None
 
         self.logger.info("Decision analysis completed")
         return master_file
@@ -351,6 +273,9 @@ class DecisionAnalyzer:
 
     def run_full_analysis(self):
         results_file = self.run_decision_analysis()
+        if results_file is None:
+            # MPI worker ranks only run combinations
+            return None, {}
         self.plot_decision_impacts(results_file)
         best_combinations = self.analyze_results(results_file)
         return results_file, best_combinations
@@ -362,6 +287,7 @@ class Benchmarker:
         self.project_dir = Path(self.config.get('CONFLUENCE_DATA_DIR')) / f"domain_{self.config.get('DOMAIN_NAME')}"
         self.evaluation_dir = self.project_dir / 'evaluation'
         self.evaluation_dir.mkdir(parents=True, exist_ok=True)
+        self.gauge_input_dir = self.evaluation_dir / 'benchmark_inputs'
 
     def load_preprocessed_data(self) -> pd.DataFrame:
         """Load preprocessed benchmark input data."""
@@ -420,37 +346,8 @@ class Benchmarker:
             if n_cal < 30 or n_val < 30:
                 raise ValueError(f"Insufficient data in periods: cal={n_cal}, val={n_val}")
 
-            # Define benchmarks
-            benchmarks = [
-                            # Streamflow benchmarks
-                            "mean_flow",
-                            "median_flow",
-                            "annual_mean_flow",
-                            "annual_median_flow",
-                            "monthly_mean_flow",
-                            "monthly_median_flow",
-                            "daily_mean_flow",
-                            "daily_median_flow",
-
-                            # Long-term rainfall-runoff ratio benchmarks
-                            "rainfall_runoff_ratio_to_all",
-                            "rainfall_runoff_ratio_to_annual",
-                            "rainfall_runoff_ratio_to_monthly",
-                            "rainfall_runoff_ratio_to_daily",
-                            "rainfall_runoff_ratio_to_timestep",
-
-                            # Short-term rainfall-runoff ratio benchmarks
-                            "monthly_rainfall_runoff_ratio_to_monthly",
-                            "monthly_rainfall_runoff_ratio_to_daily",
-                            "monthly_rainfall_runoff_ratio_to_timestep",
-
-                            # Schaefli & Gupta (2007) benchmarks
-                            "scaled_precipitation_benchmark",  # equivalent to "rainfall_runoff_ratio_to_daily"
-                            "adjusted_precipitation_benchmark",
-                            "adjusted_smoothed_precipitation_benchmark",
-                        ]
-            
-            metrics = ['nse', 'kge', 'mse', 'rmse']
+            benchmarks = BENCHMARKS
+            metrics = METRICS
             
             # Run benchmarking
             self.logger.info("Running HydroBM calculations...")
@@ -493,6 +390,48 @@ class Benchmarker:
             self.logger.error(f"Error during benchmark calculation: {e}")
             raise
 
+    def load_gauge_data(self) -> Dict[str, pd.DataFrame]:
+        """
+        Load benchmark input data of all gauges.
+
+        Every CSV file in evaluation/benchmark_inputs is the input of one gauge, named after its
+        id, in the format of benchmark_input_data.csv. Without that directory, the preprocessed
+        input of the domain gauge is used.
+        """
+        gauge_files = sorted(self.gauge_input_dir.glob('*.csv')) if self.gauge_input_dir.exists() else []
+        if not gauge_files:
+            return {str(self.config.get('STATION_ID', self.config.get('DOMAIN_NAME'))): self.load_preprocessed_data()}
+
+        gauge_data = {}
+        for gauge_file in gauge_files:
+            data = pd.read_csv(gauge_file, index_col=0)
+            data.index = pd.to_datetime(data.index)
+            gauge_data[gauge_file.stem] = data
+        return gauge_data
+
+    def run_batch_benchmarking(self) -> pd.DataFrame:
+        """
+        Run benchmarking for all gauges and the configured set of year-based splits in one batch.
+
+        Returns:
+            pd.DataFrame: Scores per gauge, split and benchmark
+        """
+        self.logger.info("Starting batch benchmarking")
+        gauge_data = self.load_gauge_data()
+
+        years = sorted(set().union(*[set(data.dropna().index.year) for data in gauge_data.values()]))
+        splits = year_splits(years,
+                             scheme=self.config.get('BENCHMARK_SPLITS', 'midpoint'),
+                             n_folds=int(self.config.get('BENCHMARK_FOLDS', 5)))
+        for split in splits:
+            self.logger.info(f"Split {split['name']}: calibration years {split['cal_years']}, validation years {split['val_years']}")
+
+        scores = BatchBenchmarker(self.config, self.logger).run(gauge_data, splits)
+        scores_path = self.evaluation_dir / "benchmark_scores_batch.csv"
+        scores.to_csv(scores_path, index=False)
+        self.logger.info(f"Batch benchmark scores saved to {scores_path}")
+        return scores
+
     def _save_results(self, benchmark_flows: pd.DataFrame, scores: pd.DataFrame):
         """Save benchmark results to files with clear documentation."""
         try:
@@ -0,0 +1,122 @@
+from typing import Dict, Any, Optional
+import numpy as np # type: ignore
+from scipy.stats import norm # type: ignore
+from sklearn.ensemble import RandomForestRegressor # type: ignore
+from SALib.sample import sobol as sobol_sample # type: ignore
+
+
+def sobol_indices(Y: np.ndarray, num_vars: int) -> Dict[str, np.ndarray]:
+    """
+    Estimate first-order and total Sobol indices from model output on a Saltelli sample.
+
+    Uses the Saltelli (2010) first-order and Jansen total-order estimators, as SALib does. Like
+    SALib, the output is standardised first, so every replicate is estimated on zero-mean,
+    unit-variance output.
+
+    Args:
+        Y (np.ndarray): Output on a Saltelli sample without second order terms, shape (..., N * (D + 2)).
+                        Leading dimensions are treated as independent replicates.
+        num_vars (int): Number of parameters D.
+
+    Returns:
+        Dict[str, np.ndarray]: 'S1' and 'ST', shape (..., D)
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        Y = (Y - Y.mean(axis=-1, keepdims=True)) / Y.std(axis=-1, keepdims=True)
+    Y = Y.reshape(Y.shape[:-1] + (-1, num_vars + 2))
+    A, AB, B = Y[..., 0], Y[..., 1:-1], Y[..., -1]
+    variance = np.var(np.concatenate([A, B], axis=-1), axis=-1)[..., None]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        S1 = np.mean(B[..., None] * (AB - A[..., None]), axis=-2) / variance
+        ST = 0.5 * np.mean((A[..., None] - AB) ** 2, axis=-2) / variance
+    return {'S1': S1, 'ST': ST}
+
+
+class SurrogateSobolAnalyzer:
+    """
+    Variance-based sensitivity analysis on a surrogate of the calibration history.
+
+    A random forest is fitted once on all (parameter set, metric) pairs of the calibration run,
+    so interactions between parameters are kept. The whole Saltelli sample is then evaluated
+    with a single predict call, and bootstrap confidence intervals are computed by drawing all
+    resamples as one index array and evaluating the estimators on them in batches. This keeps
+    the analysis practical for tens of parameters and large sample counts.
+
+    Attributes:
+        logger (Any): Logger object for recording processing information
+        num_samples (int): Base sample size N of the Saltelli sample
+        num_resamples (int): Number of bootstrap resamples
+        conf_level (float): Confidence level of the bootstrap intervals
+        batch_size (int): Number of bootstrap resamples evaluated at once
+        seed (Optional[int]): Seed for the bootstrap and the random forest
+        model (RandomForestRegressor): Surrogate of the metric
+    """
+
+    def __init__(self, logger: Any, num_samples: int = 1024, num_resamples: int = 100,
+                 conf_level: float = 0.95, n_estimators: int = 200, batch_size: int = 50,
+                 seed: Optional[int] = None, n_jobs: int = -1):
+        self.logger = logger
+        self.num_samples = int(num_samples)
+        self.num_resamples = int(num_resamples)
+        self.conf_level = conf_level
+        self.batch_size = max(1, int(batch_size))
+        self.seed = seed
+        self.model = RandomForestRegressor(n_estimators=n_estimators, min_samples_leaf=2, oob_score=True,
+                                           random_state=seed, n_jobs=n_jobs)
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> 'SurrogateSobolAnalyzer':
+        """
+        Fit the surrogate on the calibration history.
+
+        Args:
+            X (np.ndarray): Parameter sets, shape (n_runs, n_parameters)
+            y (np.ndarray): Metric of every run, shape (n_runs,)
+
+        Returns:
+            SurrogateSobolAnalyzer: The fitted analyzer
+        """
+        self.model.fit(X, y)
+        self.logger.info(f"Fitted random forest surrogate on {len(y)} calibration runs "
+                         f"(out-of-bag R2: {self.model.oob_score_:.3f})")
+        return self
+
+    def analyze(self, problem: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """
+        Compute Sobol indices and bootstrap confidence intervals on the fitted surrogate.
+
+        Args:
+            problem (Dict[str, Any]): SALib problem definition with 'num_vars', 'names' and 'bounds'
+
+        Returns:
+            Dict[str, np.ndarray]: 'S1', 'ST' and the half-widths of their confidence intervals, 'S1_conf' and 'ST_conf'
+        """
+        num_vars = problem['num_vars']
+        param_values = sobol_sample.sample(problem, self.num_samples, calc_second_order=False)
+        self.logger.info(f"Evaluating the surrogate on {len(param_values)} Saltelli samples")
+        Y = self.model.predict(param_values)
+
+        indices = sobol_indices(Y, num_vars)
+        indices.update(self._bootstrap(Y.reshape(-1, num_vars + 2), num_vars))
+        return indices
+
+    def _bootstrap(self, Y: np.ndarray, num_vars: int) -> Dict[str, np.ndarray]:
+        """
+        Compute confidence interval half-widths from batched bootstrap resamples of the sample rows.
+
+        Each resample is flattened to one replicate, so sobol_indices standardises it on its own.
+        """
+        n = len(Y)
+        rng = np.random.default_rng(self.seed)
+        resample_index = rng.integers(0, n, size=(self.num_resamples, n))
+
+        S1, ST = [], []
+        for start in range(0, self.num_resamples, self.batch_size):
+            rows = resample_index[start:start + self.batch_size]
+            batch = sobol_indices(Y[rows].reshape(len(rows), -1), num_vars)
+            S1.append(batch['S1'])
+            ST.append(batch['ST'])
+
+        z = norm.ppf(0.5 + self.conf_level / 2)
+        return {'S1_conf': z * np.nanstd(np.concatenate(S1), axis=0, ddof=1),
+                'ST_conf': z * np.nanstd(np.concatenate(ST), axis=0, ddof=1)}
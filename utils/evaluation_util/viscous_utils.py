@@ -0,0 +1,165 @@
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Optional
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from pyviscous import viscous # type: ignore
+
+SENS_TYPES = ('total', 'single')
+
+
+def _viscous_task(task: Tuple[str, Tuple[int, int], int, List[str]]) -> Tuple[int, Dict[str, float], Optional[str]]:
+    """
+    Compute the VISCOUS sensitivity of one parameter on the shared sample matrix.
+
+    Runs in a worker process. The sample matrix is attached from shared memory, so it is not
+    copied per task. Sensitivity orders are tried in turn until one succeeds, since the total
+    order index cannot be computed for every parameter.
+
+    Args:
+        task (Tuple): Shared memory name, matrix shape (n_samples, n_parameters + 1) with the
+                      metric in the last column, parameter index and sensitivity orders to try.
+
+    Returns:
+        Tuple[int, Dict[str, float], Optional[str]]: Parameter index, sensitivity per computed
+            order, and the error message if no order could be computed.
+    """
+    shm_name, shape, index, sens_types = task
+    shm = shared_memory.SharedMemory(name=shm_name)
+    data = None
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        x, y = data[:, :-1], data[:, -1:]
+        results, error = {}, None
+        for sens_type in sens_types:
+            try:
+                result = viscous(x, y, index, sensType=sens_type)
+                results[sens_type] = float(result[0] if isinstance(result, tuple) else result)
+                break
+            except ValueError as e:
+                error = str(e)
+            except Exception as e:
+                error = str(e)
+                break
+        return index, results, None if results else error
+    finally:
+        del data
+        shm.close()
+
+
+class ViscousRunner:
+    """
+    Run VISCOUS sensitivity analysis for all parameters on a process pool.
+
+    The sample matrix is placed once in shared memory and the parameters are distributed over
+    worker processes. Results are cached per parameter and sensitivity order, keyed by a hash of
+    the sample matrix, so re-running the analysis on an unchanged calibration history (or only
+    for parameters that failed before) does not refit the Gaussian mixture copulas.
+
+    Attributes:
+        config (Dict[str, Any]): Configuration settings
+        logger (Any): Logger object for recording processing information
+        cache_file (Path): JSON file with cached sensitivities
+        num_processes (int): Number of worker processes
+    """
+
+    def __init__(self, config: Dict[str, Any], logger: Any, cache_file: Path):
+        self.config = config
+        self.logger = logger
+        self.cache_file = Path(cache_file)
+        self.num_processes = max(1, int(self.config.get('MPI_PROCESSES', 1)))
+
+    def run(self, x: np.ndarray, y: np.ndarray, names: List[str]) -> pd.Series:
+        """
+        Compute the VISCOUS sensitivity of every parameter.
+
+        The total order index is used where it can be computed, and the first order index otherwise.
+
+        Args:
+            x (np.ndarray): Parameter sets, shape (n_samples, n_parameters)
+            y (np.ndarray): Metric of every sample, shape (n_samples,) or (n_samples, 1)
+            names (List[str]): Parameter names
+
+        Returns:
+            pd.Series: Sensitivity per parameter, -999 where it could not be computed
+        """
+        data = np.ascontiguousarray(np.column_stack([x, np.ravel(y)]), dtype=np.float64)
+        data_key = hashlib.sha256(data.tobytes() + str(data.shape).encode()).hexdigest()[:16]
+        cache = self._load_cache()
+
+        sensitivities = {}
+        pending = []
+        for index, name in enumerate(names):
+            cached = self._cached_value(cache, data_key, index)
+            if cached is not None:
+                sensitivities[name] = cached
+            else:
+                pending.append(index)
+
+        if len(pending) < len(names):
+            self.logger.info(f"Reusing cached VISCOUS sensitivities for {len(names) - len(pending)} parameters")
+
+        if pending:
+            for index, results, error in self._compute(data, pending):
+                name = names[index]
+                for sens_type, value in results.items():
+                    cache[f"{data_key}:{index}:{sens_type}"] = value
+                if results:
+                    sensitivities[name] = next(iter(results.values()))
+                    self.logger.info(f"Successfully calculated sensitivity for {name}")
+                else:
+                    self.logger.error(f"Error in sensitivity analysis for parameter {name}: {error}")
+                    sensitivities[name] = -999
+            # Entries of earlier calibration histories are no longer useful
+            self._save_cache({key: value for key, value in cache.items() if key.startswith(f"{data_key}:")})
+
+        return pd.Series([sensitivities[name] for name in names], index=names)
+
+    def _compute(self, data: np.ndarray, indices: List[int]) -> List[Tuple[int, Dict[str, float], Optional[str]]]:
+        """Compute the sensitivities of the given parameters with the sample matrix in shared memory."""
+        shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        try:
+            np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+            tasks = [(shm.name, data.shape, index, list(SENS_TYPES)) for index in indices]
+
+            num_workers = min(self.num_processes, len(tasks))
+            self.logger.info(f"Calculating VISCOUS sensitivities for {len(tasks)} parameters on {num_workers} processes")
+            if num_workers == 1:
+                return [_viscous_task(task) for task in tasks]
+
+            results = []
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                futures = [executor.submit(_viscous_task, task) for task in tasks]
+                for future in as_completed(futures):
+                    results.append(future.result())
+            return sorted(results, key=lambda result: result[0])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    @staticmethod
+    def _cached_value(cache: Dict[str, float], data_key: str, index: int) -> Optional[float]:
+        """Get the cached sensitivity of a parameter, preferring the total order index."""
+        for sens_type in SENS_TYPES:
+            value = cache.get(f"{data_key}:{index}:{sens_type}")
+            if value is not None:
+                return value
+        return None
+
+    def _load_cache(self) -> Dict[str, float]:
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read VISCOUS cache {self.cache_file}: {str(e)}")
+            return {}
+
+    def _save_cache(self, cache: Dict[str, float]) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(cache, f, indent=2)
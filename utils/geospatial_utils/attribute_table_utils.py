@@ -0,0 +1,102 @@
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, List, Optional
+import pandas as pd # type: ignore
+import geopandas as gpd # type: ignore
+
+try:
+    import pyogrio # type: ignore
+except ImportError:
+    pyogrio = None
+
+try:
+    import pyarrow as pa # type: ignore
+    import pyarrow.parquet as pq # type: ignore
+except ImportError:
+    pa = None
+    pq = None
+
+CACHE_DIR_NAME = '.attribute_cache'
+SIGNATURE_KEY = b'source_signature'
+
+
+def _source_signature(shapefile: Path) -> str:
+    """Hash the size and modification time of the shapefile and its attribute table."""
+    content = []
+    for suffix in ('.shp', '.dbf'):
+        part = shapefile.with_suffix(suffix)
+        if part.exists():
+            stat = part.stat()
+            content.append([part.name, stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def _read_without_geometry(shapefile: Path) -> pd.DataFrame:
+    """Read all attribute columns of a shapefile without decoding the geometries."""
+    if pyogrio is not None:
+        try:
+            return pyogrio.read_dataframe(shapefile, read_geometry=False, use_arrow=pa is not None)
+        except Exception:
+            return pyogrio.read_dataframe(shapefile, read_geometry=False)
+    return pd.DataFrame(gpd.read_file(shapefile, ignore_geometry=True))
+
+
+def read_attributes(shapefile: Path, columns: Optional[List[str]] = None, logger: Optional[Any] = None) -> pd.DataFrame:
+    """
+    Read attribute columns of a shapefile without its geometry, through a columnar cache.
+
+    The first read decodes the attribute table only (through pyogrio, and Arrow where available)
+    and stores all columns as a Parquet file in a hidden cache directory next to the shapefile.
+    Later reads load just the requested columns from that file, as long as the shapefile is
+    unchanged. Without pyarrow, the attributes are read from the shapefile every time.
+
+    Args:
+        shapefile (Path): Path to the shapefile
+        columns (Optional[List[str]]): Columns to return, all columns if None
+        logger (Optional[Any]): Logger object for recording processing information
+
+    Returns:
+        pd.DataFrame: Attribute table in shapefile row order
+
+    Raises:
+        KeyError: If a requested column is not in the shapefile
+    """
+    shapefile = Path(shapefile)
+    cache_file = shapefile.parent / CACHE_DIR_NAME / f"{shapefile.stem}.parquet"
+    signature = _source_signature(shapefile)
+
+    if pq is not None and cache_file.exists():
+        try:
+            metadata = pq.read_schema(cache_file).metadata or {}
+            if metadata.get(SIGNATURE_KEY, b'').decode() == signature:
+                missing = [col for col in (columns or []) if col not in pq.read_schema(cache_file).names]
+                if missing:
+                    raise KeyError(f"Columns {missing} not found in {shapefile}")
+                return pq.read_table(cache_file, columns=columns).to_pandas()
+        except KeyError:
+            raise
+        except Exception as e:
+            if logger is not None:
+                logger.warning(f"Could not read attribute cache {cache_file}: {str(e)}")
+
+    attributes = _read_without_geometry(shapefile)
+
+    if pq is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(attributes, preserve_index=False)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), SIGNATURE_KEY: signature.encode()})
+            tmp_file = cache_file.with_suffix('.tmp.parquet')
+            pq.write_table(table, tmp_file)
+            tmp_file.replace(cache_file)
+        except Exception as e:
+            if logger is not None:
+                logger.warning(f"Could not write attribute cache {cache_file}: {str(e)}")
+
+    if columns is None:
+        return attributes
+    missing = [col for col in columns if col not in attributes]
+    if missing:
+        raise KeyError(f"Columns {missing} not found in {shapefile}")
+    return attributes[columns]
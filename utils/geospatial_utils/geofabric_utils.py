@@ -13,6 +13,7 @@ Each class provides methods for processing geospatial data, running external com
 and managing file operations related to geofabric analysis.
 """
 import os
+import pandas as pd # type: ignore
 import geopandas as gpd # type: ignore
 import networkx as nx # type: ignore
 from pathlib import Path
@@ -818,8 +819,8 @@ class GeofabricSubsetter:
         # Find downstream basin
         downstream_basin_id = self.find_basin_for_pour_point(pour_point, basins, fabric_config['basin_id_col'])
 
-        # Build river network and find upstream basins
-        river_graph = self.build_river_graph(rivers, fabric_config)
+        # Build river network from the already loaded river attributes and find upstream basins
+        river_graph = self.build_river_graph(rivers[[fabric_config['river_id_col']] + fabric_config['upstream_cols']], fabric_config)
         upstream_basin_ids = self.find_upstream_basins(downstream_basin_id, river_graph)
 
         # Subset basins and rivers
@@ -923,27 +924,26 @@ class GeofabricSubsetter:
             raise ValueError("No basin contains the given pour point.")
         return containing_basin.iloc[0][id_col]
 
-    def build_river_graph(self, rivers: gpd.GeoDataFrame, fabric_config: Dict[str, Any]) -> nx.DiGraph:
+    def build_river_graph(self, rivers: pd.DataFrame, fabric_config: Dict[str, Any]) -> nx.DiGraph:
         """
         Build a directed graph representing the river network.
 
         Args:
-            rivers (gpd.GeoDataFrame): Rivers GeoDataFrame.
+            rivers (pd.DataFrame): River attributes, with the id and upstream columns of the hydrofabric type.
             fabric_config (Dict[str, Any]): Configuration for the specific hydrofabric type.
 
         Returns:
             nx.DiGraph: Directed graph of the river network.
         """
         G = nx.DiGraph()
-        for _, row in rivers.iterrows():
-            current_basin = row[fabric_config['river_id_col']]
-            for up_col in fabric_config['upstream_cols']:
-                upstream_basin = row[up_col]
-                if upstream_basin != fabric_config['upstream_default']:
-                    if fabric_config['upstream_cols'] == ['toCOMID']:  # NWS case
-                        G.add_edge(current_basin, upstream_basin)
-                    else:
-                        G.add_edge(upstream_basin, current_basin)
+        current_basins = rivers[fabric_config['river_id_col']].values
+        for up_col in fabric_config['upstream_cols']:
+            upstream_basins = rivers[up_col].values
+            linked = upstream_basins != fabric_config['upstream_default']
+            if fabric_config['upstream_cols'] == ['toCOMID']:  # NWS case
+                G.add_edges_from(zip(current_basins[linked].tolist(), upstream_basins[linked].tolist()))
+            else:
+                G.add_edges_from(zip(upstream_basins[linked].tolist(), current_basins[linked].tolist()))
         return G
 
     def find_upstream_basins(self, basin_id: Any, G: nx.DiGraph) -> set:
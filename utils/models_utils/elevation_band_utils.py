@@ -0,0 +1,174 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np # type: ignore
+import geopandas as gpd # type: ignore
+import rasterio # type: ignore
+import rasterio.features # type: ignore
+import rasterio.windows # type: ignore
+from shapely.geometry import box # type: ignore
+
+
+def _accumulate_window(task: Tuple[str, Tuple[int, int, int, int], List[Tuple[Any, int]], float]) -> Optional[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Count DEM pixels and sum their elevations per catchment label and elevation band in one window.
+
+    Runs in a worker process, so it opens the DEM itself.
+
+    Args:
+        task (Tuple): DEM path, window (col_off, row_off, width, height), (geometry, label) pairs
+                      intersecting the window, and the band size in metres.
+
+    Returns:
+        Optional[Tuple[int, np.ndarray, np.ndarray]]: Absolute index of the lowest band in the window,
+            and pixel counts and elevation sums of shape (n_labels + 1, n_window_bands), or None if
+            the window contains no catchment pixels. Labels above the highest label in the window
+            are not included.
+    """
+    dem_path, (col_off, row_off, width, height), shapes, band_size = task
+    n_labels = max(label for _, label in shapes)
+
+    with rasterio.open(dem_path) as src:
+        window = rasterio.windows.Window(col_off, row_off, width, height)
+        dem = src.read(1, window=window, masked=True)
+        labels = rasterio.features.rasterize(shapes, out_shape=(height, width),
+                                             transform=src.window_transform(window),
+                                             fill=0, dtype='int32')
+
+    valid = (labels > 0) & ~np.ma.getmaskarray(dem)
+    elev = np.ma.getdata(dem)[valid].astype(np.float64)
+    valid_labels = labels[valid]
+    finite = np.isfinite(elev)
+    elev, valid_labels = elev[finite], valid_labels[finite]
+    if elev.size == 0:
+        return None
+
+    # Bands are anchored at multiples of the band size so that windows agree on band edges
+    bands = np.floor(elev / band_size).astype(np.int64)
+    band_min = int(bands.min())
+    n_bands = int(bands.max()) - band_min + 1
+    keys = valid_labels * n_bands + (bands - band_min)
+
+    size = (n_labels + 1) * n_bands
+    counts = np.bincount(keys, minlength=size).reshape(n_labels + 1, n_bands)
+    sums = np.bincount(keys, weights=elev, minlength=size).reshape(n_labels + 1, n_bands)
+    return band_min, counts, sums
+
+
+class ElevationBandBuilder:
+    """
+    Compute elevation band area fractions and mean elevations for many catchments in one pass over a DEM.
+
+    The catchments are rasterized to a label grid and the DEM is digitised into fixed-size
+    elevation bands, so the pixel count and elevation sum of every (catchment, band) pair follow
+    from a single np.bincount per window. The DEM is processed in row windows, so memory use does
+    not depend on the raster size, and windows are distributed over a process pool.
+
+    Attributes:
+        dem_path (Path): Path to the DEM raster.
+        logger (logging.Logger): Logger for this class.
+        band_size (float): Height of the elevation bands in metres.
+        window_rows (int): Number of DEM rows per window.
+        num_processes (int): Number of worker processes.
+    """
+
+    def __init__(self, dem_path: Path, logger: Any, band_size: float = 100.0,
+                 window_rows: int = 1024, num_processes: int = 1):
+        self.dem_path = Path(dem_path)
+        self.logger = logger
+        self.band_size = float(band_size)
+        self.window_rows = window_rows
+        self.num_processes = max(1, int(num_processes))
+
+    def _window_tasks(self, catchments: gpd.GeoDataFrame) -> List[Tuple]:
+        """Build one task per row window of the DEM that overlaps the catchments."""
+        with rasterio.open(self.dem_path) as src:
+            if catchments.crs is not None and src.crs is not None:
+                catchments = catchments.to_crs(src.crs)
+            shapes = list(zip(catchments.geometry, range(1, len(catchments) + 1)))
+            bounds = catchments.total_bounds
+
+            # Restrict the windows to the rows and columns covered by the catchments
+            extent = rasterio.windows.from_bounds(*bounds, transform=src.transform)
+            row_start = max(0, int(np.floor(extent.row_off)))
+            row_end = min(src.height, int(np.ceil(extent.row_off + extent.height)))
+            col_start = max(0, int(np.floor(extent.col_off)))
+            col_end = min(src.width, int(np.ceil(extent.col_off + extent.width)))
+
+            tasks = []
+            for row_off in range(row_start, row_end, self.window_rows):
+                window = rasterio.windows.Window(col_start, row_off, col_end - col_start,
+                                                 min(self.window_rows, row_end - row_off))
+                window_box = box(*src.window_bounds(window))
+                window_shapes = [(geom, label) for geom, label in shapes
+                                 if geom is not None and geom.intersects(window_box)]
+                if window_shapes:
+                    tasks.append((str(self.dem_path),
+                                  (window.col_off, window.row_off, window.width, window.height),
+                                  window_shapes, self.band_size))
+        return tasks
+
+    def accumulate(self, catchments: gpd.GeoDataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Count DEM pixels and sum their elevations per catchment and elevation band.
+
+        Args:
+            catchments (gpd.GeoDataFrame): Catchment polygons, one row per catchment.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Lower edge of every band in metres, and pixel
+                counts and elevation sums of shape (n_catchments, n_bands) in catchment row order.
+        """
+        tasks = self._window_tasks(catchments)
+        self.logger.info(f"Computing elevation bands for {len(catchments)} catchments "
+                         f"over {len(tasks)} DEM windows")
+
+        if self.num_processes > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.num_processes, len(tasks))) as executor:
+                results = list(executor.map(_accumulate_window, tasks))
+        else:
+            results = [_accumulate_window(task) for task in tasks]
+        results = [result for result in results if result is not None]
+        if not results:
+            raise ValueError(f"No valid DEM pixels found within the catchments in {self.dem_path}")
+
+        # Merge the windows onto a common band axis
+        band_min = min(result[0] for result in results)
+        band_max = max(result[0] + result[1].shape[1] for result in results)
+        counts = np.zeros((len(catchments) + 1, band_max - band_min), dtype=np.int64)
+        sums = np.zeros(counts.shape, dtype=np.float64)
+        for window_min, window_counts, window_sums in results:
+            offset = window_min - band_min
+            rows, cols = window_counts.shape
+            counts[:rows, offset:offset + cols] += window_counts
+            sums[:rows, offset:offset + cols] += window_sums
+
+        lower_edges = (np.arange(band_min, band_max) * self.band_size).astype(np.float64)
+        return lower_edges, counts[1:], sums[1:]
+
+    def compute(self, catchments: gpd.GeoDataFrame, lumped: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Compute elevation band area fractions and mean elevations.
+
+        Args:
+            catchments (gpd.GeoDataFrame): Catchment polygons, one row per catchment.
+            lumped (bool): Whether to treat all polygons as a single catchment.
+
+        Returns:
+            Dict[str, np.ndarray]: 'lower_edge' and, with shape (n_catchments, n_bands) or (1, n_bands)
+                if lumped, 'area_frac' and 'mean_elev'. Bands without pixels in any catchment are
+                dropped; bands empty in a single catchment have zero area and NaN mean elevation.
+        """
+        lower_edges, counts, sums = self.accumulate(catchments)
+        if lumped:
+            counts, sums = counts.sum(axis=0, keepdims=True), sums.sum(axis=0, keepdims=True)
+
+        occupied = counts.sum(axis=0) > 0
+        lower_edges, counts, sums = lower_edges[occupied], counts[:, occupied], sums[:, occupied]
+
+        totals = counts.sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            area_frac = np.where(totals > 0, counts / totals, 0.0)
+            mean_elev = np.where(counts > 0, sums / counts, np.nan)
+
+        return {'lower_edge': lower_edges, 'area_frac': area_frac, 'mean_elev': mean_elev}
@@ -0,0 +1,212 @@
+import json
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+import torch # type: ignore
+import torch.nn as nn # type: ignore
+
+METADATA_FILE = 'metadata.json'
+
+# Largest accepted difference, in scaled target units, between exported and in-memory predictions
+EXPORT_TOLERANCE = 1e-3
+QUANTIZED_EXPORT_TOLERANCE = 0.05
+
+
+class FLASHWindowedModel(nn.Module):
+    """
+    Inference view of a trained FLASH LSTM.
+
+    Wraps the LSTM, layer norm and output layer of a trained FLASH model and reproduces its
+    evaluation forward pass: every lookback window starts from a zero hidden state and only the
+    output after the last step of the window is used.
+    """
+
+    def __init__(self, lstm: nn.LSTM, ln: nn.LayerNorm, fc: nn.Linear):
+        super(FLASHWindowedModel, self).__init__()
+        self.lstm = lstm
+        self.ln = ln
+        self.fc = fc
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        out, _ = self.lstm(x)
+        return self.fc(self.ln(out[:, -1, :]))
+
+
+def export_flash_model(model: nn.Module, path: Path, metadata: Dict[str, Any], quantize: bool = False) -> Path:
+    """
+    Export a trained FLASH model as a TorchScript windowed model.
+
+    The scaling and layout information needed to run the model is stored as an extra file
+    inside the TorchScript archive, so inference only needs torch and numpy.
+
+    Args:
+        model (nn.Module): Trained FLASH LSTM with lstm, ln and fc submodules.
+        path (Path): Path of the TorchScript file to write.
+        metadata (Dict[str, Any]): JSON-serialisable scaling and layout information, including the lookback.
+        quantize (bool): Whether to apply dynamic int8 quantisation to the LSTM and linear layers.
+
+    Returns:
+        Path: Path to the written file.
+    """
+    windowed = FLASHWindowedModel(model.lstm, model.ln, model.fc).cpu().eval()
+    if quantize:
+        windowed = torch.ao.quantization.quantize_dynamic(windowed, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+    example = torch.zeros(2, metadata['lookback'], model.lstm.input_size)
+    with torch.no_grad():
+        scripted = torch.jit.trace(windowed, example)
+
+    metadata = dict(metadata, quantized=quantize)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(scripted, str(path), _extra_files={METADATA_FILE: json.dumps(metadata)})
+    return path
+
+
+class FLASHInference:
+    """
+    Run an exported FLASH model on long forcing series without the training dependencies.
+
+    Predictions are made exactly as by FLASH.simulate: the prediction for step t comes from
+    the window of the lookback steps before t, starting from a zero hidden state. The windows
+    are strided views of the scaled series and are scored in chunks, so memory does not grow
+    with the simulation length. Several series (e.g. ensemble members) can be simulated
+    together as a batch.
+
+    Attributes:
+        model (torch.jit.ScriptModule): The exported windowed model.
+        metadata (Dict[str, Any]): Scaling and layout information stored with the model.
+        chunk_size (int): Number of windows per series in each forward pass.
+        logger (logging.Logger): Logger for this class.
+    """
+
+    def __init__(self, model_path: Path, logger: Any, chunk_size: int = 1000, num_threads: Optional[int] = None):
+        self.logger = logger
+        self.chunk_size = chunk_size
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        extra_files = {METADATA_FILE: ''}
+        self.model = torch.jit.load(str(model_path), map_location='cpu', _extra_files=extra_files)
+        self.model.eval()
+        self.metadata = json.loads(extra_files[METADATA_FILE])
+        self.lookback = self.metadata['lookback']
+        self.logger.info(f"Loaded exported FLASH model from {model_path} (quantized: {self.metadata['quantized']})")
+
+    @property
+    def feature_columns(self) -> Optional[List[str]]:
+        return self.metadata.get('feature_columns')
+
+    @property
+    def target_names(self) -> List[str]:
+        return self.metadata['target_names']
+
+    def _scale_features(self, features: np.ndarray, static: Optional[np.ndarray]) -> np.ndarray:
+        scaled = (features - np.asarray(self.metadata['feature_mean'])) / np.asarray(self.metadata['feature_scale'])
+        scaled = np.clip(scaled, -10, 10)
+
+        if self.metadata.get('static_columns'):
+            if static is None:
+                raise ValueError(f"Model expects static attributes: {self.metadata['static_columns']}")
+            static = np.atleast_2d(static)
+            static = (static - np.asarray(self.metadata['static_mean'])) / np.asarray(self.metadata['static_scale'])
+            static = np.clip(static, -10, 10)
+            static = np.broadcast_to(static[:, np.newaxis, :], scaled.shape[:2] + (static.shape[-1],))
+            scaled = np.concatenate([scaled, static], axis=-1)
+
+        return scaled.astype(np.float32)
+
+    def predict(self, features: np.ndarray, static: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Simulate one or more forcing series.
+
+        The prediction at step t uses the lookback steps of forcing before t, as in training.
+        The first lookback steps only serve as input and are not returned.
+
+        Args:
+            features (np.ndarray): Unscaled HRU-averaged forcing, shape (time, n_features)
+                                   or (n_series, time, n_features).
+            static (Optional[np.ndarray]): Unscaled static attributes, shape (n_static,) or
+                                           (n_series, n_static), for regional models.
+
+        Returns:
+            np.ndarray: Predictions in physical units, shape (time - lookback, n_targets) or
+                        (n_series, time - lookback, n_targets). Empty along time if the series
+                        is not longer than the lookback.
+        """
+        single = features.ndim == 2
+        features = features[np.newaxis] if single else features
+        x = torch.from_numpy(self._scale_features(features, static))
+        n_series, n_steps, n_features = x.shape
+        n_targets = len(self.metadata['target_mean'])
+
+        outputs = []
+        if n_steps > self.lookback:
+            # unfold yields (n_series, time - lookback + 1, n_features, lookback), the last window has no target
+            windows = x.unfold(1, self.lookback, 1)[:, :-1].transpose(2, 3)
+            with torch.no_grad():
+                for start in range(0, windows.shape[1], self.chunk_size):
+                    batch = windows[:, start:start + self.chunk_size].reshape(-1, self.lookback, n_features)
+                    outputs.append(self.model(batch).numpy().reshape(n_series, -1, n_targets))
+        predictions = np.concatenate(outputs, axis=1) if outputs else np.empty((n_series, 0, n_targets), dtype=np.float32)
+
+        predictions = predictions * np.asarray(self.metadata['target_scale']) + np.asarray(self.metadata['target_mean'])
+        predictions = np.nan_to_num(predictions, nan=0.0, posinf=1e15, neginf=-1e15)
+        return predictions[0] if single else predictions
+
+    def simulate(self, features_df: pd.DataFrame, static: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Simulate a forcing series given as a DataFrame indexed by time.
+
+        Args:
+            features_df (pd.DataFrame): Unscaled HRU-averaged forcing indexed by time.
+            static (Optional[np.ndarray]): Unscaled static attributes for regional models.
+
+        Returns:
+            pd.DataFrame: Predictions indexed by time, one predicted_<target> column per target.
+        """
+        if self.feature_columns:
+            features_df = features_df[self.feature_columns]
+        predictions = self.predict(features_df.values.astype(np.float64), static)
+        columns = [f"predicted_{name}" for name in self.target_names]
+        return pd.DataFrame(predictions, columns=columns, index=features_df.index[self.lookback:])
+
+
+def check_exported_model(model_path: Path, features_df: pd.DataFrame, predictions_df: pd.DataFrame, logger: Any,
+                         static: Optional[np.ndarray] = None, num_steps: int = 500) -> float:
+    """
+    Check that an exported model reproduces the predictions of the in-memory model.
+
+    The first lookback + num_steps steps of the forcing are simulated with FLASHInference and
+    compared with the in-memory predictions for the same dates, in scaled target units.
+
+    Args:
+        model_path (Path): Exported model.
+        features_df (pd.DataFrame): Unscaled HRU-averaged forcing the in-memory predictions were made from.
+        predictions_df (pd.DataFrame): In-memory predictions indexed by time, predicted_<target> columns.
+        logger (logging.Logger): Logger for the result of the check.
+        static (Optional[np.ndarray]): Unscaled static attributes for regional models.
+        num_steps (int): Number of predicted steps to compare.
+
+    Returns:
+        float: Largest absolute difference in scaled target units (NaN if no steps could be compared).
+    """
+    inference = FLASHInference(model_path, logger)
+    exported = inference.simulate(features_df.iloc[:inference.lookback + num_steps], static)
+    expected = predictions_df.reindex(index=exported.index, columns=exported.columns)
+    valid = expected.notna().all(axis=1)
+    if not valid.any():
+        logger.warning(f"No predictions to check the exported FLASH model {model_path} against")
+        return float('nan')
+
+    scale = np.asarray(inference.metadata['target_scale'])
+    max_diff = float(np.max(np.abs(exported[valid].values - expected[valid].values) / scale))
+    tolerance = QUANTIZED_EXPORT_TOLERANCE if inference.metadata['quantized'] else EXPORT_TOLERANCE
+    if max_diff > tolerance:
+        logger.warning(f"Exported FLASH model {model_path} differs from the in-memory model by up to {max_diff:.3g} "
+                       f"(scaled units, tolerance {tolerance:g})")
+    else:
+        logger.info(f"Exported FLASH model agrees with the in-memory model over {int(valid.sum())} steps "
+                    f"(max difference {max_diff:.3g} in scaled units)")
+    return max_diff
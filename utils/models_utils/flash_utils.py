@@ -14,12 +14,14 @@ import torch.optim as optim # type: ignore
 import matplotlib.pyplot as plt # type: ignore
 import matplotlib.dates as mdates # type: ignore
 from matplotlib.gridspec import GridSpec # type: ignore
-from torch.utils.data import TensorDataset, DataLoader # type: ignore
+from torch.utils.data import TensorDataset, DataLoader, ConcatDataset, Dataset # type: ignore
 import geopandas as gpd # type: ignore
 from datetime import datetime
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from utils.evaluation_util.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE, get_KGEnp # type: ignore
+from utils.models_utils.flash_inference import export_flash_model, check_exported_model # type: ignore
+from utils.dataHandling_utils.results_store_utils import ResultsStore # type: ignore
 
 class FLASH:
     """
@@ -47,6 +49,8 @@ class FLASH:
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = None
         self.scaler = StandardScaler()
+        self.static_scaler = None
+        self.static_columns = None
         self.lookback = config.get('FLASH_LOOKBACK', 30)
         self.project_dir = Path(self.config.get('CONFLUENCE_DATA_DIR')) / f"domain_{self.config.get('DOMAIN_NAME')}"
         self.logger.info(f"Initialized FLASH model with device: {self.device}")
@@ -55,6 +59,38 @@ class FLASH:
     def preprocess_data(self, forcing_df: pd.DataFrame, streamflow_df: pd.DataFrame, snow_df: Optional[pd.DataFrame] = None) -> Tuple[torch.Tensor, torch.Tensor, pd.DatetimeIndex, pd.Index, pd.DataFrame]:
         self.logger.info("Preprocessing data for FLASH model")
         
+        features_avg, targets = self._align_basin_data(forcing_df, streamflow_df, snow_df)
+        common_dates = features_avg.index
+
+        # Scale features
+        self.feature_scaler = StandardScaler()
+        scaled_features = self.feature_scaler.fit_transform(features_avg)
+        scaled_features = np.clip(scaled_features, -10, 10)
+
+        # Scale targets
+        self.target_scaler = StandardScaler()
+        scaled_targets = self.target_scaler.fit_transform(targets)
+        scaled_targets = np.clip(scaled_targets, -10, 10)
+
+        # Create sequences as strided views over the scaled series, so memory stays proportional
+        # to the series length rather than to the number of sequences times the lookback
+        X, y = self.create_sequences(scaled_features, scaled_targets)
+
+        self.logger.info(f"Preprocessed data shape: X: {X.shape}, y: {y.shape}")
+        return X, y, pd.DatetimeIndex(common_dates), pd.Index(['average']), features_avg
+
+    def _align_basin_data(self, forcing_df: pd.DataFrame, streamflow_df: pd.DataFrame, snow_df: Optional[pd.DataFrame] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Align forcing and observations of a basin and average the forcing over its HRUs.
+
+        Args:
+            forcing_df (pd.DataFrame): Forcing data indexed by time and hruId.
+            streamflow_df (pd.DataFrame): Observed streamflow indexed by time.
+            snow_df (Optional[pd.DataFrame]): Observed SWE indexed by time.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: HRU-averaged features and targets on the common dates.
+        """
         # Align the data
         common_dates = forcing_df.index.get_level_values('time').intersection(streamflow_df.index)
         if snow_df is not None:
@@ -72,11 +108,6 @@ class FLASH:
         # Average features across all HRUs for each timestep
         features_avg = forcing_df.groupby('time')[feature_columns].mean()
 
-        # Scale features
-        self.feature_scaler = StandardScaler()
-        scaled_features = self.feature_scaler.fit_transform(features_avg)
-        scaled_features = np.clip(scaled_features, -10, 10)
-
         # Prepare targets (streamflow and optionally snow)
         if snow_df is not None:
             targets = pd.concat([streamflow_df['streamflow'], snow_df['snw']], axis=1)
@@ -87,24 +118,56 @@ class FLASH:
             targets = pd.DataFrame(streamflow_df['streamflow'], columns=['streamflow'])
             self.output_size = 1
             self.target_names = ['streamflow']
-        
-        # Scale targets
-        self.target_scaler = StandardScaler()
-        scaled_targets = self.target_scaler.fit_transform(targets)
-        scaled_targets = np.clip(scaled_targets, -10, 10)
 
-        # Create sequences
-        X, y = [], []
-        for i in range(len(scaled_features) - self.lookback):
-            X.append(scaled_features[i:(i + self.lookback)])
-            y.append(scaled_targets[i + self.lookback])
+        return features_avg, targets.loc[features_avg.index]
 
-        # Convert to PyTorch tensors
-        X = torch.FloatTensor(np.array(X)).to(self.device)
-        y = torch.FloatTensor(np.array(y)).to(self.device)
+    def create_sequences(self, features: np.ndarray, targets: np.ndarray) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Create lookback windows and their targets without copying the underlying series.
 
-        self.logger.info(f"Preprocessed data shape: X: {X.shape}, y: {y.shape}")
-        return X, y, pd.DatetimeIndex(common_dates), pd.Index(['average']), features_avg
+        Window i covers features[i:i + lookback] and is paired with targets[i + lookback].
+        The windows are a strided view of the feature tensor, batches are only materialised
+        when they are collated by a DataLoader.
+
+        Args:
+            features (np.ndarray): Scaled features with shape (time, n_features).
+            targets (np.ndarray): Scaled targets with shape (time, n_targets).
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Windows with shape (n_sequences, lookback, n_features)
+                                               and targets with shape (n_sequences, n_targets).
+        """
+        features = torch.as_tensor(np.ascontiguousarray(features), dtype=torch.float32)
+        targets = torch.as_tensor(np.ascontiguousarray(targets), dtype=torch.float32)
+
+        if len(features) <= self.lookback:
+            # Too short for a single window with a target
+            return (torch.empty((0, self.lookback, features.shape[1]), dtype=torch.float32),
+                    torch.empty((0, targets.shape[1]), dtype=torch.float32))
+
+        # unfold yields (time - lookback + 1, n_features, lookback), the last window has no target
+        X = features.unfold(0, self.lookback, 1)[:-1].transpose(1, 2)
+        y = targets[self.lookback:]
+        return X, y
+
+    def _make_loader(self, dataset: Dataset, batch_size: int, shuffle: bool) -> DataLoader:
+        """
+        Create a DataLoader over sequence windows that prefetches batches in worker processes.
+
+        Args:
+            dataset (Dataset): Dataset of sequence windows, e.g. a TensorDataset over create_sequences output.
+            batch_size (int): Number of sequences per batch.
+            shuffle (bool): Whether to shuffle the sequences every epoch.
+
+        Returns:
+            DataLoader: Loader yielding batches on the CPU.
+        """
+        num_workers = int(self.config.get('FLASH_NUM_WORKERS', 0))
+        loader_kwargs = {}
+        if num_workers > 0:
+            loader_kwargs = {'prefetch_factor': 2, 'persistent_workers': True}
+        return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=num_workers,
+                          pin_memory=self.device.type == 'cuda', **loader_kwargs)
 
     def create_model(self, input_size: int, hidden_size: int, num_layers: int, output_size: int):
         """
@@ -156,10 +219,22 @@ class FLASH:
     def train_model(self, X: torch.Tensor, y: torch.Tensor, epochs: int = 100, batch_size: int = 32, learning_rate: float = 0.001):
         self.logger.info(f"Training FLASH model with {epochs} epochs, batch_size: {batch_size}, learning_rate: {learning_rate}")
 
+        # Keep the chronological split, only the training sequences are shuffled
         train_size = int(0.8 * len(X))
-        X_train, X_val = X[:train_size], X[train_size:]
-        y_train, y_val = y[:train_size], y[train_size:]
+        train_loader = self._make_loader(TensorDataset(X[:train_size], y[:train_size]), batch_size, shuffle=True)
+        val_loader = self._make_loader(TensorDataset(X[train_size:], y[train_size:]), max(batch_size, 1000), shuffle=False)
+        self._fit(train_loader, val_loader, epochs, learning_rate)
+
+    def _fit(self, train_loader: DataLoader, val_loader: DataLoader, epochs: int, learning_rate: float):
+        """
+        Train the model with early stopping on the validation loss.
 
+        Args:
+            train_loader (DataLoader): Loader yielding shuffled (batch_X, batch_y) training batches.
+            val_loader (DataLoader): Loader yielding (batch_X, batch_y) validation batches.
+            epochs (int): Maximum number of epochs.
+            learning_rate (float): Initial learning rate.
+        """
         criterion = nn.SmoothL1Loss()
         optimizer = optim.AdamW(self.model.parameters(), lr=learning_rate, weight_decay=float(self.config.get('FLASH_L2_REGULARIZATION', 1e-6)))
         scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode='min', factor=0.5, patience=10, verbose=True)
@@ -173,16 +248,16 @@ class FLASH:
             self.model.train()
             total_loss = 0
 
-            for i in range(0, X_train.size(0), batch_size):
-                batch_X = X_train[i:i+batch_size]
-                batch_y = y_train[i:i+batch_size]
+            for i, (batch_X, batch_y) in enumerate(train_loader):
+                batch_X = batch_X.to(self.device, non_blocking=True)
+                batch_y = batch_y.to(self.device, non_blocking=True)
 
                 optimizer.zero_grad()
                 outputs = self.model(batch_X)
                 loss = criterion(outputs, batch_y)
                 
                 if torch.isnan(loss):
-                    self.logger.warning(f"NaN loss encountered in epoch {epoch}, batch {i//batch_size}")
+                    self.logger.warning(f"NaN loss encountered in epoch {epoch}, batch {i}")
                     continue
                 
                 loss.backward()
@@ -196,9 +271,14 @@ class FLASH:
 
             # Validation
             self.model.eval()
+            val_loss_sum, val_count = 0.0, 0
             with torch.no_grad():
-                val_outputs = self.model(X_val)
-                val_loss = criterion(val_outputs, y_val)
+                for batch_X, batch_y in val_loader:
+                    batch_X = batch_X.to(self.device, non_blocking=True)
+                    batch_y = batch_y.to(self.device, non_blocking=True)
+                    val_loss_sum += criterion(self.model(batch_X), batch_y).item() * len(batch_X)
+                    val_count += len(batch_X)
+            val_loss = val_loss_sum / max(val_count, 1)
 
             # Step the scheduler with the validation loss
             scheduler.step(val_loss)
@@ -227,7 +307,7 @@ class FLASH:
         self.model.eval()
         with torch.no_grad():
             for i in range(0, X.shape[0], batch_size):
-                batch = X[i:i+batch_size]
+                batch = X[i:i+batch_size].to(self.device)
                 batch_predictions = self.model(batch)
                 predictions.append(batch_predictions.cpu().numpy())
                 
@@ -249,14 +329,13 @@ class FLASH:
         self.logger.info("Running full simulation with FLASH model")
         X, _, common_dates, _, features_avg = self.preprocess_data(forcing_df, streamflow_df, snow_df)
         
-        dataset = TensorDataset(X)
-        dataloader = DataLoader(dataset, batch_size=1000, shuffle=False)
+        dataloader = self._make_loader(TensorDataset(X), batch_size=1000, shuffle=False)
         
         predictions = []
         self.model.eval()
         with torch.no_grad():
             for batch in dataloader:
-                batch_predictions = self.model(batch[0])
+                batch_predictions = self.model(batch[0].to(self.device, non_blocking=True))
                 predictions.append(batch_predictions.cpu().numpy())
         
         predictions = np.concatenate(predictions, axis=0)
@@ -283,19 +362,60 @@ class FLASH:
         self.logger.info("Simulation completed")
         return result
     
-    def save_model(self, path: Path):
+    def save_model(self, path: Path, extra: Optional[Dict[str, Any]] = None):
         self.logger.info(f"Saving FLASH model to {path}")
+        path.parent.mkdir(parents=True, exist_ok=True)
         torch.save({
             'model_state_dict': self.model.state_dict(),
             'feature_scaler': self.feature_scaler,
             'target_scaler': self.target_scaler,
             'lookback': self.lookback,
             'output_size': self.output_size,
-            'target_names': self.target_names
+            'target_names': self.target_names,
+            **(extra or {})
         }, path)
         self.logger.info("Model saved successfully")
 
 
+    def export_model(self, path: Path) -> Optional[Path]:
+        """
+        Export the trained model for chunked inference with FLASHInference.
+
+        Writes a TorchScript file next to the saved model, dynamically quantized to int8 if
+        FLASH_QUANTIZE is set. Scalers are stored as plain arrays in the file, so running the
+        exported model needs neither sklearn nor this class. The exported model scores the same
+        zero-state lookback windows as simulate, see check_exported_model.
+
+        Args:
+            path (Path): Path of the saved model, the export is written alongside it.
+
+        Returns:
+            Optional[Path]: Path to the exported model, None if FLASH_EXPORT is disabled.
+        """
+        if not self.config.get('FLASH_EXPORT', True):
+            return None
+
+        quantize = self.config.get('FLASH_QUANTIZE', False)
+        export_path = path.with_name(f"{path.stem}_{'int8' if quantize else 'scripted'}.pt")
+        metadata = {
+            'lookback': self.lookback,
+            'target_names': self.target_names,
+            'feature_columns': [str(c) for c in getattr(self.feature_scaler, 'feature_names_in_', [])] or None,
+            'feature_mean': self.feature_scaler.mean_.tolist(),
+            'feature_scale': self.feature_scaler.scale_.tolist(),
+            'target_mean': self.target_scaler.mean_.tolist(),
+            'target_scale': self.target_scaler.scale_.tolist(),
+            'static_columns': self.static_columns,
+        }
+        if self.static_columns:
+            metadata['static_mean'] = self.static_scaler.mean_.tolist()
+            metadata['static_scale'] = self.static_scaler.scale_.tolist()
+
+        self.logger.info(f"Exporting FLASH model to {export_path} (quantized: {quantize})")
+        export_flash_model(self.model, export_path, metadata, quantize=quantize)
+        self.model.to(self.device)
+        return export_path
+
     def load_model(self, path: Path):
         self.logger.info(f"Loading FLASH model from {path}")
         checkpoint = torch.load(path, map_location=self.device)
@@ -304,9 +424,14 @@ class FLASH:
         self.feature_scaler = checkpoint['feature_scaler']
         self.target_scaler = checkpoint['target_scaler']
         self.lookback = checkpoint['lookback']
+        self.static_scaler = checkpoint.get('static_scaler')
+        self.static_columns = checkpoint.get('static_columns')
         return checkpoint['model_state_dict']
 
     def run_flash(self):
+        if self.config.get('FLASH_REGIONAL_DOMAINS'):
+            return self.run_flash_regional()
+
         self.logger.info("Starting FLASH model run")
 
         try:
@@ -329,6 +454,7 @@ class FLASH:
             hidden_size = self.config.get('FLASH_HIDDEN_SIZE', 64)
             num_layers = self.config.get('FLASH_NUM_LAYERS', 2)
 
+            export_path = None
             if self.config.get('FLASH_LOAD', False):
                 # Load pre-trained model
                 self.logger.info("Loading pre-trained FLASH model")
@@ -343,9 +469,12 @@ class FLASH:
                                 batch_size=self.config.get('FLASH_BATCH_SIZE', 32),
                                 learning_rate=self.config.get('FLASH_LEARNING_RATE', 0.001))
                 self.save_model(model_save_path)
+                export_path = self.export_model(model_save_path)
 
             # Run simulation
             results = self.simulate(forcing_df, streamflow_df, snow_df_input)
+            if export_path is not None:
+                check_exported_model(export_path, features_avg, results, self.logger)
             
             # Visualize results
             self.visualize_results(results, streamflow_df, snow_df_input)
@@ -358,11 +487,226 @@ class FLASH:
             self.logger.error(f"Error during FLASH model run: {str(e)}")
             raise
 
-    def _load_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-        self.logger.info("Loading data for FLASH model")
+    def run_flash_regional(self):
+        """
+        Train and run one regional FLASH model for all domains in FLASH_REGIONAL_DOMAINS.
+
+        The sequences of all basins are pooled into one shuffled training set, with the static
+        attributes of each basin appended to its forcing so that the model can tell basins apart.
+        Simulation windows every basin on its own record and scores the windows of all basins
+        together in batched passes, and the results are saved to the simulation directory of each
+        domain.
+        """
+        domains = self.config.get('FLASH_REGIONAL_DOMAINS')
+        self.logger.info(f"Starting regional FLASH model run for {len(domains)} domains")
+
+        num_threads = self.config.get('FLASH_NUM_THREADS', 'default')
+        if num_threads not in (None, 'default'):
+            torch.set_num_threads(int(num_threads))
+        self.logger.info(f"Using {torch.get_num_threads()} threads for CPU kernels")
+
+        try:
+            use_snow = self.config.get('FLASH_USE_SNOW', False)
+            data_dir = Path(self.config.get('CONFLUENCE_DATA_DIR'))
+            model_save_path = self.project_dir / 'models' / 'flash_regional_model.pt'
+
+            # Load and align data of all basins
+            basins = {}
+            for domain in domains:
+                project_dir = data_dir / f"domain_{domain}"
+                forcing_df, streamflow_df, snow_df = self._load_data(project_dir, domain, load_snow=use_snow)
+                features_avg, targets = self._align_basin_data(forcing_df, streamflow_df, snow_df)
+                basins[domain] = {
+                    'project_dir': project_dir,
+                    'features': features_avg,
+                    'targets': targets,
+                    'static': self._load_static_attributes(project_dir, domain)
+                }
+
+            model_state, export_path = None, None
+            if self.config.get('FLASH_LOAD', False):
+                self.logger.info("Loading pre-trained regional FLASH model")
+                model_state = self.load_model(model_save_path)
+            else:
+                self._fit_regional_scalers(basins)
+
+            arrays = self._scale_regional(basins)
+
+            input_size = next(iter(arrays.values()))[0].shape[1]
+            hidden_size = self.config.get('FLASH_HIDDEN_SIZE', 64)
+            num_layers = self.config.get('FLASH_NUM_LAYERS', 2)
+            self.create_model(input_size, hidden_size, num_layers, self.output_size)
+
+            if model_state is not None:
+                self.model.load_state_dict(model_state)
+            else:
+                # Split every basin chronologically, then pool the sequences of all basins
+                batch_size = self.config.get('FLASH_BATCH_SIZE', 32)
+                train_sets, val_sets = [], []
+                for features, targets in arrays.values():
+                    X, y = self.create_sequences(features, targets)
+                    train_size = int(0.8 * len(X))
+                    train_sets.append(TensorDataset(X[:train_size], y[:train_size]))
+                    val_sets.append(TensorDataset(X[train_size:], y[train_size:]))
+
+                self.logger.info(f"Training regional FLASH model on {sum(len(d) for d in train_sets)} sequences")
+                self._fit(self._make_loader(ConcatDataset(train_sets), batch_size, shuffle=True),
+                          self._make_loader(ConcatDataset(val_sets), max(batch_size, 1000), shuffle=False),
+                          epochs=self.config.get('FLASH_EPOCHS', 100),
+                          learning_rate=self.config.get('FLASH_LEARNING_RATE', 0.001))
+                self.save_model(model_save_path, extra={
+                    'static_scaler': self.static_scaler,
+                    'static_columns': self.static_columns,
+                    'regional_domains': list(domains)
+                })
+                export_path = self.export_model(model_save_path)
+
+            results = self.simulate_regional(basins, arrays)
+            if export_path is not None:
+                domain = next(iter(results))
+                static = basins[domain]['static'].reindex(self.static_columns).fillna(0.0).values if self.static_columns else None
+                check_exported_model(export_path, basins[domain]['features'], results[domain], self.logger, static=static)
+            for domain, result in results.items():
+                if result['predicted_streamflow'].notna().any():
+                    metrics = self.calculate_metrics(basins[domain]['targets']['streamflow'], result['predicted_streamflow'])
+                    self.logger.info(f"Regional FLASH streamflow metrics for {domain}: " +
+                                     ", ".join(f"{k}: {v:.3f}" for k, v in metrics.items()))
+                self._save_results(result, basins[domain]['project_dir'])
+
+            self.logger.info("Regional FLASH model run completed successfully")
+        except Exception as e:
+            self.logger.error(f"Error during regional FLASH model run: {str(e)}")
+            raise
+
+    def _load_static_attributes(self, project_dir: Path, domain_name: str) -> pd.Series:
+        """
+        Summarise the attribute tables of a domain into basin-level static attributes.
+
+        Uses the mean elevation and the mean land cover class fractions over the HRUs of the
+        domain, as written by the attribute cleanup step.
+
+        Args:
+            project_dir (Path): Project directory of the domain.
+            domain_name (str): Name of the domain.
+
+        Returns:
+            pd.Series: Static attributes of the basin, empty if no attribute tables exist.
+        """
+        attributes = {}
+
+        elevation_path = project_dir / 'attributes' / 'elevation' / 'modified_domain_stats_elv.csv'
+        if elevation_path.exists():
+            attributes['elevation_mean'] = pd.read_csv(elevation_path)['mean'].mean()
+
+        landcover_path = project_dir / 'attributes' / 'land_class' / 'modified_domain_stats_NA_NALCMS_landcover_2020_30m.csv'
+        if landcover_path.exists():
+            landcover = pd.read_csv(landcover_path)
+            frac_columns = [col for col in landcover.columns if col.startswith('frac_')]
+            attributes.update(landcover[frac_columns].mean().to_dict())
+
+        if not attributes:
+            self.logger.warning(f"No attribute tables found for domain {domain_name}, using no static attributes")
+        return pd.Series(attributes, dtype=float)
+
+    def _fit_regional_scalers(self, basins: Dict[str, Dict[str, Any]]):
+        """Fit the feature, target and static attribute scalers on the pooled data of all basins."""
+        self.feature_scaler = StandardScaler().fit(pd.concat([b['features'] for b in basins.values()]))
+        self.target_scaler = StandardScaler().fit(pd.concat([b['targets'] for b in basins.values()]))
+
+        static = pd.DataFrame({domain: b['static'] for domain, b in basins.items()}).T.fillna(0.0)
+        self.static_columns = list(static.columns)
+        self.static_scaler = StandardScaler().fit(static.values) if self.static_columns else None
+
+    def _scale_regional(self, basins: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Scale the data of every basin and append its static attributes to the forcing.
+
+        Args:
+            basins (Dict[str, Dict[str, Any]]): Aligned features, targets and static attributes per domain.
+
+        Returns:
+            Dict[str, Tuple[np.ndarray, np.ndarray]]: Scaled model inputs and targets per domain.
+        """
+        arrays = {}
+        for domain, basin in basins.items():
+            features = np.clip(self.feature_scaler.transform(basin['features']), -10, 10)
+            targets = np.clip(self.target_scaler.transform(basin['targets']), -10, 10)
+
+            if self.static_columns:
+                static = basin['static'].reindex(self.static_columns).fillna(0.0).values[np.newaxis, :]
+                static = np.clip(self.static_scaler.transform(static), -10, 10)
+                features = np.hstack([features, np.repeat(static, len(features), axis=0)])
+
+            arrays[domain] = (features.astype(np.float32), targets.astype(np.float32))
+        return arrays
+
+    def simulate_regional(self, basins: Dict[str, Dict[str, Any]], arrays: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                          batch_size: int = 1000) -> Dict[str, pd.DataFrame]:
+        """
+        Simulate all basins with the regional model in batched passes.
+
+        Every basin is windowed on its own time index, so each prediction uses the lookback
+        steps before it in that basin's record. The windows of all basins are concatenated and
+        scored together in batches, then split back per basin. Basins whose record is not longer
+        than the lookback get no predictions. The windows are strided views, batches are only
+        materialised by the DataLoader.
+
+        Args:
+            basins (Dict[str, Dict[str, Any]]): Aligned features and targets per domain.
+            arrays (Dict[str, Tuple[np.ndarray, np.ndarray]]): Scaled model inputs per domain.
+            batch_size (int): Number of windows in each forward pass.
+
+        Returns:
+            Dict[str, pd.DataFrame]: Averaged features joined with predictions per domain, on
+                                     the dates of that domain.
+        """
+        datasets, counts = [], {}
+        for domain in basins:
+            X, _ = self.create_sequences(arrays[domain][0], arrays[domain][1])
+            counts[domain] = len(X)
+            datasets.append(TensorDataset(X))
+            if not len(X):
+                self.logger.warning(f"Record of {domain} is not longer than the lookback of {self.lookback} steps, no predictions")
+        self.logger.info(f"Simulating {len(basins)} basins over {sum(counts.values())} time windows")
+
+        predictions = []
+        self.model.eval()
+        with torch.no_grad():
+            for batch in self._make_loader(ConcatDataset(datasets), batch_size, shuffle=False):
+                predictions.append(self.model(batch[0].to(self.device, non_blocking=True)).cpu().numpy())
+        predictions = np.concatenate(predictions) if predictions else np.empty((0, self.output_size), dtype=np.float32)
+
+        columns = ['predicted_streamflow', 'predicted_SWE'] if self.output_size == 2 else ['predicted_streamflow']
+        results, start = {}, 0
+        for domain, basin in basins.items():
+            basin_predictions = predictions[start:start + counts[domain]]
+            start += counts[domain]
+            if len(basin_predictions):
+                basin_predictions = self.target_scaler.inverse_transform(basin_predictions)
+            basin_predictions = np.nan_to_num(basin_predictions, nan=0.0, posinf=1e15, neginf=-1e15)
+            pred_df = pd.DataFrame(basin_predictions, columns=columns, index=basin['features'].index[self.lookback:][:counts[domain]])
+            results[domain] = basin['features'].join(pred_df, how='outer')
+        return results
+
+    def _load_data(self, project_dir: Optional[Path] = None, domain_name: Optional[str] = None,
+                   load_snow: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
+        """
+        Load forcing and observations of a domain.
+
+        Args:
+            project_dir (Optional[Path]): Project directory of the domain, defaults to the configured domain.
+            domain_name (Optional[str]): Name of the domain, defaults to the configured domain.
+            load_snow (bool): Whether to load snow observations. If False, None is returned for snow.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]: Forcing, streamflow and snow data.
+        """
+        project_dir = project_dir or self.project_dir
+        domain_name = domain_name or self.config.get('DOMAIN_NAME')
+        self.logger.info(f"Loading data for FLASH model for domain {domain_name}")
         
         # Load forcing data
-        forcing_path = self.project_dir / 'forcing' / 'basin_averaged_data'
+        forcing_path = project_dir / 'forcing' / 'basin_averaged_data'
         forcing_files = glob.glob(str(forcing_path / '*.nc'))
         
         if not forcing_files:
@@ -382,48 +726,50 @@ class FLASH:
         forcing_df = forcing_df.set_index(['time', 'hruId']).sort_index()
 
         # Load streamflow data
-        streamflow_path = self.project_dir / 'observations' / 'streamflow' / 'preprocessed' / f"{self.config.get('DOMAIN_NAME')}_streamflow_processed.csv"
+        streamflow_path = project_dir / 'observations' / 'streamflow' / 'preprocessed' / f"{domain_name}_streamflow_processed.csv"
         streamflow_df = pd.read_csv(streamflow_path, parse_dates=['datetime'], dayfirst=True)
         streamflow_df = streamflow_df.set_index('datetime').rename(columns={'discharge_cms': 'streamflow'})
         streamflow_df.index = pd.to_datetime(streamflow_df.index)
 
-        # Load snow data
-        snow_path = self.project_dir / 'observations' / 'snow' / 'preprocessed'
-        snow_files = glob.glob(str(snow_path / f"{self.config.get('DOMAIN_NAME')}_filtered_snow_observations.csv"))
-        if not snow_files:
-            raise FileNotFoundError(f"No snow observation files found in {snow_path}")
-        
-        snow_df = pd.concat([pd.read_csv(file, parse_dates=['datetime'], dayfirst=True) for file in snow_files])
-        
-        # Aggregate snow data across all stations
-        snow_df = snow_df.groupby('datetime')['snw'].mean().reset_index()
-        snow_df['datetime'] = pd.to_datetime(snow_df['datetime'])
-        snow_df = snow_df.set_index('datetime')
-
         # Ensure all datasets cover the same time period
-        start_date = max(forcing_df.index.get_level_values('time').min(),
-                        streamflow_df.index.min(),
-                        snow_df.index.min())
-        end_date = min(forcing_df.index.get_level_values('time').max(),
-                    streamflow_df.index.max(),
-                    snow_df.index.max())
+        start_date = max(forcing_df.index.get_level_values('time').min(), streamflow_df.index.min())
+        end_date = min(forcing_df.index.get_level_values('time').max(), streamflow_df.index.max())
+
+        snow_df = None
+        if load_snow:
+            # Load snow data
+            snow_path = project_dir / 'observations' / 'snow' / 'preprocessed'
+            snow_files = glob.glob(str(snow_path / f"{domain_name}_filtered_snow_observations.csv"))
+            if not snow_files:
+                raise FileNotFoundError(f"No snow observation files found in {snow_path}")
+            
+            snow_df = pd.concat([pd.read_csv(file, parse_dates=['datetime'], dayfirst=True) for file in snow_files])
+            
+            # Aggregate snow data across all stations
+            snow_df = snow_df.groupby('datetime')['snw'].mean().reset_index()
+            snow_df['datetime'] = pd.to_datetime(snow_df['datetime'])
+            snow_df = snow_df.set_index('datetime')
+
+            start_date = max(start_date, snow_df.index.min())
+            end_date = min(end_date, snow_df.index.max())
 
         forcing_df = forcing_df.loc[pd.IndexSlice[start_date:end_date, :], :]
         streamflow_df = streamflow_df.loc[start_date:end_date]
-        snow_df = snow_df.loc[start_date:end_date]
-        snow_df = snow_df.resample('h').interpolate(method = 'linear')
-
         self.logger.info(f"Loaded forcing data with shape: {forcing_df.shape}")
         self.logger.info(f"Loaded streamflow data with shape: {streamflow_df.shape}")
-        self.logger.info(f"Loaded snow data with shape: {snow_df.shape}")
+
+        if snow_df is not None:
+            snow_df = snow_df.loc[start_date:end_date]
+            snow_df = snow_df.resample('h').interpolate(method = 'linear')
+            self.logger.info(f"Loaded snow data with shape: {snow_df.shape}")
         
         return forcing_df, streamflow_df, snow_df
 
-    def _save_results(self, results: pd.DataFrame):
+    def _save_results(self, results: pd.DataFrame, project_dir: Optional[Path] = None):
         self.logger.info("Saving FLASH model results")
         
         # Prepare the output directory
-        output_dir = self.project_dir / 'simulations' / self.config.get('EXPERIMENT_ID') / 'FLASH'
+        output_dir = (project_dir or self.project_dir) / 'simulations' / self.config.get('EXPERIMENT_ID') / 'FLASH'
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize dataset dictionary with streamflow
@@ -623,17 +969,9 @@ class FLASHPostProcessor:
                 'units': 'm3/s'
             }
             
-            # Load existing results if file exists, otherwise create new DataFrame
-            output_file = self.results_dir / f"{self.config['EXPERIMENT_ID']}_results.csv"
-            if output_file.exists():
-                existing_df = pd.read_csv(output_file, index_col=0, parse_dates=True)
-                # Reindex the new results to match existing index
-                results_df = results_df.reindex(existing_df.index)
-                # Merge existing results with new results
-                results_df = pd.concat([existing_df, results_df], axis=1)
-            
-            # Save to CSV
-            results_df.to_csv(output_file)
+            # Add to the experiment results store
+            output_file = ResultsStore(self.config, self.logger).append('FLASH', 'discharge_cms', results_df['FLASH_discharge_cms'],
+                                                                        attrs=results_df.attrs)
             
             self.logger.info(f"Results saved to: {output_file}")
             return output_file
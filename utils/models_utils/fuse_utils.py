@@ -2,27 +2,26 @@ import os
 import sys
 import time
 import subprocess
+import multiprocessing
 from shutil import rmtree, copyfile
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
-import numpy as np # type: ignore
 import pandas as pd # type: ignore
 import geopandas as gpd # type: ignore
 import xarray as xr # type: ignore
 import shutil
 from datetime import datetime
-import rasterio # type: ignore
 
 import csv
 import itertools
 import matplotlib.pyplot as plt # type: ignore
-import xarray as xr # type: ignore
-from typing import Dict, List, Tuple, Any
 
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from utils.evaluation_util.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE # type: ignore
-from utils.dataHandling_utils.variable_utils import VariableHandler # type: ignore
+from utils.dataHandling_utils.lumped_forcing_utils import LumpedForcingBuilder, oudin_pet # type: ignore
+from utils.models_utils.elevation_band_utils import ElevationBandBuilder # type: ignore
+from utils.dataHandling_utils.results_store_utils import ResultsStore # type: ignore
 
 class FUSEPreProcessor:
     """
@@ -139,72 +138,16 @@ class FUSEPreProcessor:
             xr.DataArray: Calculated PET in mm/day
         """
         self.logger.info("Calculating PET using Oudin's formula")
-        
-        # Convert temperature to Celsius
-        temp_C = temp_data - 273.15
-        
-        # Get dates for solar radiation calculation
-        dates = pd.DatetimeIndex(temp_data.time.values)
-        
-        # Calculate day of year
-        doy = dates.dayofyear
-        
-        # Calculate solar declination
-        solar_decl = 0.409 * np.sin(2 * np.pi / 365 * doy - 1.39)
-        
-        # Convert latitude to radians
-        lat_rad = np.deg2rad(lat)
-        
-        # Calculate sunset hour angle
-        sunset_angle = np.arccos(-np.tan(lat_rad) * np.tan(solar_decl))
-        
-        # Calculate extraterrestrial radiation (Ra)
-        dr = 1 + 0.033 * np.cos(2 * np.pi / 365 * doy)
-        Ra = (24 * 60 / np.pi) * 0.082 * dr * (
-            sunset_angle * np.sin(lat_rad) * np.sin(solar_decl) +
-            np.cos(lat_rad) * np.cos(solar_decl) * np.sin(sunset_angle)
-        )
-        
-        # Calculate PET using Oudin's formula
-        # PET = Ra * (T + 5) / 100 if T + 5 > 0, else 0
-        pet = xr.where(temp_C + 5 > 0,
-                      Ra * (temp_C + 5) / 100,
-                      0)
-        
-        # Convert to proper units (mm/day) and add metadata
-        pet = pet.assign_attrs({
-            'units': 'mm/day',
-            'long_name': 'Potential evapotranspiration',
-            'standard_name': 'water_potential_evaporation_flux'
-        })
-        
-        return pet
+        return oudin_pet(temp_data, lat)
 
     def prepare_forcing_data(self):
         try:
-            # Read and process forcing data
-            forcing_files = sorted(self.forcing_basin_path.glob('*.nc'))
-            if not forcing_files:
-                raise FileNotFoundError("No forcing files found in basin-averaged data directory")
-                        
-            variable_handler = VariableHandler(config=self.config, logger=self.logger, dataset=self.config['FORCING_DATASET'], model='FUSE')
-            # Open and concatenate all forcing files
-            ds = xr.open_mfdataset(forcing_files)
-            dsVariableHandler = variable_handler.process_forcing_data(ds)
-            ds = dsVariableHandler
-            # Average across HRUs if needed
-            ds = ds.mean(dim='hru')
-            
-            # Convert forcing data to daily resolution
-            ds = ds.resample(time='D').mean()
-            
-
-            try:
-                ds['temp'] = ds['airtemp'] #- 273.15
-                ds['pr'] = ds['pptrate'] #* 86400
-            except:
-                pass
+            # Read catchment and get centroid
+            catchment = gpd.read_file(self.catchment_path / self.catchment_name)
+            mean_lon, mean_lat = self._get_catchment_centroid(catchment)
 
+            # Daily lumped forcing with PET, built lazily and shared with other lumped models
+            ds = LumpedForcingBuilder(self.config, self.logger).get_forcing(mean_lat, 'FUSE', catchment)
 
             # Load streamflow observations
             obs_path = self.project_dir / 'observations' / 'streamflow' / 'preprocessed' / f"{self.domain_name}_streamflow_processed.csv"
@@ -241,13 +184,6 @@ class FUSEPreProcessor:
                 coords={'time': obs_daily.index.values}
             )
 
-            # Read catchment and get centroid
-            catchment = gpd.read_file(self.catchment_path / self.catchment_name)
-            mean_lon, mean_lat = self._get_catchment_centroid(catchment)
-            
-            # Calculate PET using Oudin formula
-            pet = self.calculate_pet_oudin(ds['temp'], mean_lat)
-
             # Find overlapping time period
             start_time = max(ds.time.min().values, obs_ds.time.min().values)
             end_time = min(ds.time.max().values, obs_ds.time.max().values)
@@ -258,23 +194,16 @@ class FUSEPreProcessor:
             # Select the common time period and align to the new time index
             ds = ds.sel(time=slice(start_time, end_time)).reindex(time=time_index)
             obs_ds = obs_ds.sel(time=slice(start_time, end_time)).reindex(time=time_index)
-            pet = pet.sel(time=slice(start_time, end_time)).reindex(time=time_index)
+
             # Convert time to days since 1970-01-01
             time_days = (time_index - pd.Timestamp('1970-01-01')).days.values
 
-            # Create FUSE forcing data with correct dimensions
-            ds_coords = {
-                'longitude': [mean_lon],
-                'latitude': [mean_lat],
-                'time': time_days
-            }
-            
             # Create the dataset with dimensions first
             fuse_forcing = xr.Dataset(
                 coords={
-                    'longitude': ('longitude', ds_coords['longitude']),
-                    'latitude': ('latitude', ds_coords['latitude']),
-                    'time': ('time', ds_coords['time'])
+                    'longitude': ('longitude', [mean_lon]),
+                    'latitude': ('latitude', [mean_lat]),
+                    'time': ('time', time_days)
                 }
             )
             # Add coordinate attributes (without _FillValue)
@@ -291,30 +220,25 @@ class FUSEPreProcessor:
                 'long_name': 'time'
             }
 
-            # Prepare data variables
+            # Prepare data variables, kept lazy so they are computed chunk by chunk when written
             var_mapping = [
-                ('pr', ds['pr'].values, 'precipitation', 'mm/day', 'Mean daily precipitation'),
-                ('temp', ds['temp'].values, 'temperature', 'degC', 'Mean daily temperature'),
-                ('pet', pet.values, 'pet', 'mm/day', 'Mean daily pet'),
-                ('q_obs', obs_ds['q_obs'].values, 'streamflow', 'mm/day', 'Mean observed daily discharge')
+                ('pr', ds['pr'], 'mm/day', 'Mean daily precipitation'),
+                ('temp', ds['temp'], 'degC', 'Mean daily temperature'),
+                ('pet', ds['pet'], 'mm/day', 'Mean daily pet'),
+                ('q_obs', obs_ds['q_obs'], 'mm/day', 'Mean observed daily discharge')
             ]
 
             encoding = {}
-            
-            for var_name, data, _, units, long_name in var_mapping:
-                if np.any(np.isnan(data)):
-                    data = np.nan_to_num(data, nan=-9999.0)
-                
-                fuse_forcing[var_name] = xr.DataArray(
-                    data.reshape(-1, 1, 1),
-                    dims=['time', 'latitude', 'longitude'],
-                    coords=fuse_forcing.coords,
-                    attrs={
-                        'units': units,
-                        'long_name': long_name
-                    }
-                )
-                
+
+            for var_name, data, units, long_name in var_mapping:
+                data = data.fillna(-9999.0).assign_coords(time=time_days)
+                fuse_forcing[var_name] = data.expand_dims(
+                    latitude=[mean_lat], longitude=[mean_lon]
+                ).transpose('time', 'latitude', 'longitude').assign_attrs({
+                    'units': units,
+                    'long_name': long_name
+                })
+
                 encoding[var_name] = {
                     '_FillValue': -9999.0,
                     'dtype': 'float32'
@@ -336,9 +260,6 @@ class FUSEPreProcessor:
                 format='NETCDF4'
             )
             
-            print(fuse_forcing['pr'])
-            print(fuse_forcing['temp'])
-            
             return output_file
 
         except Exception as e:
@@ -477,47 +398,20 @@ class FUSEPreProcessor:
         self.logger.info("Creating elevation bands file for FUSE")
 
         try:
-            # Read DEM
             dem_path = self.project_dir / 'attributes' / 'elevation' / 'dem' / f"domain_{self.domain_name}_elv.tif"
-            with rasterio.open(dem_path) as src:
-                dem = src.read(1)
-                transform = src.transform
 
             # Read catchment and get centroid
             catchment = gpd.read_file(self.catchment_path / self.catchment_name)
             lon, lat = self._get_catchment_centroid(catchment)
 
-            # Mask DEM with catchment boundary
-            with rasterio.open(dem_path) as src:
-                out_image, out_transform = rasterio.mask.mask(src, catchment.geometry, crop=True)
-                masked_dem = out_image[0]
-                masked_dem = masked_dem[masked_dem != src.nodata]
-
-            # Calculate elevation bands
-            min_elev = np.floor(np.min(masked_dem))
-            max_elev = np.ceil(np.max(masked_dem))
-            band_size = 100  # 100m elevation bands
-            num_bands = int((max_elev - min_elev) / band_size) + 1
-
-            # Calculate area fractions and mean elevations
-            area_fracs = []
-            mean_elevs = []
-            total_pixels = len(masked_dem)
-
-            for i in range(num_bands):
-                lower = min_elev + i * band_size
-                upper = lower + band_size
-                band_pixels = np.sum((masked_dem >= lower) & (masked_dem < upper))
-                area_frac = band_pixels / total_pixels
-                mean_elev = lower + band_size/2
-
-                if area_frac > 0:  # Only include bands that have area
-                    area_fracs.append(area_frac)
-                    mean_elevs.append(mean_elev)
-
-            # Normalize area fractions to sum to 1
-            area_fracs = np.array(area_fracs) / np.sum(area_fracs)
-            mean_elevs = np.array(mean_elevs)
+            # Count pixels per HRU and 100 m elevation band in one pass over the DEM, then lump the HRUs
+            builder = ElevationBandBuilder(
+                dem_path, self.logger, band_size=100,
+                num_processes=int(self.config.get('MPI_PROCESSES', multiprocessing.cpu_count()))
+            )
+            bands = builder.compute(catchment, lumped=True)
+            area_fracs = bands['area_frac'][0]
+            mean_elevs = bands['mean_elev'][0]
 
             # Create netCDF file
             output_file = self.forcing_fuse_path / f"{self.domain_name}_elev_bands.nc"
@@ -558,7 +452,7 @@ class FUSEPreProcessor:
                     'data': mean_elevs,
                     'attrs': {
                         'units': 'm asl',
-                        'long_name': 'Mid-point elevation of each elevation band'
+                        'long_name': 'Mean elevation of each elevation band'
                     }
                 },
                 'prec_frac': {
@@ -1272,9 +1166,9 @@ class FUSEPostprocessor:
                 'units': 'm3/s'
             }
             
-            # Save to CSV
-            output_file = self.results_dir / f"{self.config['EXPERIMENT_ID']}_results.csv"
-            results_df.to_csv(output_file)
+            # Add to the experiment results store
+            output_file = ResultsStore(self.config, self.logger).append('FUSE', 'discharge_cms', results_df['FUSE_discharge_cms'],
+                                                                        attrs=results_df.attrs)
             
             self.logger.info(f"Results saved to: {output_file}")
             return output_file
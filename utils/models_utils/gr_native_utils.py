@@ -0,0 +1,557 @@
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+import numpy as np # type: ignore
+
+
+# Number of ordinates of the GR4J unit hydrograph UH1 at a daily time step (UH2 has twice as many)
+NH = 20
+
+# CemaNeige constants as in airGR
+GRAD_P = 0.00041         # Precipitation elevation gradient [m-1]
+Z_THRESHOLD = 4000.0     # Elevation above which precipitation is no longer extrapolated [m]
+MIN_SPEED = 0.1          # Minimum fraction of potential melt
+T_MELT = 0.0             # Melt temperature threshold [degC]
+
+# Parameter order of the native CemaNeige-GR4J model with hysteresis, as in airGR's ParamFinalR
+PARAM_NAMES = ['X1', 'X2', 'X3', 'X4', 'CN1', 'CN2', 'CN3', 'CN4']
+
+# Sampling bounds for Monte Carlo calibration
+PARAM_BOUNDS = np.array([
+    [10.0, 2500.0],   # X1: production store capacity [mm]
+    [-5.0, 5.0],      # X2: groundwater exchange coefficient [mm/day]
+    [1.0, 1000.0],    # X3: routing store capacity [mm]
+    [0.5, 10.0],      # X4: unit hydrograph time base [day]
+    [0.0, 1.0],       # CN1: snow pack thermal state weighting coefficient [-]
+    [0.0, 20.0],      # CN2: degree-day melt coefficient [mm/degC/day]
+    [1.0, 1000.0],    # CN3: accumulation threshold [mm]
+    [0.0, 1.0],       # CN4: fraction of mean annual snowfall defining the melt threshold [-]
+])
+
+
+# Calibration criteria of the native engine, RMSE and MAE are minimised and the others maximised
+CRITERIA = ('KGE', 'KGEp', 'NSE', 'RMSE', 'MAE')
+MINIMISED_CRITERIA = ('RMSE', 'MAE')
+
+# Largest accepted difference to airGR, relative to the mean airGR runoff. This is a target, not a
+# verified bound: no airGR reference run is stored with the repository, so the tolerance has not
+# been checked against airGR. compare_with_airgr (live) or compare_with_stored_airgr (against a
+# file written by save_airgr_reference) is what verifies it for a given airGR version.
+AIRGR_TOLERANCE = 1e-6
+
+
+def _identity_decorator(*args, **kwargs):
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+    return lambda func: func
+
+
+try:
+    from numba import njit, prange # type: ignore
+    HAS_NUMBA = True
+except ImportError:
+    njit = _identity_decorator
+    prange = range
+    HAS_NUMBA = False
+
+
+def uh_ordinates(x4: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the GR4J unit hydrograph ordinates (SS1/SS2 with exponent 2.5) for each parameter set.
+
+    Args:
+        x4 (np.ndarray): Unit hydrograph time base of each parameter set [day].
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: UH1 ordinates with shape (n_sets, NH) and UH2
+                                       ordinates with shape (n_sets, 2 * NH).
+    """
+    x4 = np.asarray(x4, dtype=float)[:, np.newaxis]
+
+    def ss1(t):
+        return np.where(t <= 0, 0.0, np.where(t < x4, (t / x4) ** 2.5, 1.0))
+
+    def ss2(t):
+        return np.where(t <= 0, 0.0, np.where(t < x4, 0.5 * (t / x4) ** 2.5,
+                        np.where(t < 2 * x4, 1 - 0.5 * np.abs(2 - t / x4) ** 2.5, 1.0)))
+
+    t1 = np.arange(1, NH + 1, dtype=float)[np.newaxis, :]
+    t2 = np.arange(1, 2 * NH + 1, dtype=float)[np.newaxis, :]
+    return ss1(t1) - ss1(t1 - 1), ss2(t2) - ss2(t2 - 1)
+
+
+def layer_elevations(hypso: np.ndarray, n_layers: int = 5) -> np.ndarray:
+    """
+    Get the representative elevation of equal-area elevation layers from a hypsometric curve.
+
+    Args:
+        hypso (np.ndarray): Elevation percentiles 0 to 100 (101 values) [m].
+        n_layers (int): Number of elevation layers.
+
+    Returns:
+        np.ndarray: Elevation of each layer [m].
+    """
+    hypso = np.asarray(hypso, dtype=float)
+    n_mean, n_rest = divmod(100, n_layers)
+    z_layers = np.empty(n_layers)
+    count = 0
+    for layer in range(n_layers):
+        n = n_mean + 1 if layer < n_rest else n_mean
+        if n == 1:
+            z_layers[layer] = hypso[count]
+        elif n == 2:
+            z_layers[layer] = 0.5 * (hypso[count] + hypso[count + 1])
+        else:
+            z_layers[layer] = hypso[count + n // 2 - 1]
+        count += n
+    return z_layers
+
+
+def extrapolate_layers(precip: np.ndarray, temp: np.ndarray, hypso: np.ndarray, z_inputs: float,
+                       n_layers: int = 5, temp_gradient: float = -0.0065) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Distribute lumped precipitation and temperature over elevation layers without R.
+
+    Precipitation is extrapolated with airGR's exponential gradient and rescaled to conserve the
+    lumped amount. Temperature uses a constant lapse rate instead of airGR's daily gradient table,
+    and the solid fraction follows the USACE temperature ramp between -1 and 3 degC. Use
+    layer_inputs_from_airgr where results have to match airGR exactly.
+
+    Args:
+        precip (np.ndarray): Lumped precipitation [mm/day].
+        temp (np.ndarray): Lumped mean air temperature [degC].
+        hypso (np.ndarray): Elevation percentiles 0 to 100 (101 values) [m].
+        z_inputs (float): Elevation of the lumped forcing [m].
+        n_layers (int): Number of elevation layers.
+        temp_gradient (float): Temperature lapse rate [degC/m].
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Layer precipitation, temperature and solid
+                                                   precipitation fraction, each (time, n_layers).
+    """
+    z_layers = layer_elevations(hypso, n_layers)
+    precip = np.asarray(precip, dtype=float)[:, np.newaxis]
+    temp = np.asarray(temp, dtype=float)[:, np.newaxis]
+
+    factor = np.exp(GRAD_P * (np.minimum(z_layers, Z_THRESHOLD) - min(z_inputs, Z_THRESHOLD)))[np.newaxis, :]
+    layer_precip = precip * factor / factor.mean()
+    layer_temp = temp + temp_gradient * (z_layers - z_inputs)[np.newaxis, :]
+    layer_frac_solid = 1.0 - np.clip((layer_temp + 1.0) / 4.0, 0.0, 1.0)
+    return layer_precip, layer_temp, layer_frac_solid
+
+
+def layer_inputs_from_airgr(dates: np.ndarray, precip: np.ndarray, pet: np.ndarray, temp: np.ndarray,
+                            hypso: np.ndarray, z_inputs: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the elevation layer forcing computed by airGR's CreateInputsModel.
+
+    The layer forcing does not depend on the model parameters, so it only needs to cross the
+    rpy2 boundary once per catchment, after which all simulations run natively.
+
+    Args:
+        dates (np.ndarray): Dates as 'YYYY-MM-DD' strings.
+        precip (np.ndarray): Lumped precipitation [mm/day].
+        pet (np.ndarray): Potential evapotranspiration [mm/day].
+        temp (np.ndarray): Lumped mean air temperature [degC].
+        hypso (np.ndarray): Elevation percentiles 0 to 100 (101 values) [m].
+        z_inputs (float): Elevation of the lumped forcing [m].
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Layer precipitation, temperature and solid
+                                                   precipitation fraction, each (time, n_layers).
+    """
+    import rpy2.robjects as robjects # type: ignore
+
+    robjects.r('suppressMessages(library(airGR))')
+    inputs_model = robjects.r['CreateInputsModel'](
+        FUN_MOD=robjects.r['RunModel_CemaNeigeGR4J'],
+        DatesR=robjects.r['as.POSIXct'](robjects.StrVector(list(dates)), tz='UTC'),
+        Precip=robjects.FloatVector(precip),
+        PotEvap=robjects.FloatVector(pet),
+        TempMean=robjects.FloatVector(temp),
+        HypsoData=robjects.FloatVector(hypso),
+        ZInputs=float(z_inputs)
+    )
+    layers = inputs_model.rx2('LayerPrecip')
+    layer_precip = np.column_stack([np.asarray(layer) for layer in layers])
+    layer_temp = np.column_stack([np.asarray(layer) for layer in inputs_model.rx2('LayerTempMean')])
+    layer_frac_solid = np.column_stack([np.asarray(layer) for layer in inputs_model.rx2('LayerFracSolidPrecip')])
+    return layer_precip, layer_temp, layer_frac_solid
+
+
+@njit(cache=True, parallel=True)
+def _simulate_numba(params, pet, layer_precip, layer_temp, layer_frac_solid, mean_annual_solid, uh1, uh2):
+    n_sets = params.shape[0]
+    n_steps, n_layers = layer_precip.shape
+    q = np.zeros((n_sets, n_steps))
+
+    for s in prange(n_sets):
+        x1, x2, x3 = params[s, 0], params[s, 1], params[s, 2]
+        ctg, kf, gacc, gfrac = params[s, 4], params[s, 5], params[s, 6], params[s, 7]
+
+        prod = 0.3 * x1
+        rout = 0.5 * x3
+        st_uh1 = np.zeros(NH)
+        st_uh2 = np.zeros(2 * NH)
+        g = np.zeros(n_layers)
+        etg = np.zeros(n_layers)
+        gratio = np.zeros(n_layers)
+        gthreshold = gfrac * mean_annual_solid
+        glocalmax = gthreshold.copy()
+
+        for t in range(n_steps):
+            # CemaNeige snow accumulation and melt per elevation layer
+            p1 = 0.0
+            for lay in range(n_layers):
+                psol = layer_frac_solid[t, lay] * layer_precip[t, lay]
+                pliq = layer_precip[t, lay] - psol
+                g[lay] += psol
+                etg[lay] = min(ctg * etg[lay] + (1.0 - ctg) * layer_temp[t, lay], 0.0)
+                pot_melt = 0.0
+                if etg[lay] == 0.0 and layer_temp[t, lay] > T_MELT:
+                    pot_melt = min(g[lay], kf * (layer_temp[t, lay] - T_MELT))
+                melt = ((1.0 - MIN_SPEED) * gratio[lay] + MIN_SPEED) * pot_melt
+                g[lay] -= melt
+                dg = psol - melt
+                if dg > 0.0:
+                    gratio[lay] = min(gratio[lay] + dg / gacc, 1.0)
+                    if gratio[lay] == 1.0:
+                        glocalmax[lay] = gthreshold[lay]
+                elif dg < 0.0:
+                    gratio[lay] = min(g[lay] / glocalmax[lay], 1.0) if glocalmax[lay] > 0.0 else 0.0
+                p1 += (pliq + melt) / n_layers
+
+            # GR4J production store
+            e = max(pet[t], 0.0)
+            p1 = max(p1, 0.0)
+            if p1 <= e:
+                ws = min((e - p1) / x1, 13.0)
+                tws = np.tanh(ws)
+                sr = prod / x1
+                prod -= prod * (2.0 - sr) * tws / (1.0 + (1.0 - sr) * tws)
+                pr = 0.0
+            else:
+                ws = min((p1 - e) / x1, 13.0)
+                tws = np.tanh(ws)
+                sr = prod / x1
+                ps = x1 * (1.0 - sr * sr) * tws / (1.0 + sr * tws)
+                pr = p1 - e - ps
+                prod += ps
+            prod = max(prod, 0.0)
+            sr = (prod / x1) ** 4
+            perc = prod * (1.0 - (1.0 + sr / 25.62890625) ** -0.25)
+            prod -= perc
+            pr += perc
+
+            # Unit hydrograph convolution
+            for k in range(NH - 1):
+                st_uh1[k] = st_uh1[k + 1] + uh1[s, k] * 0.9 * pr
+            st_uh1[NH - 1] = uh1[s, NH - 1] * 0.9 * pr
+            for k in range(2 * NH - 1):
+                st_uh2[k] = st_uh2[k + 1] + uh2[s, k] * 0.1 * pr
+            st_uh2[2 * NH - 1] = uh2[s, 2 * NH - 1] * 0.1 * pr
+
+            # Groundwater exchange and routing store
+            rr = rout / x3
+            exch = x2 * rr ** 3.5
+            rout = max(rout + st_uh1[0] + exch, 0.0)
+            rr = (rout / x3) ** 4
+            qr = rout * (1.0 - (1.0 + rr) ** -0.25)
+            rout -= qr
+            qd = max(st_uh2[0] + exch, 0.0)
+            q[s, t] = max(qr + qd, 0.0)
+
+    return q
+
+
+def _simulate_numpy(params, pet, layer_precip, layer_temp, layer_frac_solid, mean_annual_solid, uh1, uh2):
+    n_sets = params.shape[0]
+    n_steps, n_layers = layer_precip.shape
+    q = np.zeros((n_sets, n_steps))
+    x1, x2, x3 = params[:, 0], params[:, 1], params[:, 2]
+    ctg, kf, gacc = params[:, 4:5], params[:, 5:6], params[:, 6:7]
+
+    prod = 0.3 * x1
+    rout = 0.5 * x3
+    st_uh1 = np.zeros((n_sets, NH))
+    st_uh2 = np.zeros((n_sets, 2 * NH))
+    g = np.zeros((n_sets, n_layers))
+    etg = np.zeros((n_sets, n_layers))
+    gratio = np.zeros((n_sets, n_layers))
+    gthreshold = params[:, 7:8] * mean_annual_solid[np.newaxis, :]
+    glocalmax = gthreshold.copy()
+
+    for t in range(n_steps):
+        # CemaNeige snow accumulation and melt per elevation layer
+        psol = layer_frac_solid[t] * layer_precip[t]
+        pliq = layer_precip[t] - psol
+        g += psol
+        etg = np.minimum(ctg * etg + (1.0 - ctg) * layer_temp[t], 0.0)
+        pot_melt = np.where((etg == 0.0) & (layer_temp[t] > T_MELT),
+                            np.minimum(g, kf * (layer_temp[t] - T_MELT)), 0.0)
+        melt = ((1.0 - MIN_SPEED) * gratio + MIN_SPEED) * pot_melt
+        g -= melt
+        dg = psol - melt
+        accumulating = dg > 0.0
+        gratio = np.where(accumulating, np.minimum(gratio + dg / gacc, 1.0), gratio)
+        glocalmax = np.where(accumulating & (gratio == 1.0), gthreshold, glocalmax)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gratio = np.where(dg < 0.0, np.where(glocalmax > 0.0, np.minimum(g / glocalmax, 1.0), 0.0), gratio)
+        p1 = np.maximum((pliq + melt).mean(axis=1), 0.0)
+
+        # GR4J production store
+        e = max(pet[t], 0.0)
+        sr = prod / x1
+        evap = p1 <= e
+        tws = np.tanh(np.minimum(np.abs(p1 - e) / x1, 13.0))
+        er = prod * (2.0 - sr) * tws / (1.0 + (1.0 - sr) * tws)
+        ps = x1 * (1.0 - sr * sr) * tws / (1.0 + sr * tws)
+        prod = np.maximum(np.where(evap, prod - er, prod + ps), 0.0)
+        pr = np.where(evap, 0.0, p1 - e - ps)
+        sr = (prod / x1) ** 4
+        perc = prod * (1.0 - (1.0 + sr / 25.62890625) ** -0.25)
+        prod -= perc
+        pr += perc
+
+        # Unit hydrograph convolution
+        st_uh1 = np.concatenate([st_uh1[:, 1:], np.zeros((n_sets, 1))], axis=1) + uh1 * (0.9 * pr)[:, np.newaxis]
+        st_uh2 = np.concatenate([st_uh2[:, 1:], np.zeros((n_sets, 1))], axis=1) + uh2 * (0.1 * pr)[:, np.newaxis]
+
+        # Groundwater exchange and routing store
+        exch = x2 * (rout / x3) ** 3.5
+        rout = np.maximum(rout + st_uh1[:, 0] + exch, 0.0)
+        qr = rout * (1.0 - (1.0 + (rout / x3) ** 4) ** -0.25)
+        rout -= qr
+        qd = np.maximum(st_uh2[:, 0] + exch, 0.0)
+        q[:, t] = np.maximum(qr + qd, 0.0)
+
+    return q
+
+
+def simulate_cemaneige_gr4j(params: np.ndarray, pet: np.ndarray, layer_precip: np.ndarray, layer_temp: np.ndarray,
+                            layer_frac_solid: np.ndarray, use_numba: Optional[bool] = None) -> np.ndarray:
+    """
+    Simulate daily runoff with CemaNeige-GR4J (with hysteresis) for many parameter sets at once.
+
+    Follows the process equations of airGR's RunModel_CemaNeigeGR4J with IsHyst = TRUE and its
+    default initial states (production store at 30 %, routing store at 50 %, no snow). Uses a
+    Numba kernel parallelised over parameter sets where Numba is installed, and a NumPy kernel
+    vectorised over parameter sets otherwise.
+
+    Args:
+        params (np.ndarray): Parameter sets with shape (n_sets, 8) in PARAM_NAMES order, or (8,).
+        pet (np.ndarray): Potential evapotranspiration [mm/day], shape (time,).
+        layer_precip (np.ndarray): Precipitation per elevation layer [mm/day], shape (time, n_layers).
+        layer_temp (np.ndarray): Mean temperature per elevation layer [degC], shape (time, n_layers).
+        layer_frac_solid (np.ndarray): Solid precipitation fraction per layer [-], shape (time, n_layers).
+        use_numba (Optional[bool]): Force or disable the Numba kernel, defaults to using it if available.
+
+    Returns:
+        np.ndarray: Simulated runoff [mm/day] with shape (n_sets, time), or (time,) for a single set.
+    """
+    single = np.ndim(params) == 1
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    pet = np.ascontiguousarray(pet, dtype=float)
+    layer_precip = np.ascontiguousarray(layer_precip, dtype=float)
+    layer_temp = np.ascontiguousarray(layer_temp, dtype=float)
+    layer_frac_solid = np.ascontiguousarray(layer_frac_solid, dtype=float)
+
+    # airGR uses the mean annual solid precipitation of the whole input series per layer
+    mean_annual_solid = (layer_frac_solid * layer_precip).mean(axis=0) * 365.25
+    uh1, uh2 = uh_ordinates(params[:, 3])
+
+    kernel = _simulate_numba if (HAS_NUMBA if use_numba is None else use_numba and HAS_NUMBA) else _simulate_numpy
+    q = kernel(params, pet, layer_precip, layer_temp, layer_frac_solid, mean_annual_solid, uh1, uh2)
+    return q[0] if single else q
+
+
+def evaluate_criteria(q_sim: np.ndarray, q_obs: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute KGE, KGEp, NSE, RMSE and MAE of many simulations against observations at once.
+
+    Time steps with missing observations are ignored.
+
+    Args:
+        q_sim (np.ndarray): Simulated runoff with shape (n_sets, time).
+        q_obs (np.ndarray): Observed runoff with shape (time,).
+
+    Returns:
+        Dict[str, np.ndarray]: Criterion values per parameter set, keyed by the names in CRITERIA.
+    """
+    valid = ~np.isnan(q_obs)
+    sim = np.atleast_2d(q_sim)[:, valid]
+    obs = q_obs[valid]
+
+    obs_mean, sim_mean = obs.mean(), sim.mean(axis=1)
+    obs_std, sim_std = obs.std(), sim.std(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = ((sim - sim_mean[:, np.newaxis]) * (obs - obs_mean)).mean(axis=1) / (sim_std * obs_std)
+        kge = 1 - np.sqrt((r - 1) ** 2 + (sim_std / obs_std - 1) ** 2 + (sim_mean / obs_mean - 1) ** 2)
+        # KGE' (Kling et al., 2012) uses the ratio of coefficients of variation
+        gamma = (sim_std / sim_mean) / (obs_std / obs_mean)
+        kgep = 1 - np.sqrt((r - 1) ** 2 + (gamma - 1) ** 2 + (sim_mean / obs_mean - 1) ** 2)
+    sse = ((sim - obs) ** 2).sum(axis=1)
+    nse = 1 - sse / ((obs - obs_mean) ** 2).sum()
+    rmse = np.sqrt(sse / len(obs))
+    mae = np.abs(sim - obs).mean(axis=1)
+    return {'KGE': kge, 'KGEp': kgep, 'NSE': nse, 'RMSE': rmse, 'MAE': mae}
+
+
+def monte_carlo_calibration(pet: np.ndarray, layer_precip: np.ndarray, layer_temp: np.ndarray, layer_frac_solid: np.ndarray,
+                            q_obs: np.ndarray, eval_slice: slice, metric: str = 'KGE', n_samples: int = 10000,
+                            batch_size: int = 2000, seed: Optional[int] = None, logger: Any = None) -> Tuple[np.ndarray, float]:
+    """
+    Calibrate CemaNeige-GR4J by uniform random sampling of the parameter space.
+
+    Args:
+        pet, layer_precip, layer_temp, layer_frac_solid (np.ndarray): Forcing, see simulate_cemaneige_gr4j.
+        q_obs (np.ndarray): Observed runoff [mm/day] over the same time steps as the forcing.
+        eval_slice (slice): Time steps on which the criterion is evaluated, earlier steps are warm-up.
+        metric (str): Calibration criterion, one of CRITERIA.
+        n_samples (int): Number of parameter sets to evaluate.
+        batch_size (int): Number of parameter sets simulated together.
+        seed (Optional[int]): Random seed.
+        logger (Any): Optional logger for progress messages.
+
+    Returns:
+        Tuple[np.ndarray, float]: Best parameter set and its criterion value.
+
+    Raises:
+        ValueError: If the metric is not one of CRITERIA
+    """
+    if metric not in CRITERIA:
+        raise ValueError(f"Unsupported calibration metric for the native GR engine: {metric}, options: {', '.join(CRITERIA)}")
+    rng = np.random.default_rng(seed)
+    sign = 1.0 if metric in MINIMISED_CRITERIA else -1.0
+    best_params, best_score = None, np.inf
+
+    for start in range(0, n_samples, batch_size):
+        n = min(batch_size, n_samples - start)
+        params = PARAM_BOUNDS[:, 0] + rng.random((n, len(PARAM_NAMES))) * (PARAM_BOUNDS[:, 1] - PARAM_BOUNDS[:, 0])
+        q_sim = simulate_cemaneige_gr4j(params, pet, layer_precip, layer_temp, layer_frac_solid)
+        scores = sign * evaluate_criteria(q_sim[:, eval_slice], q_obs[eval_slice])[metric]
+        scores = np.where(np.isnan(scores), np.inf, scores)
+        best = int(np.argmin(scores))
+        if scores[best] < best_score:
+            best_params, best_score = params[best], scores[best]
+        if logger is not None:
+            logger.info(f"Evaluated {start + n}/{n_samples} parameter sets, best {metric}: {sign * best_score:.4f}")
+
+    return best_params, float(sign * best_score)
+
+
+def airgr_reference(params: np.ndarray, dates: np.ndarray, precip: np.ndarray, pet: np.ndarray, temp: np.ndarray,
+                    hypso: np.ndarray, z_inputs: float) -> np.ndarray:
+    """
+    Simulate with airGR's RunModel_CemaNeigeGR4J (with hysteresis) for reference.
+
+    The whole series is run without a warm-up period from airGR's default initial states,
+    which are the initial states of the native kernel.
+
+    Args:
+        params (np.ndarray): Parameter set in PARAM_NAMES order.
+        dates, precip, pet, temp, hypso, z_inputs: Lumped forcing, see layer_inputs_from_airgr.
+
+    Returns:
+        np.ndarray: Simulated runoff [mm/day], shape (time,).
+    """
+    import rpy2.robjects as robjects # type: ignore
+
+    robjects.r('suppressMessages(library(airGR))')
+    run_model = robjects.r['RunModel_CemaNeigeGR4J']
+    inputs_model = robjects.r['CreateInputsModel'](
+        FUN_MOD=run_model,
+        DatesR=robjects.r['as.POSIXct'](robjects.StrVector(list(dates)), tz='UTC'),
+        Precip=robjects.FloatVector(precip),
+        PotEvap=robjects.FloatVector(pet),
+        TempMean=robjects.FloatVector(temp),
+        HypsoData=robjects.FloatVector(hypso),
+        ZInputs=float(z_inputs)
+    )
+    run_options = robjects.r['CreateRunOptions'](
+        FUN_MOD=run_model,
+        InputsModel=inputs_model,
+        IndPeriod_WarmUp=robjects.IntVector([0]),
+        IndPeriod_Run=robjects.IntVector(range(1, len(dates) + 1)),
+        IsHyst=True
+    )
+    outputs = run_model(InputsModel=inputs_model, RunOptions=run_options, Param=robjects.FloatVector(params))
+    return np.asarray(outputs.rx2('Qsim'), dtype=float)
+
+
+def compare_with_airgr(params: np.ndarray, dates: np.ndarray, precip: np.ndarray, pet: np.ndarray, temp: np.ndarray,
+                       hypso: np.ndarray, z_inputs: float) -> Dict[str, float]:
+    """
+    Compare the native kernel with airGR for one parameter set on the same forcing.
+
+    Both models get airGR's elevation layer forcing, so any difference comes from the kernel.
+
+    Args:
+        params (np.ndarray): Parameter set in PARAM_NAMES order.
+        dates, precip, pet, temp, hypso, z_inputs: Lumped forcing, see layer_inputs_from_airgr.
+            A short series (a few years) is enough.
+
+    Returns:
+        Dict[str, float]: 'max_abs_diff' [mm/day], 'max_rel_diff' relative to the mean airGR runoff,
+                          and 'within_tolerance' (1.0 or 0.0) against AIRGR_TOLERANCE.
+    """
+    q_airgr = airgr_reference(params, dates, precip, pet, temp, hypso, z_inputs)
+    layer_precip, layer_temp, layer_frac_solid = layer_inputs_from_airgr(dates, precip, pet, temp, hypso, z_inputs)
+    q_native = simulate_cemaneige_gr4j(params, pet, layer_precip, layer_temp, layer_frac_solid)
+    return _runoff_difference(q_native, q_airgr)
+
+
+def save_airgr_reference(path: Path, params: np.ndarray, dates: np.ndarray, precip: np.ndarray, pet: np.ndarray,
+                         temp: np.ndarray, hypso: np.ndarray, z_inputs: float) -> Path:
+    """
+    Store an airGR reference run, so the native kernel can later be checked without R.
+
+    The file holds the parameters, the elevation layer forcing from airGR, the airGR runoff and
+    the airGR version that produced it.
+
+    Args:
+        path (Path): .npz file to write.
+        params (np.ndarray): Parameter set in PARAM_NAMES order.
+        dates, precip, pet, temp, hypso, z_inputs: Lumped forcing, see layer_inputs_from_airgr.
+
+    Returns:
+        Path: The written file.
+    """
+    import rpy2.robjects as robjects # type: ignore
+
+    q_airgr = airgr_reference(params, dates, precip, pet, temp, hypso, z_inputs)
+    layer_precip, layer_temp, layer_frac_solid = layer_inputs_from_airgr(dates, precip, pet, temp, hypso, z_inputs)
+    version = str(robjects.r('as.character(packageVersion("airGR"))')[0])
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, params=np.asarray(params, dtype=float), pet=np.asarray(pet, dtype=float),
+                            layer_precip=layer_precip, layer_temp=layer_temp, layer_frac_solid=layer_frac_solid,
+                            q_airgr=q_airgr, airgr_version=np.array(version))
+    return path
+
+
+def compare_with_stored_airgr(path: Path) -> Dict[str, Any]:
+    """
+    Compare the native kernel with an airGR reference run written by save_airgr_reference.
+
+    Args:
+        path (Path): Stored reference run.
+
+    Returns:
+        Dict[str, Any]: As compare_with_airgr, plus 'airgr_version' of the reference run.
+    """
+    with np.load(path) as reference:
+        q_native = simulate_cemaneige_gr4j(reference['params'], reference['pet'], reference['layer_precip'],
+                                           reference['layer_temp'], reference['layer_frac_solid'])
+        diff: Dict[str, Any] = dict(_runoff_difference(q_native, reference['q_airgr']))
+        diff['airgr_version'] = str(reference['airgr_version'])
+    return diff
+
+
+def _runoff_difference(q_native: np.ndarray, q_airgr: np.ndarray) -> Dict[str, float]:
+    """Largest absolute and relative difference between native and airGR runoff."""
+    valid = ~np.isnan(q_airgr)
+    max_abs = float(np.max(np.abs(q_native[valid] - q_airgr[valid]))) if valid.any() else float('nan')
+    max_rel = max_abs / max(float(np.mean(q_airgr[valid])), np.finfo(float).tiny) if valid.any() else float('nan')
+    return {'max_abs_diff': max_abs, 'max_rel_diff': max_rel, 'within_tolerance': float(max_rel <= AIRGR_TOLERANCE)}
@@ -1,5 +1,7 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
 import sys
 import numpy as np # type: ignore
 import pandas as pd # type: ignore
@@ -8,12 +10,148 @@ import geopandas as gpd # type: ignore
 import rpy2.robjects as robjects # type: ignore
 from rpy2.robjects.packages import importr # type: ignore
 import rasterio # type: ignore
+import rasterio.mask # type: ignore
 from rpy2.robjects import pandas2ri # type: ignore
 from rpy2.robjects.conversion import localconverter # type: ignore
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from utils.evaluation_util.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE # type: ignore
 from utils.dataHandling_utils.variable_utils import VariableHandler # type: ignore
+from utils.dataHandling_utils.lumped_forcing_utils import LumpedForcingBuilder, oudin_pet # type: ignore
+from utils.dataHandling_utils.results_store_utils import ResultsStore # type: ignore
+from utils.models_utils.gr_native_utils import ( # type: ignore
+    simulate_cemaneige_gr4j,
+    monte_carlo_calibration,
+    layer_inputs_from_airgr,
+    extrapolate_layers,
+    compare_with_airgr,
+    compare_with_stored_airgr,
+    save_airgr_reference,
+    PARAM_NAMES,
+    CRITERIA,
+    AIRGR_TOLERANCE
+)
+
+# airGR calibration criteria (ErrorCrit_*) for the CONFLUENCE optimisation metrics, KGEp is airGR's KGE2 (Kling et al., 2012)
+AIRGR_CRITERIA = {'KGE': 'KGE', 'KGEp': 'KGE2', 'NSE': 'NSE', 'RMSE': 'RMSE'}
+
+
+def airgr_criterion(metric: str) -> str:
+    """
+    Get the airGR criterion name for an optimisation metric.
+
+    Args:
+        metric (str): OPTIMIZATION_METRIC setting
+
+    Returns:
+        str: Name to append to 'ErrorCrit_'
+
+    Raises:
+        ValueError: If airGR has no criterion for the metric
+    """
+    if metric not in AIRGR_CRITERIA:
+        raise ValueError(f"OPTIMIZATION_METRIC {metric} is not available as an airGR criterion for GR, options: {', '.join(AIRGR_CRITERIA)}")
+    return AIRGR_CRITERIA[metric]
+
+
+# R function run by the distributed GR workers, defined once per worker process
+_R_GR_HRU_FUNCTION = '''
+    suppressMessages(library(airGR))
+    run_gr_hru <- function(Dates, Precip, PotEvap, TempMean, Qobs, Hypso, Zmean, IndWarm, IndCal, IndRun, CritName) {
+        InputsModel <- CreateInputsModel(
+            FUN_MOD = RunModel_CemaNeigeGR4J,
+            DatesR = as.POSIXct(Dates, tz = "UTC"),
+            Precip = Precip,
+            PotEvap = PotEvap,
+            TempMean = TempMean,
+            HypsoData = Hypso,
+            ZInputs = Zmean
+        )
+        RunOptions <- CreateRunOptions(
+            FUN_MOD = RunModel_CemaNeigeGR4J,
+            InputsModel = InputsModel,
+            IndPeriod_WarmUp = IndWarm,
+            IndPeriod_Run = IndCal,
+            IsHyst = TRUE
+        )
+        InputsCrit <- CreateInputsCrit(
+            FUN_CRIT = get(paste0("ErrorCrit_", CritName)),
+            InputsModel = InputsModel,
+            RunOptions = RunOptions,
+            Obs = Qobs[IndCal]
+        )
+        CalibOptions <- CreateCalibOptions(
+            FUN_MOD = RunModel_CemaNeigeGR4J,
+            FUN_CALIB = Calibration_Michel,
+            IsHyst = TRUE
+        )
+        OutputsCalib <- Calibration_Michel(
+            InputsModel = InputsModel,
+            RunOptions = RunOptions,
+            InputsCrit = InputsCrit,
+            CalibOptions = CalibOptions,
+            FUN_MOD = RunModel_CemaNeigeGR4J,
+            verbose = FALSE
+        )
+        RunOptions <- CreateRunOptions(
+            FUN_MOD = RunModel_CemaNeigeGR4J,
+            InputsModel = InputsModel,
+            IndPeriod_Run = IndRun,
+            IsHyst = TRUE
+        )
+        OutputsModel <- RunModel_CemaNeigeGR4J(
+            InputsModel = InputsModel,
+            RunOptions = RunOptions,
+            Param = OutputsCalib$ParamFinalR
+        )
+        list(Qsim = OutputsModel$Qsim, Param = OutputsCalib$ParamFinalR, Crit = OutputsCalib$CritFinal)
+    }
+'''
+
+
+def _init_gr_worker():
+    """Load airGR and define the per-HRU run function once in each worker process."""
+    robjects.r(_R_GR_HRU_FUNCTION)
+
+
+def _run_gr_hru(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calibrate and run CemaNeige-GR4J for a single HRU in a worker process.
+
+    Args:
+        task (Dict[str, Any]): Forcing, observations, HRU geometry and period indices of the HRU.
+
+    Returns:
+        Dict[str, Any]: Simulated runoff over the run period, calibrated parameters and final criterion.
+    """
+    # Hypsometric curve and mean elevation of the HRU
+    with rasterio.open(task['dem_path']) as src:
+        out_image, _ = rasterio.mask.mask(src, [task['geometry']], crop=True)
+        elevation = out_image[0]
+        elevation = elevation[elevation != src.nodata]
+    hypso = np.percentile(elevation, np.arange(0, 101, 1))
+
+    result = robjects.globalenv['run_gr_hru'](
+        robjects.StrVector(task['dates']),
+        robjects.FloatVector(task['pr']),
+        robjects.FloatVector(task['pet']),
+        robjects.FloatVector(task['temp']),
+        robjects.FloatVector(task['q_obs']),
+        robjects.FloatVector(hypso),
+        float(np.mean(elevation)),
+        robjects.IntVector(task['ind_warm']),
+        robjects.IntVector(task['ind_cal']),
+        robjects.IntVector(task['ind_run']),
+        task['crit_name']
+    )
+
+    return {
+        'index': task['index'],
+        'qsim': np.asarray(result.rx2('Qsim'), dtype=float),
+        'params': np.asarray(result.rx2('Param'), dtype=float),
+        'crit': float(np.asarray(result.rx2('Crit'))[0])
+    }
+
 
 class GRPreProcessor:
     """
@@ -50,6 +188,8 @@ class GRPreProcessor:
         try:
             self.create_directories()
             self.prepare_forcing_data()
+            if self.config.get('GR_SPATIAL_MODE', 'lumped') != 'lumped':
+                self.prepare_distributed_forcing_data()
             #self.create_R_script()
             self.logger.info("GR preprocessing completed successfully")
         except Exception as e:
@@ -72,80 +212,24 @@ class GRPreProcessor:
         
         Args:
             temp_data (xr.DataArray): Temperature data in Kelvin
-            lat (float): Latitude of the catchment centroid
+            lat (float | xr.DataArray): Latitude of the catchment centroid, or of each HRU along the hru dimension
             
         Returns:
             xr.DataArray: Calculated PET in mm/day
         """
         self.logger.info("Calculating PET using Oudin's formula")
-        
-        # Convert temperature to Celsius
-        temp_C = temp_data - 273.15
-        
-        # Get dates for solar radiation calculation
-        dates = pd.DatetimeIndex(temp_data.time.values)
-        
-        # Calculate day of year
-        doy = dates.dayofyear
-        
-        # Calculate solar declination
-        solar_decl = 0.409 * np.sin(2 * np.pi / 365 * doy - 1.39)
-        
-        # Convert latitude to radians
-        lat_rad = np.deg2rad(lat)
-        
-        # Calculate sunset hour angle
-        sunset_angle = np.arccos(-np.tan(lat_rad) * np.tan(solar_decl))
-        
-        # Calculate extraterrestrial radiation (Ra)
-        dr = 1 + 0.033 * np.cos(2 * np.pi / 365 * doy)
-        Ra = (24 * 60 / np.pi) * 0.082 * dr * (
-            sunset_angle * np.sin(lat_rad) * np.sin(solar_decl) +
-            np.cos(lat_rad) * np.cos(solar_decl) * np.sin(sunset_angle)
-        )
-        
-        # Calculate PET using Oudin's formula
-        # PET = Ra * (T + 5) / 100 if T + 5 > 0, else 0
-        pet = xr.where(temp_C + 5 > 0,
-                      Ra * (temp_C + 5) / 100,
-                      0)
-        
-        # Convert to proper units (mm/day) and add metadata
-        pet = pet.assign_attrs({
-            'units': 'mm/day',
-            'long_name': 'Potential evapotranspiration',
-            'standard_name': 'water_potential_evaporation_flux'
-        })
-        
-        return pet
+        return oudin_pet(temp_data, lat)
 
     def prepare_forcing_data(self):
         try:
-            # Read and process forcing data
-            forcing_files = sorted(self.forcing_basin_path.glob('*.nc'))
-            if not forcing_files:
-                raise FileNotFoundError("No forcing files found in basin-averaged data directory")
-            
-            # Debug print the forcing files found
-            self.logger.info(f"Found forcing files: {[f.name for f in forcing_files]}")
-            
-            # Open and concatenate all forcing files
-            ds = xr.open_mfdataset(forcing_files)
-            variable_handler = VariableHandler(config=self.config, logger=self.logger, dataset=self.config['FORCING_DATASET'], model='GR')
-            # Average across HRUs if needed
-            ds = ds.mean(dim='hru')
-            self.logger.info(f'before variable handler {ds}')
-            ds_variable_handler = variable_handler.process_forcing_data(ds)
-            self.logger.info(f'after variable handler {ds_variable_handler}')
-            # Convert forcing data to daily resolution
-            ds = ds_variable_handler
-            ds = ds.resample(time='D').mean()
-            try:
-                ds['temp'] = ds['airtemp'] - 273.15
-                ds['pr'] = ds['pptrate'] * 86400
-            except:
-                pass
-                    
+            # Read catchment and get centroid
+            catchment = gpd.read_file(self.catchment_path / self.catchment_name)
+            mean_lon, mean_lat = self._get_catchment_centroid(catchment)
+
+            # Daily lumped forcing with PET, built lazily and shared with other lumped models
+            ds = LumpedForcingBuilder(self.config, self.logger).get_forcing(mean_lat, 'GR', catchment)
+            pet = ds['pet']
+
             # Load streamflow observations
             obs_path = self.project_dir / 'observations' / 'streamflow' / 'preprocessed' / f"{self.domain_name}_streamflow_processed.csv"
             
@@ -180,13 +264,6 @@ class GRPreProcessor:
                 coords={'time': obs_daily.index.values}
             )
 
-            # Read catchment and get centroid
-            catchment = gpd.read_file(self.catchment_path / self.catchment_name)
-            mean_lon, mean_lat = self._get_catchment_centroid(catchment)
-            
-            # Calculate PET using Oudin formula
-            pet = self.calculate_pet_oudin(ds['temp'], mean_lat)
-
             # Find overlapping time period
             start_time = max(ds.time.min().values, obs_ds.time.min().values)
             end_time = min(ds.time.max().values, obs_ds.time.max().values)
@@ -294,6 +371,60 @@ class GRPreProcessor:
             self.logger.error(f"Error preparing forcing data: {str(e)}")
             raise
     
+    def prepare_distributed_forcing_data(self) -> Path:
+        """
+        Prepare daily per-HRU forcing for semi-distributed GR runs.
+
+        Writes precipitation, temperature and Oudin PET for every HRU, together with the outlet
+        observations in mm/day, to a single netCDF file read by GRRunner.
+
+        Returns:
+            Path: Path to the distributed forcing file.
+        """
+        self.logger.info("Preparing distributed GR forcing data")
+
+        forcing_files = sorted(self.forcing_basin_path.glob('*.nc'))
+        if not forcing_files:
+            raise FileNotFoundError("No forcing files found in basin-averaged data directory")
+
+        ds = xr.open_mfdataset(forcing_files)
+        variable_handler = VariableHandler(config=self.config, logger=self.logger, dataset=self.config['FORCING_DATASET'], model='GR')
+        ds = variable_handler.process_forcing_data(ds)
+        ds = ds.resample(time='D').mean()
+        hru_ids = ds['hruId'].isel(time=0).values.astype(int) if 'time' in ds['hruId'].dims else ds['hruId'].values.astype(int)
+
+        # Latitude of every HRU from the catchment shapefile, in forcing order
+        catchment = gpd.read_file(self.catchment_path / self.catchment_name)
+        catchment = catchment.set_index(self.config.get('CATCHMENT_SHP_HRUID')).loc[hru_ids]
+        lat = xr.DataArray(catchment[self.config.get('CATCHMENT_SHP_LAT')].values.astype(float), dims='hru')
+
+        pet = self.calculate_pet_oudin(ds['temp'] + 273.15, lat)
+
+        # Outlet observations in mm/day, shared by all HRUs
+        obs_path = self.project_dir / 'observations' / 'streamflow' / 'preprocessed' / f"{self.domain_name}_streamflow_processed.csv"
+        obs_df = pd.read_csv(obs_path, parse_dates=['datetime']).set_index('datetime')
+        obs_df.index = obs_df.index.tz_localize(None)
+        area_km2 = catchment[self.config.get('CATCHMENT_SHP_AREA')].sum() / 1e6
+        q_obs = (obs_df['discharge_cms'].resample('D').mean() / area_km2 * 86.4).reindex(pd.DatetimeIndex(ds.time.values))
+
+        gr_forcing = xr.Dataset(
+            {
+                'pr': (('time', 'hru'), ds['pr'].transpose('time', 'hru').values, {'units': 'mm/day', 'long_name': 'Mean daily precipitation'}),
+                'temp': (('time', 'hru'), ds['temp'].transpose('time', 'hru').values, {'units': 'degC', 'long_name': 'Mean daily temperature'}),
+                'pet': (('time', 'hru'), pet.transpose('time', 'hru').values, {'units': 'mm/day', 'long_name': 'Mean daily pet'}),
+                'q_obs': (('time',), q_obs.values, {'units': 'mm/day', 'long_name': 'Mean observed daily discharge at the outlet'}),
+                'hruId': (('hru',), hru_ids),
+                'gruId': (('hru',), catchment[self.config.get('CATCHMENT_SHP_GRUID')].values.astype(int)),
+                'hru_area': (('hru',), catchment[self.config.get('CATCHMENT_SHP_AREA')].values.astype(float), {'units': 'm2'})
+            },
+            coords={'time': ds.time.values}
+        )
+
+        output_file = self.forcing_gr_path / f"{self.domain_name}_input_distributed.nc"
+        gr_forcing.to_netcdf(output_file)
+        self.logger.info(f"Distributed GR forcing for {len(hru_ids)} HRUs saved to {output_file}")
+        return output_file
+
     def _get_catchment_centroid(self, catchment_gdf):
         """
         Helper function to correctly calculate catchment centroid with proper CRS handling.
@@ -388,6 +519,8 @@ class GRRunner:
         
         # Model configuration
         self.spatial_mode = self.config.get('GR_SPATIAL_MODE', 'lumped')
+        self.engine = self.config.get('GR_ENGINE', 'airGR')
+        self.num_processors = int(self.config.get('MPI_PROCESSES', multiprocessing.cpu_count()))
 
     def run_gr(self) -> Optional[Path]:
         """
@@ -403,7 +536,9 @@ class GRRunner:
             self.output_path.mkdir(parents=True, exist_ok=True)
             
             # Execute GR model
-            if self.spatial_mode == 'lumped':
+            if self.spatial_mode == 'lumped' and self.engine == 'native':
+                self._execute_gr_native()
+            elif self.spatial_mode == 'lumped':
                 self._execute_gr_lumped()
             else:  # semi-distributed
                 self._execute_gr_distributed()
@@ -413,6 +548,128 @@ class GRRunner:
             raise
 
 
+    def _execute_gr_native(self) -> Path:
+        """
+        Calibrate and run lumped CemaNeige-GR4J with the native kernel instead of airGR.
+
+        The elevation layer forcing is taken from airGR's CreateInputsModel once if R is available,
+        so simulations match airGR, and is extrapolated natively otherwise. Calibration samples
+        GR_NATIVE_SAMPLES parameter sets, all simulated without crossing into R.
+
+        Returns:
+            Path: Path to the netCDF file with the simulated runoff.
+        """
+        self.logger.info("Executing lumped GR model with the native CemaNeige-GR4J kernel")
+        metric = self.config.get('OPTIMIZATION_METRIC', 'KGE')
+        if metric not in CRITERIA:
+            raise ValueError(f"OPTIMIZATION_METRIC {metric} is not supported by the native GR engine, options: {', '.join(CRITERIA)}")
+
+        forcing = pd.read_csv(self.forcing_gr_path / f"{self.domain_name}_input.csv", parse_dates=['time'])
+        forcing = forcing.replace(-9999.0, np.nan).set_index('time').sort_index()
+        dates = forcing.index
+
+        hypso, z_mean = self._get_hypsometry()
+        airgr_available = False
+        try:
+            layer_precip, layer_temp, layer_frac_solid = layer_inputs_from_airgr(
+                dates.strftime('%Y-%m-%d').values, forcing['pr'].values, forcing['pet'].values,
+                forcing['temp'].values, hypso, z_mean)
+            airgr_available = True
+        except Exception as e:
+            self.logger.warning(f"Could not get elevation layer forcing from airGR ({str(e)}), extrapolating natively")
+            layer_precip, layer_temp, layer_frac_solid = extrapolate_layers(
+                forcing['pr'].values, forcing['temp'].values, hypso, z_mean)
+
+        # Simulate continuously from the start of the warm-up period
+        warm_start, _ = [pd.to_datetime(d.strip()) for d in self.config['SPINUP_PERIOD'].split(',')]
+        cal_start, cal_end = [pd.to_datetime(d.strip()) for d in self.config['CALIBRATION_PERIOD'].split(',')]
+        run_start = pd.to_datetime(self.config['EXPERIMENT_TIME_START'])
+        run_end = pd.to_datetime(self.config['EXPERIMENT_TIME_END'])
+        first = dates.get_loc(warm_start)
+        period = slice(first, dates.get_loc(max(cal_end, run_end)) + 1)
+        eval_slice = slice(dates.get_loc(cal_start) - first, dates.get_loc(cal_end) - first + 1)
+
+        params, score = monte_carlo_calibration(
+            forcing['pet'].values[period], layer_precip[period], layer_temp[period], layer_frac_solid[period],
+            forcing['q_obs'].values[period], eval_slice,
+            metric=metric,
+            n_samples=int(self.config.get('GR_NATIVE_SAMPLES', 10000)),
+            seed=self.config.get('GR_NATIVE_SEED'),
+            logger=self.logger
+        )
+        self.logger.info(f"Best parameters: {dict(zip(PARAM_NAMES, np.round(params, 4)))}")
+        if airgr_available:
+            self._check_against_airgr(params, forcing.iloc[period], hypso, z_mean)
+
+        q_sim = simulate_cemaneige_gr4j(params, forcing['pet'].values[period], layer_precip[period],
+                                        layer_temp[period], layer_frac_solid[period])
+        q_sim = pd.Series(q_sim, index=dates[period]).loc[run_start:run_end]
+
+        results_ds = xr.Dataset(
+            {
+                'q_sim': (('time',), q_sim.values, {'units': 'mm/day', 'long_name': 'Simulated runoff'}),
+                'params': (('param',), params, {'long_name': 'Calibrated CemaNeige-GR4J parameters'})
+            },
+            coords={'time': q_sim.index, 'param': PARAM_NAMES},
+            attrs={'calib_metric': self.config.get('OPTIMIZATION_METRIC', 'KGE'), 'calib_value': score}
+        )
+        output_file = self.output_path / 'GR_results_native.nc'
+        results_ds.to_netcdf(output_file)
+        self.logger.info(f"Native GR results saved to {output_file}")
+        return output_file
+
+    def _check_against_airgr(self, params: np.ndarray, forcing: pd.DataFrame, hypso: np.ndarray, z_mean: float) -> None:
+        """
+        Check the native kernel against airGR, since AIRGR_TOLERANCE itself is not verified.
+
+        If GR_NATIVE_AIRGR_REFERENCE names an existing reference run, the kernel is compared with
+        it and R is not needed. Otherwise the first GR_NATIVE_CHECK_DAYS days are run with airGR and
+        the calibrated parameters, and the run is stored as GR_NATIVE_AIRGR_REFERENCE if that is set.
+        """
+        reference = self.config.get('GR_NATIVE_AIRGR_REFERENCE')
+        reference = Path(reference) if reference not in (None, 'None', 'none', '') else None
+        n_days = int(self.config.get('GR_NATIVE_CHECK_DAYS', 730))
+
+        try:
+            if reference is not None and reference.exists():
+                diff = compare_with_stored_airgr(reference)
+                source = f"stored airGR {diff['airgr_version']} run {reference}"
+            elif n_days > 0:
+                check = forcing.iloc[:n_days]
+                args = (params, check.index.strftime('%Y-%m-%d').values, check['pr'].values,
+                        check['pet'].values, check['temp'].values, hypso, z_mean)
+                diff = compare_with_airgr(*args)
+                source = f"airGR over {len(check)} days"
+                if reference is not None:
+                    save_airgr_reference(reference, *args)
+                    self.logger.info(f"airGR reference run saved to {reference}")
+            else:
+                return
+        except Exception as e:
+            self.logger.warning(f"Could not compare the native GR kernel with airGR: {str(e)}")
+            return
+        message = (f"Native GR kernel vs {source}: max abs difference {diff['max_abs_diff']:.3e} mm/day, "
+                   f"{diff['max_rel_diff']:.3e} of mean runoff (tolerance {AIRGR_TOLERANCE:.0e})")
+        if diff['within_tolerance']:
+            self.logger.info(message)
+        else:
+            self.logger.warning(message)
+
+    def _get_hypsometry(self):
+        """
+        Get the hypsometric curve (elevation percentiles 0 to 100) and mean elevation of the catchment.
+
+        Returns:
+            Tuple[np.ndarray, float]: Elevation percentiles and mean elevation [m].
+        """
+        dem_path = self.project_dir / 'attributes' / 'elevation' / 'dem' / f"domain_{self.domain_name}_elv.tif"
+        catchment = gpd.read_file(self.catchment_path / self.catchment_name)
+        with rasterio.open(dem_path) as src:
+            out_image, _ = rasterio.mask.mask(src, catchment.geometry, crop=True)
+            masked_dem = out_image[0]
+            masked_dem = masked_dem[masked_dem != src.nodata]
+        return np.percentile(masked_dem, np.arange(0, 101, 1)), float(np.mean(masked_dem))
+
     def _execute_gr_lumped(self):
         try:
             # Initialize R environment
@@ -504,7 +761,7 @@ class GRRunner:
                 
                 # Calibration criterion: preparation of the InputsCrit object
                 InputsCrit <- CreateInputsCrit(
-                    FUN_CRIT = ErrorCrit_{self.config['OPTIMIZATION_METRIC']},
+                    FUN_CRIT = ErrorCrit_{airgr_criterion(self.config['OPTIMIZATION_METRIC'])},
                     InputsModel = InputsModel,
                     RunOptions = RunOptions,
                     Obs = BasinObs$q_obs[Ind_Cal]
@@ -565,14 +822,135 @@ class GRRunner:
             print(f"An error occurred: {str(e)}")
             return None
 
-    def _execute_gr_distributed(self) -> bool:
-        """Execute GR model in semi-distributed mode."""
+    def _execute_gr_distributed(self) -> Optional[Path]:
+        """
+        Execute GR model in semi-distributed mode.
+
+        CemaNeige-GR4J is calibrated and run independently for every HRU, against the outlet
+        observations, across a pool of worker processes that each keep an R session with airGR
+        loaded. The results are assembled into a single netCDF file with per-HRU runoff and
+        area-weighted GRU runoff that can be routed with mizuRoute.
+
+        Returns:
+            Optional[Path]: Path to the distributed results file.
+        """
         self.logger.info("Executing GR model in semi-distributed mode")
-        
-        if self.use_mpi and self.num_processors > 1:
-            return self._execute_gr_parallel()
-        else:
-            return self._execute_gr_sequential()
+
+        crit_name = airgr_criterion(self.config['OPTIMIZATION_METRIC'])
+        forcing_file = self.forcing_gr_path / f"{self.domain_name}_input_distributed.nc"
+        with xr.open_dataset(forcing_file) as ds:
+            forcing = ds.load()
+
+        dates = pd.DatetimeIndex(forcing.time.values)
+        date_strings = [d.strftime('%Y-%m-%d') for d in dates]
+
+        def period_indices(start: str, end: str) -> List[int]:
+            # 1-based indices of a period, as expected by airGR
+            start_idx = date_strings.index(pd.to_datetime(start.strip()).strftime('%Y-%m-%d'))
+            end_idx = date_strings.index(pd.to_datetime(end.strip()).strftime('%Y-%m-%d'))
+            return list(range(start_idx + 1, end_idx + 2))
+
+        ind_warm = period_indices(*self.config['SPINUP_PERIOD'].split(','))
+        ind_cal = period_indices(*self.config['CALIBRATION_PERIOD'].split(','))
+        ind_run = period_indices(self.config['EXPERIMENT_TIME_START'], self.config['EXPERIMENT_TIME_END'])
+
+        # HRU geometries in the DEM projection for the hypsometric curves
+        dem_path = self.project_dir / 'attributes' / 'elevation' / 'dem' / f"domain_{self.domain_name}_elv.tif"
+        with rasterio.open(dem_path) as src:
+            dem_crs = src.crs
+        catchment = gpd.read_file(self.catchment_path / self.catchment_name).to_crs(dem_crs)
+        geometries = catchment.set_index(self.config.get('CATCHMENT_SHP_HRUID')).geometry
+
+        hru_ids = forcing['hruId'].values.astype(int)
+        tasks = [{
+            'index': i,
+            'dates': date_strings,
+            'pr': forcing['pr'].values[:, i],
+            'temp': forcing['temp'].values[:, i],
+            'pet': forcing['pet'].values[:, i],
+            'q_obs': forcing['q_obs'].values,
+            'geometry': geometries.loc[hru_id],
+            'dem_path': str(dem_path),
+            'ind_warm': ind_warm,
+            'ind_cal': ind_cal,
+            'ind_run': ind_run,
+            'crit_name': crit_name
+        } for i, hru_id in enumerate(hru_ids)]
+
+        n_workers = max(1, min(self.num_processors, len(tasks)))
+        self.logger.info(f"Running GR for {len(tasks)} HRUs on {n_workers} processes")
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_gr_worker) as executor:
+            future_to_hru = {executor.submit(_run_gr_hru, task): task['index'] for task in tasks}
+            for future in as_completed(future_to_hru):
+                index = future_to_hru[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    self.logger.error(f"GR run failed for HRU {hru_ids[index]}: {str(e)}")
+                if len(results) % max(1, len(tasks) // 10) == 0:
+                    self.logger.info(f"Completed {len(results)}/{len(tasks)} HRUs")
+
+        if not results:
+            raise RuntimeError("GR failed for all HRUs")
+
+        return self._write_distributed_results(forcing, results, dates[[i - 1 for i in ind_run]])
+
+    def _write_distributed_results(self, forcing: xr.Dataset, results: Dict[int, Dict[str, Any]], run_dates: pd.DatetimeIndex) -> Path:
+        """
+        Assemble per-HRU GR results into one netCDF file.
+
+        Args:
+            forcing (xr.Dataset): Distributed forcing with hruId, gruId and hru_area.
+            results (Dict[int, Dict[str, Any]]): Worker results keyed by HRU index.
+            run_dates (pd.DatetimeIndex): Dates of the run period.
+
+        Returns:
+            Path: Path to the written results file.
+        """
+        n_hru = forcing.sizes['hru']
+        n_params = len(next(iter(results.values()))['params'])
+        q_sim = np.full((len(run_dates), n_hru), np.nan)
+        params = np.full((n_hru, n_params), np.nan)
+        crit = np.full(n_hru, np.nan)
+        for index, result in results.items():
+            q_sim[:, index] = result['qsim']
+            params[index] = result['params']
+            crit[index] = result['crit']
+
+        # Area-weighted runoff per GRU, in m/s for routing
+        hru_area = forcing['hru_area'].values
+        gru_of_hru = forcing['gruId'].values.astype(int)
+        gru_ids, gru_index = np.unique(gru_of_hru, return_inverse=True)
+        weights = np.where(np.isnan(q_sim), 0.0, hru_area[np.newaxis, :])
+        gru_q = np.zeros((len(run_dates), len(gru_ids)))
+        gru_w = np.zeros((len(run_dates), len(gru_ids)))
+        np.add.at(gru_q.T, gru_index, (np.nan_to_num(q_sim) * weights).T)
+        np.add.at(gru_w.T, gru_index, weights.T)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            gru_q = gru_q / gru_w
+
+        param_names = ['X1', 'X2', 'X3', 'X4', 'CN1', 'CN2', 'CN3', 'CN4'][:n_params]
+        routing_var = self.config.get('SETTINGS_MIZU_ROUTING_VAR', 'averageRoutedRunoff')
+        results_ds = xr.Dataset(
+            {
+                'q_sim': (('time', 'hru'), q_sim, {'units': 'mm/day', 'long_name': 'Simulated runoff per HRU'}),
+                routing_var: (('time', 'gru'), gru_q / 1000 / 86400, {'units': 'm/s', 'long_name': 'Area-weighted simulated runoff per GRU'}),
+                'q_sim_basin': (('time',), np.nansum(q_sim * hru_area, axis=1) / hru_area[~np.isnan(q_sim).all(axis=0)].sum(),
+                                {'units': 'mm/day', 'long_name': 'Area-weighted simulated runoff of the domain'}),
+                'params': (('hru', 'param'), params, {'long_name': 'Calibrated CemaNeige-GR4J parameters'}),
+                'calib_crit': (('hru',), crit, {'long_name': f"Final {self.config['OPTIMIZATION_METRIC']} calibration criterion"}),
+                'hruId': (('hru',), forcing['hruId'].values),
+                'gruId': (('gru',), gru_ids)
+            },
+            coords={'time': run_dates, 'param': param_names}
+        )
+
+        output_file = self.output_path / 'GR_results_distributed.nc'
+        results_ds.to_netcdf(output_file)
+        self.logger.info(f"Distributed GR results for {len(results)} of {n_hru} HRUs saved to {output_file}")
+        return output_file
         
     def _get_default_path(self, path_key: str, default_subpath: str) -> Path:
         """Get path from config or use default based on project directory."""
@@ -605,6 +983,11 @@ class GRPostprocessor:
         try:
             self.logger.info("Extracting GR streamflow results")
             
+            if self.config.get('GR_SPATIAL_MODE', 'lumped') != 'lumped':
+                return self._extract_distributed_streamflow()
+            if self.config.get('GR_ENGINE', 'airGR') == 'native':
+                return self._extract_distributed_streamflow('GR_results_native.nc', 'q_sim')
+
             # Check for R data file
             r_results_path = self.project_dir / 'simulations' / self.config['EXPERIMENT_ID'] / 'GR' / 'GR_results.Rdata'
             if not r_results_path.exists():
@@ -649,18 +1032,31 @@ class GRPostprocessor:
             # Q(cms) = Q(mm/day) * Area(km2) / 86.4
             q_sim_cms = sim_df['flow'] * area_km2 / 86.4
             
-            # Read existing results file if it exists
-            output_file = self.results_dir / f"{self.config['EXPERIMENT_ID']}_results.csv"
-            if output_file.exists():
-                results_df = pd.read_csv(output_file, index_col=0, parse_dates=True)
-            else:
-                results_df = pd.DataFrame(index=q_sim_cms.index)
-            
-            # Add GR results
-            results_df['GR_discharge_cms'] = q_sim_cms
+            return self._append_results(q_sim_cms)
             
-            # Save updated results
-            results_df.to_csv(output_file)
+        except Exception as e:
+            self.logger.error(f"Error extracting GR streamflow: {str(e)}")
+            raise
+
+    def _extract_distributed_streamflow(self, results_file: str = 'GR_results_distributed.nc', variable: str = 'q_sim_basin') -> Path:
+        """Extract domain runoff in mm/day from a GR netCDF results file, without routing."""
+        results_path = self.project_dir / 'simulations' / self.config['EXPERIMENT_ID'] / 'GR' / results_file
+        with xr.open_dataset(results_path) as ds:
+            q_sim = ds[variable].to_series()
+
+        basin_name = self.config.get('RIVER_BASINS_NAME')
+        if basin_name == 'default':
+            basin_name = f"{self.domain_name}_riverBasins_delineate.shp"
+        basin_path = self._get_file_path('RIVER_BASINS_PATH', 'shapefiles/river_basins', basin_name)
+        area_km2 = gpd.read_file(basin_path)['GRU_area'].sum() / 1e6
+
+        return self._append_results(q_sim * area_km2 / 86.4)
+
+    def _append_results(self, q_sim_cms: pd.Series) -> Path:
+        """Append simulated GR streamflow in m3/s to the experiment results CSV."""
+        try:
+            # Add GR results to the experiment results store
+            output_file = ResultsStore(self.config, self.logger).append('GR', 'discharge_cms', q_sim_cms, attrs={'units': 'm3/s'})
             
             self.logger.info(f"GR results appended to: {output_file}")
             return output_file
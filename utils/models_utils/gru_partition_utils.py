@@ -0,0 +1,174 @@
+import csv
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np # type: ignore
+import netCDF4 as nc4 # type: ignore
+
+
+class GRUPartitioner:
+    """
+    Split the GRUs of a SUMMA domain into contiguous, cost-balanced blocks for array jobs.
+
+    SUMMA selects GRUs with '-g <start> <count>', so every array task has to run a contiguous
+    range of GRUs in attribute file order. The blocks are chosen to minimise the cost of the
+    most expensive block, using per-GRU costs from the timings of earlier runs where available
+    and HRU counts from the attributes file otherwise.
+
+    Attributes:
+        attributes_file (Path): Path to the SUMMA attributes file.
+        cost_file (Path): Path to the CSV file with per-GRU costs learned from earlier runs.
+        logger (logging.Logger): Logger for this class.
+    """
+
+    def __init__(self, attributes_file: Path, cost_file: Path, logger: Any):
+        self.attributes_file = Path(attributes_file)
+        self.cost_file = Path(cost_file)
+        self.logger = logger
+
+    def estimate_costs(self) -> np.ndarray:
+        """
+        Estimate the relative run cost of every GRU.
+
+        Returns:
+            np.ndarray: Cost per GRU in attribute file order. Measured costs (seconds) are used
+                        if the cost file covers all GRUs, otherwise the number of HRUs per GRU.
+        """
+        with nc4.Dataset(self.attributes_file, 'r') as att:
+            gru_ids = np.asarray(att['gruId'][:])
+            hru2gru = np.asarray(att['hru2gruId'][:])
+
+        sorter = np.argsort(gru_ids)
+        gru_index = sorter[np.searchsorted(gru_ids, hru2gru, sorter=sorter)]
+        hru_counts = np.bincount(gru_index, minlength=len(gru_ids)).astype(float)
+
+        measured = self.read_costs(len(gru_ids))
+        if measured is not None:
+            self.logger.info(f"Using measured run times of {len(gru_ids)} GRUs for partitioning")
+            return measured
+
+        self.logger.info(f"Using HRU counts of {len(gru_ids)} GRUs for partitioning")
+        return np.maximum(hru_counts, 1.0)
+
+    def read_costs(self, n_grus: int) -> Optional[np.ndarray]:
+        """
+        Read per-GRU costs measured in earlier runs.
+
+        Args:
+            n_grus (int): Number of GRUs in the domain.
+
+        Returns:
+            Optional[np.ndarray]: Cost per GRU, or None if no complete set of measurements exists.
+        """
+        if not self.cost_file.exists():
+            return None
+
+        costs = np.full(n_grus, np.nan)
+        with open(self.cost_file, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                index = int(row['gru_index'])
+                if 0 <= index < n_grus:
+                    costs[index] = float(row['cost'])
+
+        if np.isnan(costs).any() or (costs <= 0).all():
+            return None
+        return np.maximum(costs, costs[costs > 0].min())
+
+    def partition(self, costs: np.ndarray, n_tasks: int) -> List[Tuple[int, int]]:
+        """
+        Split GRUs into at most n_tasks contiguous blocks that minimise the largest block cost.
+
+        Uses a binary search on the block cost limit with a greedy feasibility check.
+
+        Args:
+            costs (np.ndarray): Cost per GRU in attribute file order.
+            n_tasks (int): Maximum number of blocks.
+
+        Returns:
+            List[Tuple[int, int]]: (start, count) of each block, with 1-based GRU starts as used by SUMMA.
+        """
+        costs = np.asarray(costs, dtype=float)
+        n_tasks = max(1, min(n_tasks, len(costs)))
+        cumulative = np.concatenate([[0.0], np.cumsum(costs)])
+
+        def split(limit: float) -> List[int]:
+            # Greedily extend each block as far as the limit allows, returning block start indices
+            starts = [0]
+            while True:
+                end = int(np.searchsorted(cumulative, cumulative[starts[-1]] + limit, side='right')) - 1
+                end = max(end, starts[-1] + 1)
+                if end >= len(costs):
+                    return starts
+                starts.append(end)
+
+        low, high = costs.max(), cumulative[-1]
+        for _ in range(100):
+            if high - low <= 1e-6 * high:
+                break
+            mid = 0.5 * (low + high)
+            if len(split(mid)) <= n_tasks:
+                high = mid
+            else:
+                low = mid
+
+        starts = split(high)
+        ends = starts[1:] + [len(costs)]
+        blocks = [(start + 1, end - start) for start, end in zip(starts, ends)]
+
+        block_costs = [cumulative[end] - cumulative[start] for start, end in zip(starts, ends)]
+        self.logger.info(f"Partitioned {len(costs)} GRUs into {len(blocks)} blocks, "
+                         f"largest block cost {max(block_costs):.1f}, mean {np.mean(block_costs):.1f}")
+        return blocks
+
+    def write_partitions(self, blocks: List[Tuple[int, int]], partition_file: Path) -> Path:
+        """
+        Write blocks to a file with one '<start> <count>' line per array task.
+
+        Args:
+            blocks (List[Tuple[int, int]]): (start, count) of each block.
+            partition_file (Path): Path of the file to write.
+
+        Returns:
+            Path: Path to the written file.
+        """
+        partition_file = Path(partition_file)
+        partition_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(partition_file, 'w') as f:
+            for start, count in blocks:
+                f.write(f"{start} {count}\n")
+        return partition_file
+
+    def update_costs(self, blocks: List[Tuple[int, int]], task_elapsed: Dict[int, float], costs: np.ndarray) -> None:
+        """
+        Update measured per-GRU costs from the wall times of the array tasks of a run.
+
+        The wall time of each task is distributed over its GRUs in proportion to their current cost
+        estimate. GRUs of tasks without a measured wall time keep their previous measurement.
+
+        Args:
+            blocks (List[Tuple[int, int]]): (start, count) of each array task, indexed by task id.
+            task_elapsed (Dict[int, float]): Wall time in seconds per array task id.
+            costs (np.ndarray): Cost estimates that were used to build the blocks.
+        """
+        if not task_elapsed:
+            return
+
+        measured = self.read_costs(len(costs))
+        updated = measured.copy() if measured is not None else np.full(len(costs), np.nan)
+
+        for task, elapsed in task_elapsed.items():
+            if task >= len(blocks):
+                continue
+            start, count = blocks[task]
+            block = slice(start - 1, start - 1 + count)
+            share = costs[block] / costs[block].sum()
+            updated[block] = elapsed * share
+
+        self.cost_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cost_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['gru_index', 'cost'])
+            for index, cost in enumerate(updated):
+                if not np.isnan(cost):
+                    writer.writerow([index, f"{cost:.3f}"])
+
+        self.logger.info(f"Updated measured GRU costs in {self.cost_file}")
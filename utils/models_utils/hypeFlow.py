@@ -15,92 +15,62 @@ from   itertools   import  product
 import datetime
 from alive_progress import alive_bar #progress bar
 import shutil
+import pyarrow.csv as pa_csv
+from utils.models_utils.network_topology_utils import downstream_index, topological_order, find_cycles
+
+# read selected columns of a HYPE time output file
+def read_hype_timeseries(path, columns=None):
+    """Read a HYPE time output file (e.g. timeCOUT.txt), optionally only some subbasin columns.
+
+    The file is parsed with pyarrow's multithreaded CSV reader. The comment line above the header is
+    skipped and only the DATE column and the requested subbasin columns are converted, so the memory
+    use depends on the number of requested columns rather than on the number of subbasins."""
+
+    read_options = pa_csv.ReadOptions(skip_rows=1)
+    parse_options = pa_csv.ParseOptions(delimiter='\t')
+    include = None if columns is None else ['DATE'] + [str(c) for c in columns]
+    convert_options = pa_csv.ConvertOptions(include_columns=include)
+
+    table = pa_csv.read_csv(path, read_options=read_options, parse_options=parse_options,
+                            convert_options=convert_options)
+    timeseries = table.to_pandas()
+    timeseries['DATE'] = pd.to_datetime(timeseries['DATE'])
+    return timeseries.set_index('DATE')
 
 # sort geodata from upstream to downstream
 def sort_geodata(geodata):
-    """Sort sub-basins from upstream to downstream using topological sorting.
-    Handles cycles by breaking them at the highest downstream point."""
-    
-    import networkx as nx
-    
-    # Create directed graph from subid -> maindown relationships
-    G = nx.DiGraph()
-    for _, row in geodata.iterrows():
-        if row['maindown'] > 0:  # Only add valid downstream connections
-            G.add_edge(row['subid'], row['maindown'])
-    
+    """Sort sub-basins from upstream to downstream.
+
+    Cycles are detected as strongly connected components of the subid -> maindown graph and broken
+    at the subbasin of each cycle with the most inflows, which is treated as an outlet for the ordering.
+    Subbasins are then ordered by their number of downstream subbasins, walking upstream from the outlets
+    level by level, and the order is checked in one vectorized pass."""
+
+    subids = geodata['subid'].values
+    ds_index = downstream_index(subids, geodata['maindown'].values)
+
     # Find and break cycles if they exist
-    cycles = list(nx.simple_cycles(G))
+    cycles = find_cycles(ds_index)
     if cycles:
         print(f"Warning: Found {len(cycles)} circular reference(s) in the network")
+        n_inflows = np.bincount(ds_index[ds_index >= 0], minlength=len(subids))
         for cycle in cycles:
-            # Find the node in the cycle with the most downstream connections
-            # and break the cycle there
-            max_downstream = max(cycle, 
-                key=lambda n: len(list(nx.descendants(G, n))))
-            # Find the edge pointing to this node within the cycle
-            cycle_idx = cycle.index(max_downstream)
-            from_node = cycle[cycle_idx-1]
-            # Remove this edge to break the cycle
-            G.remove_edge(from_node, max_downstream)
-            print(f"Breaking cycle at edge: {from_node} -> {max_downstream}")
-    
-    try:
-        # Find all nodes with no incoming edges (headwaters)
-        headwaters = [n for n in G.nodes() if G.in_degree(n) == 0]
-        
-        # For each headwater, find all downstream nodes and their distances
-        ordered_subids = []
-        visited = set()
-        
-        def traverse_downstream(node, depth=0):
-            """Recursively traverse downstream, tracking depth"""
-            if node in visited:
-                return
-            visited.add(node)
-            # Get all downstream nodes
-            downstream = list(G.successors(node))
-            if downstream:
-                # Recursively process downstream nodes
-                for next_node in downstream:
-                    traverse_downstream(next_node, depth + 1)
-            # Add node to ordered list with its depth
-            ordered_subids.append((node, depth))
-        
-        # Process each headwater
-        for hw in headwaters:
-            traverse_downstream(hw)
-        
-        # Sort by depth (upstream to downstream)
-        ordered_subids.sort(key=lambda x: x[1])
-        ordered_subids = [x[0] for x in ordered_subids]  # Extract just the subids
-        
-        # Handle nodes that weren't reached (isolated nodes)
-        missing_subids = geodata[~geodata['subid'].isin(ordered_subids)]['subid'].tolist()
-        
-        # Add missing subids at the start
-        final_order = missing_subids + ordered_subids
-        
-        # Create a mapping from subid to desired position
-        position_map = {subid: pos for pos, subid in enumerate(final_order)}
-        
-        # Sort geodata based on the position map
-        geodata['sort_idx'] = geodata['subid'].map(position_map)
-        geodata = geodata.sort_values('sort_idx', ignore_index=True)
-        geodata = geodata.drop(columns=['sort_idx'])
-        
-        # Verify the sorting
-        for i, row in geodata.iterrows():
-            if row['maindown'] > 0:
-                downstream_idx = geodata.index[geodata['subid'] == row['maindown']].tolist()
-                if downstream_idx and downstream_idx[0] < i:
-                    print(f"Warning: Basin {row['subid']} appears before its downstream basin {row['maindown']}")
-        
-        return geodata
-        
-    except Exception as e:
-        print(f"Error during sorting: {str(e)}")
-        return geodata  # Return unsorted data if we can't resolve the ordering
+            # Break the cycle at its most downstream point, the member with the most inflows
+            outlet = cycle[np.argmax(n_inflows[cycle])]
+            print(f"Breaking cycle at edge: {subids[outlet]} -> {subids[ds_index[outlet]]}")
+            ds_index[outlet] = -1
+
+    # Order by the number of downstream subbasins, so every subbasin comes before its downstream subbasin
+    down_ids = np.where(ds_index >= 0, subids[np.maximum(ds_index, 0)], 0)
+    geodata = geodata.iloc[topological_order(subids, down_ids)].reset_index(drop=True)
+
+    # Verify the sorting: the downstream subbasin of every subbasin has to come after it
+    sorted_ds = downstream_index(geodata['subid'].values, geodata['maindown'].values)
+    misordered = (sorted_ds >= 0) & (sorted_ds < np.arange(len(geodata)))
+    for subid, maindown in geodata.loc[misordered, ['subid', 'maindown']].itertuples(index=False):
+        print(f"Warning: Basin {subid} appears before its downstream basin {maindown}")
+
+    return geodata
 #---------------------------------------------------------------
 #---------------------------------------------------------------
 
@@ -10,13 +10,15 @@ import subprocess
 import sys
 import os
 import cdo # type: ignore
+import pyarrow as pa # type: ignore
 
 
 import matplotlib.pyplot as plt # type: ignore
 import seaborn as sns # type: ignore
 
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
-from utils.models_utils.hypeFlow import write_hype_forcing, write_hype_geo_files, write_hype_par_file, write_hype_info_filedir_files # type: ignore
+from utils.models_utils.hypeFlow import write_hype_forcing, write_hype_geo_files, write_hype_par_file, write_hype_info_filedir_files, read_hype_timeseries # type: ignore
+from utils.dataHandling_utils.results_store_utils import ResultsStore # type: ignore
 
 
 class HYPEPreProcessor:
@@ -279,55 +281,27 @@ class HYPEPostProcessor:
         try:
             self.logger.info("Processing HYPE streamflow results for outlet")
             
-            # Log input file path
             cout_path = self.sim_dir / "timeCOUT.txt"
-            self.logger.info(f"Reading HYPE output from: {cout_path}")
-            
-            # Read computed discharge
-            cout = pd.read_csv(cout_path, sep='\t', skiprows=lambda x: x == 0, parse_dates=['DATE'])
-            self.logger.info(f"Initial cout DataFrame shape: {cout.shape}")
-            self.logger.info(f"Cout columns: {cout.columns.tolist()}")
-            
-            # Set DATE as index
-            cout.set_index('DATE', inplace=True)
-            self.logger.info(f"Index type: {type(cout.index)}")
-            
-            # Get outlet ID and log it
             outlet_id = str(self.config['SIM_REACH_ID'])
-            self.logger.info(f"Processing outlet ID: {outlet_id}")
+            self.logger.info(f"Reading outlet {outlet_id} from HYPE output: {cout_path}")
             
-            # Create results DataFrame
-            if outlet_id not in cout.columns:
-                self.logger.error(f"Outlet ID {outlet_id} not found in columns: {cout.columns.tolist()}")
-                raise KeyError(f"Outlet ID {outlet_id} not found in HYPE output")
+            # Read computed discharge of the outlet only
+            try:
+                cout = read_hype_timeseries(cout_path, columns=[outlet_id])
+            except (KeyError, pa.ArrowInvalid) as e:
+                raise KeyError(f"Outlet ID {outlet_id} not found in HYPE output: {str(e)}")
                 
-            results = pd.DataFrame(cout[outlet_id])
-            results.columns = ['HYPE_discharge_cms']
-            self.logger.info(f"Results DataFrame shape: {results.shape}")
-            self.logger.info(f"Results columns: {results.columns.tolist()}")
+            results = pd.DataFrame({'HYPE_discharge_cms': cout[outlet_id]})
             
             # Save individual streamflow results
             output_file = self.results_dir / f"{self.config['EXPERIMENT_ID']}_streamflow.csv"
             self.logger.info(f"Saving individual results to: {output_file}")
             results.to_csv(output_file)
             
-            # Append to experiment results file
-            results_file = self.project_dir / "results" / f"{self.config['EXPERIMENT_ID']}_results.csv"
-            self.logger.info(f"Appending to combined results file: {results_file}")
-            
-            cms_data = results.copy()
-            
-            if results_file.exists():
-                self.logger.info("Reading existing results file")
-                existing_results = pd.read_csv(results_file, index_col=0, parse_dates=True)
-                self.logger.info(f"Existing results shape: {existing_results.shape}")
-                combined_results = pd.concat([existing_results, cms_data], axis=1)
-            else:
-                self.logger.info("No existing results file found, creating new")
-                combined_results = cms_data
-                
-            self.logger.info(f"Final combined results shape: {combined_results.shape}")
-            combined_results.to_csv(results_file)
+            # Add to the experiment results store
+            ResultsStore(self.config, self.logger).append('HYPE', 'discharge_cms', results['HYPE_discharge_cms'],
+                                                          attrs={'units': 'm3/s', 'subbasin': outlet_id})
+            return output_file
                         
         except Exception as e:
             self.logger.error(f"Error extracting streamflow: {str(e)}")
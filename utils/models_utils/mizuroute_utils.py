@@ -1,16 +1,17 @@
 import os
 import sys
-import pandas as pd # type: ignore
+import numpy as np # type: ignore
 import netCDF4 as nc4 # type: ignore
 import geopandas as gpd # type: ignore
 from pathlib import Path
 from shutil import copyfile
 from datetime import datetime
 from typing import Dict, Any
-import easymore as esmr # type: ignore
 import subprocess
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.geospatial_utils.attribute_table_utils import read_attributes # type: ignore
+from utils.models_utils.remap_utils import remap_arrays, nested_remap_pairs, overlay_remap_pairs # type: ignore
 
 class MizuRoutePreProcessor:
     def __init__(self, config: Dict[str, Any], logger: Any):
@@ -24,7 +25,7 @@ class MizuRoutePreProcessor:
         
         self.copy_base_settings()
         self.create_network_topology_file()
-        if self.config.get('SETTINGS_MIZUE_NEEDS_REMAP', '') == 'yes':
+        if self.config.get('SETTINGS_MIZU_NEEDS_REMAP', '') == 'yes':
             self.remap_summa_catchments_to_routing()
         self.create_control_file()
         
@@ -66,24 +67,31 @@ class MizuRoutePreProcessor:
 
         topology_name = self.config.get('SETTINGS_MIZU_TOPOLOGY')
         
-        # Load shapefiles
-        shp_river = gpd.read_file(river_network_path / river_network_name)
-        shp_basin = gpd.read_file(river_basin_path / river_basin_name)
+        # Load the attribute columns only, the topology does not need the geometries
+        seg_id_col = self.config.get('RIVER_NETWORK_SHP_SEGID')
+        down_seg_id_col = self.config.get('RIVER_NETWORK_SHP_DOWNSEGID')
+        length_col = self.config.get('RIVER_NETWORK_SHP_LENGTH')
+        shp_river = read_attributes(river_network_path / river_network_name,
+                                    [seg_id_col, down_seg_id_col, self.config.get('RIVER_NETWORK_SHP_SLOPE'), length_col],
+                                    self.logger).copy()
+        shp_basin = read_attributes(river_basin_path / river_basin_name,
+                                    [self.config.get('RIVER_BASIN_SHP_RM_GRUID'), self.config.get('RIVER_BASIN_SHP_HRU_TO_SEG'),
+                                     self.config.get('RIVER_BASIN_SHP_AREA')],
+                                    self.logger)
         
         num_seg = len(shp_river)
         num_hru = len(shp_basin)
         
         # Ensure minimum segment length
-        shp_river.loc[shp_river[self.config.get('RIVER_NETWORK_SHP_LENGTH')] == 0, self.config.get('RIVER_NETWORK_SHP_LENGTH')] = 1
+        shp_river.loc[shp_river[length_col] == 0, length_col] = 1
         
         # Enforce outlets if specified
         if self.config.get('SETTINGS_MIZU_MAKE_OUTLET') != 'n/a':
-            river_outlet_ids = [int(id) for id in self.config.get('SETTINGS_MIZU_MAKE_OUTLET').split(',')]
-            for outlet_id in river_outlet_ids:
-                if outlet_id in shp_river[self.config.get('RIVER_NETWORK_SHP_SEGID')].values:
-                    shp_river.loc[shp_river[self.config.get('RIVER_NETWORK_SHP_SEGID')] == outlet_id, self.config.get('RIVER_NETWORK_SHP_DOWNSEGID')] = 0
-                else:
-                    self.logger.warning(f"Outlet ID {outlet_id} not found in river network")
+            river_outlet_ids = np.array([int(id) for id in self.config.get('SETTINGS_MIZU_MAKE_OUTLET').split(',')])
+            seg_ids = shp_river[seg_id_col].values
+            for outlet_id in river_outlet_ids[~np.isin(river_outlet_ids, seg_ids)]:
+                self.logger.warning(f"Outlet ID {outlet_id} not found in river network")
+            shp_river.loc[np.isin(seg_ids, river_outlet_ids), down_seg_id_col] = 0
         
         # Create the netCDF file
         with nc4.Dataset(self.mizuroute_setup_dir / topology_name, 'w', format='NETCDF4') as ncid:
@@ -96,19 +104,21 @@ class MizuRoutePreProcessor:
     def remap_summa_catchments_to_routing(self):
         self.logger.info("Remapping SUMMA catchments to routing catchments")
 
-        hm_catchment_path = Path(self.config.get('CATCHMENT_PATH'))
+        hm_catchment_path = self.config.get('CATCHMENT_PATH')
         hm_catchment_name = self.config.get('CATCHMENT_SHP_NAME')
         if hm_catchment_name == 'default':
             hm_catchment_name = f"{self.config['DOMAIN_NAME']}_HRUs_{self.config['DOMAIN_DISCRETIZATION']}.shp"
 
-        rm_catchment_path = Path(self.config.get('RIVER_BASINS_PATH'))
+        rm_catchment_path = self.config.get('RIVER_BASINS_PATH')
         rm_catchment_name = self.config.get('RIVER_BASINS_NAME')
+        if rm_catchment_name == 'default':
+            rm_catchment_name = f"{self.config['DOMAIN_NAME']}_riverBasins_delineate.shp"
         
-        intersect_path = Path(self.config.get('INTERSECT_ROUTING_PATH'))
+        intersect_path = self.config.get('INTERSECT_ROUTING_PATH')
         intersect_name = self.config.get('INTERSECT_ROUTING_NAME')
         
         if intersect_path == 'default':
-            intersect_path = self.project_dir / 'shapefiles/catchment_intersection' 
+            intersect_path = self.project_dir / 'shapefiles/catchment_intersection/with_routing'
         else:
             intersect_path = Path(intersect_path)
 
@@ -120,27 +130,41 @@ class MizuRoutePreProcessor:
             hm_catchment_path = Path(hm_catchment_path)
             
         if rm_catchment_path == 'default':
-            rm_catchment_path = self.project_dir / 'shapefiles/catchment' 
+            rm_catchment_path = self.project_dir / 'shapefiles/river_basins'
         else:
             rm_catchment_path = Path(rm_catchment_path)
 
-        # Load shapefiles
-        hm_shape = gpd.read_file(hm_catchment_path / hm_catchment_name)
-        rm_shape = gpd.read_file(rm_catchment_path / rm_catchment_name)
-        
-        # Create intersection
-        esmr_caller = esmr()
-        hm_shape = hm_shape.to_crs('EPSG:6933')
-        rm_shape = rm_shape.to_crs('EPSG:6933')
-        intersected_shape = esmr.intersection_shp(esmr_caller, rm_shape, hm_shape)
-        intersected_shape = intersected_shape.to_crs('EPSG:4326')
-        intersected_shape.to_file(intersect_path / intersect_name)
+        hm_id_col = self.config.get('CATCHMENT_SHP_GRUID')
+        rm_id_col = self.config.get('RIVER_BASIN_SHP_RM_GRUID')
+
+        # Fast path: model HRUs that nest inside the routing basins only need their attributes
+        pairs = None
+        nested_field = self.config.get('SETTINGS_MIZU_REMAP_NESTED_FIELD', 'default')
+        if nested_field == 'default':
+            nested_field = hm_id_col
+        hm_attributes = read_attributes(hm_catchment_path / hm_catchment_name, logger=self.logger)
+        rm_attributes = read_attributes(rm_catchment_path / rm_catchment_name, logger=self.logger)
+        if nested_field in hm_attributes and self.config.get('CATCHMENT_SHP_AREA') in hm_attributes and self.config.get('RIVER_BASIN_SHP_AREA') in rm_attributes:
+            pairs = nested_remap_pairs(hm_attributes[hm_id_col].values, hm_attributes[nested_field].values,
+                                       hm_attributes[self.config.get('CATCHMENT_SHP_AREA')].values,
+                                       rm_attributes[rm_id_col].values, rm_attributes[self.config.get('RIVER_BASIN_SHP_AREA')].values)
+
+        if pairs is not None:
+            self.logger.info(f"Model catchments nest inside the routing basins by '{nested_field}', building the remap from attributes")
+        else:
+            self.logger.info("Model catchments do not nest inside the routing basins, intersecting the polygons")
+            hm_shape = gpd.read_file(hm_catchment_path / hm_catchment_name)
+            rm_shape = gpd.read_file(rm_catchment_path / rm_catchment_name)
+            rn_ids, hm_ids, areas, intersected_shape = overlay_remap_pairs(hm_shape, hm_id_col, rm_shape, rm_id_col)
+            intersect_path.mkdir(parents=True, exist_ok=True)
+            intersected_shape.to_file(intersect_path / intersect_name)
+            pairs = (rn_ids, hm_ids, areas)
         
         # Process variables for remapping file
-        self._process_remap_variables(intersected_shape)
+        self._process_remap_variables(*pairs)
         
         # Create remapping netCDF file
-        self._create_remap_file(intersected_shape, remap_name)
+        self._create_remap_file(remap_name)
         
         self.logger.info(f"Remapping file created at {self.mizuroute_setup_dir / remap_name}")
 
@@ -180,25 +204,16 @@ class MizuRoutePreProcessor:
         self._create_and_fill_nc_var(ncid, 'hruToSegId', 'int', 'hru', shp_basin[self.config.get('RIVER_BASIN_SHP_HRU_TO_SEG')].values.astype(int), 'ID of the stream segment to which the HRU discharges', '-')
         self._create_and_fill_nc_var(ncid, 'area', 'f8', 'hru', shp_basin[self.config.get('RIVER_BASIN_SHP_AREA')].values.astype(float), 'HRU area', 'm^2')
 
-    def _process_remap_variables(self, intersected_shape):
-        int_rm_id = f"S_1_{self.config.get('RIVER_BASIN_SHP_RM_HRUID')}"
-        int_hm_id = f"S_2_{self.config.get('CATCHMENT_SHP_GRUID')}"
-        int_weight = 'AP1N'
-        
-        intersected_shape = intersected_shape.sort_values(by=[int_rm_id, int_hm_id])
-        
-        self.nc_rnhruid = intersected_shape.groupby(int_rm_id).agg({int_rm_id: pd.unique}).values.astype(int)
-        self.nc_noverlaps = intersected_shape.groupby(int_rm_id).agg({int_hm_id: 'count'}).values.astype(int)
-        
-        multi_nested_list = intersected_shape.groupby(int_rm_id).agg({int_hm_id: list}).values.tolist()
-        self.nc_hmgruid = [item for sublist in multi_nested_list for item in sublist[0]]
-        
-        multi_nested_list = intersected_shape.groupby(int_rm_id).agg({int_weight: list}).values.tolist()
-        self.nc_weight = [item for sublist in multi_nested_list for item in sublist[0]]
+    def _process_remap_variables(self, rn_ids, hm_ids, weights):
+        remap = remap_arrays(rn_ids, hm_ids, weights)
+        self.nc_rnhruid = remap['RN_hruId']
+        self.nc_noverlaps = remap['nOverlaps']
+        self.nc_hmgruid = remap['HM_hruId']
+        self.nc_weight = remap['weight']
 
-    def _create_remap_file(self, intersected_shape, remap_name):
-        num_hru = len(intersected_shape[f"S_1_{self.config.get('RIVER_BASIN_SHP_RM_HRUID')}"].unique())
-        num_data = len(intersected_shape)
+    def _create_remap_file(self, remap_name):
+        num_hru = len(self.nc_rnhruid)
+        num_data = len(self.nc_hmgruid)
         
         with nc4.Dataset(self.mizuroute_setup_dir / remap_name, 'w', format='NETCDF4') as ncid:
             self._set_remap_attributes(ncid)
@@ -0,0 +1,146 @@
+import numpy as np # type: ignore
+
+
+def downstream_index(ids: np.ndarray, down_ids: np.ndarray) -> np.ndarray:
+    """
+    Get the position of the downstream segment of every segment.
+
+    Args:
+        ids (np.ndarray): Segment ids.
+        down_ids (np.ndarray): Downstream segment id of every segment. Ids that are not in ids
+                               (e.g. 0 or negative values) mark outlets.
+
+    Returns:
+        np.ndarray: Position of the downstream segment in ids, or -1 for outlets.
+
+    Raises:
+        ValueError: If the segment ids are not unique.
+    """
+    ids = np.asarray(ids)
+    down_ids = np.asarray(down_ids)
+    if len(np.unique(ids)) != len(ids):
+        raise ValueError("Segment ids are not unique")
+
+    sorter = np.argsort(ids)
+    position = np.searchsorted(ids, down_ids, sorter=sorter)
+    position = np.clip(position, 0, max(len(ids) - 1, 0))
+    ds_index = sorter[position] if len(ids) else np.zeros(0, dtype=int)
+    found = ids[ds_index] == down_ids if len(ids) else np.zeros(0, dtype=bool)
+    return np.where(found, ds_index, -1)
+
+
+def downstream_depth(ids: np.ndarray, down_ids: np.ndarray) -> np.ndarray:
+    """
+    Count the segments downstream of every segment, for any number of outlets.
+
+    Walks the network upstream from the outlets one level at a time (a breadth-first search on
+    the parent array), so the cost is linear in the number of segments.
+
+    Args:
+        ids (np.ndarray): Segment ids.
+        down_ids (np.ndarray): Downstream segment id of every segment, outlets point to ids not in ids.
+
+    Returns:
+        np.ndarray: Number of downstream segments between each segment and its outlet, or -1 for
+                    segments that are part of a cycle or drain into one.
+    """
+    ds_index = downstream_index(ids, down_ids)
+    n = len(ds_index)
+    depth = np.full(n, -1, dtype=np.int64)
+
+    # Upstream neighbours of every segment in compressed sparse row form
+    has_ds = ds_index >= 0
+    upstream = np.flatnonzero(has_ds)[np.argsort(ds_index[has_ds], kind='stable')]
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(ds_index[has_ds], minlength=n))])
+
+    frontier = np.flatnonzero(~has_ds)
+    level = 0
+    while frontier.size:
+        depth[frontier] = level
+        starts, ends = indptr[frontier], indptr[frontier + 1]
+        counts = ends - starts
+        if counts.sum() == 0:
+            break
+        # Gather the upstream neighbours of all frontier segments at once
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+        frontier = upstream[np.arange(counts.sum()) + offsets]
+        level += 1
+
+    return depth
+
+
+def topological_order(ids: np.ndarray, down_ids: np.ndarray, return_depth: bool = False):
+    """
+    Order segments from upstream to downstream.
+
+    Segments are sorted by decreasing number of downstream segments, so every segment comes
+    before the segment it drains into. Ties keep their input order.
+
+    Args:
+        ids (np.ndarray): Segment ids.
+        down_ids (np.ndarray): Downstream segment id of every segment, outlets point to ids not in ids.
+        return_depth (bool): Also return the downstream_depth of every segment.
+
+    Returns:
+        np.ndarray: Positions of the segments in upstream to downstream order, and the depth of
+                    every segment (in input order) if return_depth is set.
+
+    Raises:
+        ValueError: If the network contains cycles.
+    """
+    depth = downstream_depth(ids, down_ids)
+    check_acyclic(ids, depth)
+    order = np.argsort(-depth, kind='stable')
+    return (order, depth) if return_depth else order
+
+
+def check_acyclic(ids: np.ndarray, depth: np.ndarray) -> None:
+    """
+    Raise an error listing the segments that could not be reached from an outlet.
+
+    Args:
+        ids (np.ndarray): Segment ids.
+        depth (np.ndarray): Result of downstream_depth.
+
+    Raises:
+        ValueError: If any segment is part of a cycle or drains into one.
+    """
+    unreached = np.asarray(ids)[depth < 0]
+    if unreached.size:
+        raise ValueError(f"River network contains cycles: {unreached.size} segments do not drain to an outlet, "
+                         f"e.g. {unreached[:10].tolist()}")
+
+
+def find_cycles(ds_index: np.ndarray) -> list:
+    """
+    Find the cycles of a river network.
+
+    Every segment has at most one downstream segment, so the strongly connected components with
+    more than one segment (or a segment draining into itself) are simple cycles. They are found
+    iteratively by following downstream pointers, visiting every segment once.
+
+    Args:
+        ds_index (np.ndarray): Position of the downstream segment of every segment, -1 for outlets.
+
+    Returns:
+        list: One array of segment positions per cycle, in downstream order.
+    """
+    downstream = np.asarray(ds_index).tolist()
+    state = [0] * len(downstream)  # 0: unvisited, 1: on the current path, 2: finished
+    cycles = []
+
+    for start in range(len(downstream)):
+        if state[start]:
+            continue
+        path = []
+        node = start
+        while node >= 0 and state[node] == 0:
+            state[node] = 1
+            path.append(node)
+            node = downstream[node]
+        if node >= 0 and state[node] == 1:
+            cycles.append(np.array(path[path.index(node):]))
+        for visited in path:
+            state[visited] = 2
+
+    return cycles
@@ -0,0 +1,118 @@
+from typing import Dict, Optional, Tuple
+import numpy as np # type: ignore
+import geopandas as gpd # type: ignore
+
+EQUAL_AREA_CRS = 'EPSG:6933'
+
+
+def remap_arrays(rn_ids: np.ndarray, hm_ids: np.ndarray, weights: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Build the mizuRoute remap arrays from (routing HRU, model HRU, weight) pairs.
+
+    The pairs are sorted by routing HRU and model HRU with one lexsort, duplicate pairs are
+    merged, and the number of overlaps per routing HRU is counted with np.bincount, so the
+    ragged HM_hruId and weight arrays come out in the compressed (CSR-like) layout mizuRoute
+    expects. Weights are normalised to sum to one per routing HRU.
+
+    Args:
+        rn_ids (np.ndarray): Routing HRU id of every pair
+        hm_ids (np.ndarray): Model HRU (SUMMA GRU) id of every pair
+        weights (np.ndarray): Area, or areal weight, of every pair
+
+    Returns:
+        Dict[str, np.ndarray]: 'RN_hruId' and 'nOverlaps' per routing HRU, 'HM_hruId' and 'weight' per overlap
+    """
+    rn_ids = np.asarray(rn_ids).astype(np.int64)
+    hm_ids = np.asarray(hm_ids).astype(np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+
+    order = np.lexsort((hm_ids, rn_ids))
+    rn_ids, hm_ids, weights = rn_ids[order], hm_ids[order], weights[order]
+
+    # Merge duplicate (routing HRU, model HRU) pairs, e.g. several HRUs of one GRU
+    starts = np.flatnonzero(np.concatenate([[True], (rn_ids[1:] != rn_ids[:-1]) | (hm_ids[1:] != hm_ids[:-1])])) if len(rn_ids) else np.zeros(0, dtype=int)
+    rn_ids, hm_ids = rn_ids[starts], hm_ids[starts]
+    weights = np.add.reduceat(weights, starts) if len(starts) else weights
+
+    rn_unique, rn_index = np.unique(rn_ids, return_inverse=True)
+    n_overlaps = np.bincount(rn_index, minlength=len(rn_unique))
+    totals = np.bincount(rn_index, weights=weights, minlength=len(rn_unique))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weights = np.where(totals[rn_index] > 0, weights / totals[rn_index], 0.0)
+
+    return {'RN_hruId': rn_unique, 'nOverlaps': n_overlaps, 'HM_hruId': hm_ids, 'weight': weights}
+
+
+def nested_remap_pairs(hm_ids: np.ndarray, hm_parent_ids: np.ndarray, hm_areas: np.ndarray,
+                       rn_ids: np.ndarray, rn_areas: np.ndarray,
+                       tolerance: float = 0.01) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Build remap pairs from attributes alone, for model HRUs that nest inside routing HRUs.
+
+    The nesting is accepted if every model HRU names an existing routing HRU as its parent, every
+    routing HRU has at least one model HRU, and the model HRU areas of every routing HRU add up to
+    its area within the relative tolerance.
+
+    Args:
+        hm_ids (np.ndarray): Model HRU (SUMMA GRU) id of every model polygon
+        hm_parent_ids (np.ndarray): Routing HRU id of every model polygon
+        hm_areas (np.ndarray): Area of every model polygon
+        rn_ids (np.ndarray): Routing HRU ids
+        rn_areas (np.ndarray): Routing HRU areas, in the unit of hm_areas
+        tolerance (float): Relative tolerance of the area check
+
+    Returns:
+        Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]: Routing HRU id, model HRU id and area of
+            every pair, or None if the model HRUs do not nest inside the routing HRUs
+    """
+    rn_ids = np.asarray(rn_ids).astype(np.int64)
+    hm_parent_ids = np.asarray(hm_parent_ids).astype(np.int64)
+    hm_areas = np.asarray(hm_areas, dtype=np.float64)
+    if len(rn_ids) == 0 or len(hm_parent_ids) == 0:
+        return None
+
+    sorter = np.argsort(rn_ids)
+    position = np.clip(np.searchsorted(rn_ids, hm_parent_ids, sorter=sorter), 0, len(rn_ids) - 1)
+    parent_index = sorter[position]
+    if not np.all(rn_ids[parent_index] == hm_parent_ids):
+        return None
+
+    nested_areas = np.bincount(parent_index, weights=hm_areas, minlength=len(rn_ids))
+    rn_areas = np.asarray(rn_areas, dtype=np.float64)
+    if np.any(nested_areas <= 0) or np.any(np.abs(nested_areas - rn_areas) > tolerance * rn_areas):
+        return None
+
+    return hm_parent_ids, np.asarray(hm_ids), hm_areas
+
+
+def overlay_remap_pairs(hm_shape: gpd.GeoDataFrame, hm_id_col: str,
+                        rm_shape: gpd.GeoDataFrame, rm_id_col: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, gpd.GeoDataFrame]:
+    """
+    Build remap pairs by intersecting model and routing HRU polygons.
+
+    Candidate pairs come from one bulk STRtree query, and the intersections and their areas are
+    computed for all candidates at once in an equal-area projection.
+
+    Args:
+        hm_shape (gpd.GeoDataFrame): Model HRU polygons
+        hm_id_col (str): Column with the model HRU (SUMMA GRU) id
+        rm_shape (gpd.GeoDataFrame): Routing HRU polygons
+        rm_id_col (str): Column with the routing HRU id
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, gpd.GeoDataFrame]: Routing HRU id, model HRU id and
+            intersection area of every pair, and the intersection polygons in EPSG:4326
+    """
+    hm_shape = hm_shape.to_crs(EQUAL_AREA_CRS)
+    rm_shape = rm_shape.to_crs(EQUAL_AREA_CRS)
+
+    hm_index, rm_index = rm_shape.sindex.query(hm_shape.geometry, predicate='intersects')
+    pieces = hm_shape.geometry.values[hm_index].intersection(rm_shape.geometry.values[rm_index])
+    areas = pieces.area
+    keep = areas > 0
+
+    rn_ids = rm_shape[rm_id_col].values[rm_index][keep]
+    hm_ids = hm_shape[hm_id_col].values[hm_index][keep]
+    intersection = gpd.GeoDataFrame({f"S_1_{rm_id_col}": rn_ids, f"S_2_{hm_id_col}": hm_ids, 'AREA': areas[keep]},
+                                    geometry=pieces[keep], crs=EQUAL_AREA_CRS).to_crs('EPSG:4326')
+    return rn_ids, hm_ids, areas[keep], intersection
@@ -0,0 +1,367 @@
+import os
+import re
+import subprocess
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+# SLURM job states after which a task will not change state anymore
+TERMINAL_STATES = {'COMPLETED', 'FAILED', 'CANCELLED', 'TIMEOUT', 'OUT_OF_MEMORY', 'NODE_FAIL',
+                   'PREEMPTED', 'BOOT_FAIL', 'DEADLINE'}
+
+
+def sentinel_command(sentinel_dir: Path) -> str:
+    """
+    Get a bash snippet that writes the exit code of an array task to a sentinel file.
+
+    The snippet installs an EXIT trap, so it has to be placed near the top of the job script.
+    The sentinel is named <array job id>_<array task id>.exit and contains the exit code and
+    the elapsed wall time of the task in seconds.
+
+    Args:
+        sentinel_dir (Path): Directory in which the sentinel files are written.
+
+    Returns:
+        str: Bash snippet to include in the job script.
+    """
+    return (f'mkdir -p {sentinel_dir}\n'
+            f'trap \'rc=$?; echo "$rc $SECONDS" > "{sentinel_dir}/${{SLURM_ARRAY_JOB_ID}}_${{SLURM_ARRAY_TASK_ID}}.exit"\' EXIT\n')
+
+
+# Extra time on top of the job time limit before a wait gives up on tasks that did not report back
+TIME_LIMIT_GRACE = 600.0
+
+
+def sbatch_directive(script_path: Path, long_name: str, short_name: Optional[str] = None) -> Optional[str]:
+    """
+    Read the value of an #SBATCH directive from a job script.
+
+    Args:
+        script_path (Path): Path to the job script.
+        long_name (str): Long option name without dashes, e.g. 'time'.
+        short_name (Optional[str]): Short option letter, e.g. 't'.
+
+    Returns:
+        Optional[str]: Value of the directive, or None if the script does not set it.
+    """
+    names = f"--{long_name}[= ]" + (f"|-{short_name}\\s*" if short_name else '')
+    pattern = re.compile(rf"^#SBATCH\s+(?:{names})(\S+)")
+    for line in Path(script_path).read_text().splitlines():
+        match = pattern.match(line.strip())
+        if match:
+            return match.group(1)
+    return None
+
+
+def parse_time_limit(value: Optional[str]) -> Optional[float]:
+    """
+    Convert a SLURM time limit (M, M:S, H:M:S, D-H, D-H:M or D-H:M:S) to seconds.
+
+    Args:
+        value (Optional[str]): Time limit as given to sbatch --time.
+
+    Returns:
+        Optional[float]: Time limit in seconds, None if not set, unlimited or not parseable.
+    """
+    if not value or value.upper() in ('UNLIMITED', 'INFINITE', 'NONE'):
+        return None
+    try:
+        days, _, clock = value.rpartition('-')
+        parts = [int(part) for part in clock.split(':')]
+        if days:
+            hours, minutes, seconds = (parts + [0, 0])[:3]
+        elif len(parts) == 3:
+            hours, minutes, seconds = parts
+        else:
+            hours, (minutes, seconds) = 0, (parts + [0])[:2]
+        return float((int(days or 0) * 24 + hours) * 3600 + minutes * 60 + seconds)
+    except ValueError:
+        return None
+
+
+class SlurmScheduler:
+    """
+    Submit array jobs with sbatch and query their task states in one sacct call per poll.
+    """
+
+    def submit(self, script_path: Path, array_indices: List[int]) -> str:
+        """
+        Submit a job script as an array job.
+
+        Args:
+            script_path (Path): Path to the job script.
+            array_indices (List[int]): Array task ids to run.
+
+        Returns:
+            str: The SLURM job id.
+        """
+        array_spec = ','.join(str(i) for i in array_indices)
+        result = subprocess.run(['sbatch', '--parsable', f'--array={array_spec}', str(script_path)],
+                                check=True, capture_output=True, text=True)
+        return result.stdout.strip().split(';')[0]
+
+    def query(self, job_id: str) -> Dict[int, Tuple[str, Optional[int]]]:
+        """
+        Query the state and exit code of all tasks of an array job.
+
+        Args:
+            job_id (str): The SLURM job id.
+
+        Returns:
+            Dict[int, Tuple[str, Optional[int]]]: State and exit code per array task id. Tasks that
+                                                  are still pending as a range are not included.
+        """
+        result = subprocess.run(['sacct', '-j', job_id, '-X', '--noheader', '--parsable2',
+                                 '--format=JobID,State,ExitCode'], capture_output=True, text=True)
+        states = {}
+        for line in result.stdout.splitlines():
+            parts = line.strip().split('|')
+            if len(parts) < 3 or '_' not in parts[0]:
+                continue
+            task = parts[0].split('_', 1)[1]
+            state = parts[1].split()[0] if parts[1] else 'UNKNOWN'
+            exit_code = int(parts[2].split(':')[0]) if parts[2].split(':')[0].isdigit() else None
+            if task.isdigit():
+                states[int(task)] = (state, exit_code)
+            elif task.startswith('['):
+                # Pending tasks reported as a range, e.g. [5-10,12%4]
+                for task_id in self._expand_range(task):
+                    states.setdefault(task_id, (state, exit_code))
+        return states
+
+    @staticmethod
+    def _expand_range(spec: str) -> List[int]:
+        tasks = []
+        for part in spec.strip('[]').split('%')[0].split(','):
+            bounds = part.split('-')
+            if all(bound.isdigit() for bound in bounds) and len(bounds) in (1, 2):
+                tasks.extend(range(int(bounds[0]), int(bounds[-1]) + 1))
+        return tasks
+
+
+class LocalScheduler:
+    """
+    Run array job scripts as local processes, mimicking the SLURM array environment.
+
+    This allows the parallel SUMMA workflow to run on machines without SLURM and makes
+    the job monitoring testable without a cluster. Task output goes to the files named by the
+    script's #SBATCH --output/--error directives, as it would under SLURM.
+
+    Attributes:
+        max_parallel (int): Maximum number of array tasks running at the same time.
+        jobs (Dict[str, Dict[str, Any]]): Queued and running tasks per job id.
+    """
+
+    def __init__(self, max_parallel: Optional[int] = None):
+        self.max_parallel = max_parallel or os.cpu_count() or 1
+        self.jobs = {}
+
+    def submit(self, script_path: Path, array_indices: List[int]) -> str:
+        """
+        Queue the array tasks of a job script and start as many as allowed.
+
+        Job ids are random, so they never repeat across schedulers or processes and sentinel
+        files left by earlier jobs in the same directory cannot be mistaken for this job's.
+        """
+        job_id = f"local-{uuid.uuid4().hex}"
+        self.jobs[job_id] = {'script': Path(script_path), 'queued': list(array_indices), 'processes': {}}
+        self._launch(job_id)
+        return job_id
+
+    def _launch(self, job_id: str) -> None:
+        """Start queued tasks of a job up to the parallel limit."""
+        job = self.jobs[job_id]
+        running = sum(1 for p in job['processes'].values() if p.poll() is None)
+        while job['queued'] and running < self.max_parallel:
+            task = job['queued'].pop(0)
+            env = dict(os.environ, SLURM_JOB_ID=job_id, SLURM_ARRAY_JOB_ID=job_id,
+                       SLURM_ARRAY_TASK_ID=str(task), SLURM_CPUS_PER_TASK='1')
+            stdout, stderr = self._output_files(job['script'], job_id, task)
+            with open(stdout, 'a') as out, open(stderr, 'a') as err:
+                job['processes'][task] = subprocess.Popen(['bash', str(job['script'])], env=env, stdout=out, stderr=err)
+            running += 1
+
+    @staticmethod
+    def _output_files(script_path: Path, job_id: str, task: int) -> Tuple[Path, Path]:
+        """Get the stdout and stderr files of a task from the #SBATCH --output/--error patterns."""
+        def expand(pattern: str) -> Path:
+            path = Path(pattern.replace('%A', job_id).replace('%a', str(task)).replace('%j', f"{job_id}_{task}"))
+            path = path if path.is_absolute() else Path.cwd() / path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            return path
+
+        output = sbatch_directive(script_path, 'output', 'o') or 'slurm-%A_%a.out'
+        error = sbatch_directive(script_path, 'error', 'e')
+        return expand(output), expand(error or output)
+
+    def query(self, job_id: str) -> Dict[int, Tuple[str, Optional[int]]]:
+        """Get the state and exit code of all tasks of a job, starting queued tasks as slots free up."""
+        self._launch(job_id)
+        job = self.jobs[job_id]
+        states = {task: ('PENDING', None) for task in job['queued']}
+        for task, process in job['processes'].items():
+            exit_code = process.poll()
+            if exit_code is None:
+                states[task] = ('RUNNING', None)
+            else:
+                states[task] = ('COMPLETED' if exit_code == 0 else 'FAILED', exit_code)
+        return states
+
+
+class SlurmJobMonitor:
+    """
+    Wait for array jobs to finish and collect the exit code of every task.
+
+    Completion is detected from per-task sentinel files written by the job script (see
+    sentinel_command). Tasks without a sentinel, e.g. because they were killed by the
+    scheduler, are resolved with batched scheduler queries. Polling starts at a short
+    interval and backs off exponentially, so short array tasks are picked up quickly
+    without many ranks hammering the scheduler.
+
+    Attributes:
+        logger (logging.Logger): Logger for this class.
+        scheduler (SlurmScheduler | LocalScheduler): Scheduler used to submit and query jobs.
+        sentinel_dir (Optional[Path]): Directory with the sentinel files of the job script.
+        initial_interval (float): First polling interval in seconds.
+        max_interval (float): Upper limit on the polling interval in seconds.
+        backoff (float): Factor by which the polling interval grows when nothing changes.
+        elapsed (Dict[str, Dict[int, float]]): Wall time in seconds per job id and array task id,
+                                               for tasks that reported it through their sentinel.
+        time_limits (Dict[str, float]): Time limit in seconds per job id, from the job script.
+    """
+
+    def __init__(self, logger: Any, scheduler: Any = None, sentinel_dir: Optional[Path] = None,
+                 initial_interval: float = 2.0, max_interval: float = 60.0, backoff: float = 2.0):
+        self.logger = logger
+        self.scheduler = scheduler or SlurmScheduler()
+        self.sentinel_dir = Path(sentinel_dir) if sentinel_dir is not None else None
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.elapsed = {}
+        self.time_limits = {}
+
+    def submit(self, script_path: Path, array_indices: List[int]) -> str:
+        """
+        Submit an array job through the configured scheduler and remember its time limit.
+
+        Sentinels with the new job id that predate the submission (e.g. from a recycled SLURM
+        job id) are removed, so they are not taken as results of this job.
+        """
+        submitted = time.time()
+        job_id = self.scheduler.submit(script_path, array_indices)
+        self._clear_stale_sentinels(job_id, submitted)
+        time_limit = parse_time_limit(sbatch_directive(script_path, 'time', 't'))
+        if time_limit is not None:
+            self.time_limits[job_id] = time_limit
+        self.logger.info(f"Submitted array job {job_id} with {len(array_indices)} tasks")
+        return job_id
+
+    def _clear_stale_sentinels(self, job_id: str, submitted: float) -> None:
+        """Remove sentinel files of a job id that were written before the job was submitted."""
+        if self.sentinel_dir is None or not self.sentinel_dir.exists():
+            return
+        for sentinel in self.sentinel_dir.glob(f"{job_id}_*.exit"):
+            try:
+                if sentinel.stat().st_mtime < submitted:
+                    sentinel.unlink()
+                    self.logger.debug(f"Removed stale sentinel {sentinel}")
+            except FileNotFoundError:
+                pass
+
+    def _read_sentinels(self, job_id: str, tasks: List[int]) -> Dict[int, Tuple[str, Optional[int]]]:
+        states = {}
+        if self.sentinel_dir is None:
+            return states
+        for task in tasks:
+            sentinel = self.sentinel_dir / f"{job_id}_{task}.exit"
+            if not sentinel.exists():
+                continue
+            content = sentinel.read_text().split()
+            if not content:
+                continue  # sentinel is still being written
+            exit_code = int(content[0]) if content[0].lstrip('-').isdigit() else None
+            if len(content) > 1 and content[1].isdigit():
+                self.elapsed.setdefault(job_id, {})[task] = float(content[1])
+            states[task] = ('COMPLETED' if exit_code == 0 else 'FAILED', exit_code)
+        return states
+
+    def wait(self, job_id: str, array_indices: List[int], timeout: Optional[float] = None) -> Dict[int, Tuple[str, Optional[int]]]:
+        """
+        Wait until all tasks of an array job have finished.
+
+        Args:
+            job_id (str): Job id returned by the scheduler.
+            array_indices (List[int]): Array task ids to wait for.
+            timeout (Optional[float]): Maximum time to wait in seconds. By default, the wait only gives
+                                       up when outstanding tasks have neither a sentinel nor a state in
+                                       the scheduler for longer than the job time limit plus
+                                       TIME_LIMIT_GRACE, e.g. when sacct is unavailable and a task was
+                                       killed before writing its sentinel. Without a known time limit
+                                       the wait is indefinite.
+
+        Returns:
+            Dict[int, Tuple[str, Optional[int]]]: Final state and exit code per array task id.
+
+        Raises:
+            TimeoutError: If the tasks have not finished within the timeout.
+        """
+        self.logger.info(f"Waiting for array job {job_id} to complete")
+        start = time.time()
+        unseen_timeout = self.time_limits[job_id] + TIME_LIMIT_GRACE if job_id in self.time_limits else None
+        last_seen = start
+        outstanding = list(array_indices)
+        finished = {}
+        interval = self.initial_interval
+
+        while outstanding:
+            done = self._read_sentinels(job_id, outstanding)
+            remaining = [task for task in outstanding if task not in done]
+            if remaining:
+                states = self.scheduler.query(job_id)
+                done.update({task: states[task] for task in remaining
+                             if task in states and states[task][0] in TERMINAL_STATES})
+                if any(task in states for task in remaining):
+                    last_seen = time.time()
+
+            if done:
+                finished.update(done)
+                outstanding = [task for task in outstanding if task not in done]
+                self.logger.info(f"Array job {job_id}: {len(finished)} of {len(array_indices)} tasks finished")
+                interval = self.initial_interval
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
+
+            if not outstanding:
+                break
+            if timeout is not None and time.time() - start > timeout:
+                raise TimeoutError(f"Array job {job_id} did not finish within {timeout} s, outstanding tasks: {outstanding}")
+            if done:
+                last_seen = time.time()
+            if timeout is None and unseen_timeout is not None and time.time() - last_seen > unseen_timeout:
+                raise TimeoutError(f"Array job {job_id}: tasks {outstanding} have not reported back and are unknown to the "
+                                   f"scheduler for more than the time limit ({unseen_timeout:.0f} s)")
+            time.sleep(interval)
+
+        return finished
+
+    def report(self, job_id: str, finished: Dict[int, Tuple[str, Optional[int]]]) -> List[int]:
+        """
+        Log the outcome of an array job.
+
+        Args:
+            job_id (str): Job id of the array job.
+            finished (Dict[int, Tuple[str, Optional[int]]]): Final state and exit code per task.
+
+        Returns:
+            List[int]: Array task ids that did not complete successfully.
+        """
+        failed = [task for task, (state, exit_code) in sorted(finished.items())
+                  if state != 'COMPLETED' or exit_code not in (0, None)]
+        for task in failed:
+            state, exit_code = finished[task]
+            self.logger.error(f"Array job {job_id} task {task} failed: state {state}, exit code {exit_code}")
+        if not failed:
+            self.logger.info(f"Array job {job_id} completed, all {len(finished)} tasks succeeded")
+        return failed
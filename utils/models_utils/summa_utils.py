@@ -13,6 +13,10 @@ import time
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from utils.configHandling_utils.logging_utils import get_function_logger # type: ignore
+from utils.models_utils.slurm_utils import SlurmJobMonitor, SlurmScheduler, LocalScheduler, sentinel_command # type: ignore
+from utils.models_utils.gru_partition_utils import GRUPartitioner # type: ignore
+from utils.dataHandling_utils.forcing_cache_utils import ForcingCache # type: ignore
+from utils.dataHandling_utils.results_store_utils import ResultsStore # type: ignore
 from utils.models_utils.summaflow import ( # type: ignore
     write_summa_forcing,
     write_summa_attribute,
@@ -318,8 +322,16 @@ class SummaPreProcessor_spatial:
                 self.process_carra()
                 self.logger.info("CARRA data processed successfully")
 
-            self.apply_datastep_and_lapse_rate()
-            self.logger.info("Datasetp and Lapse rate correction applied successfully")
+            # SUMMA input forcing also depends on the lapse rate and time step settings
+            forcing_cache = ForcingCache(self.config, self.logger)
+            cache_dirs = {'SUMMA_input': self.forcing_summa_path}
+            cache_settings = {key: self.config.get(key) for key in ('APPLY_LAPSE_RATE', 'LAPSE_RATE', 'FORCING_TIME_STEP_SIZE')}
+            if forcing_cache.restore('SUMMA_input', cache_dirs, cache_settings):
+                self.logger.info("Using cached SUMMA input forcing")
+            else:
+                self.apply_datastep_and_lapse_rate()
+                self.logger.info("Datasetp and Lapse rate correction applied successfully")
+                forcing_cache.save('SUMMA_input', cache_dirs, cache_settings)
 
             self.logger.info("Forcing data processing completed successfully")
         except Exception as e:
@@ -2047,20 +2059,8 @@ class SUMMAPostprocessor:
             # Convert from hourly to daily average
             q_sim_daily = q_sim['IRFroutedRunoff'].resample('D').mean()
             
-            # Read existing results file if it exists
-            output_file = self.results_dir / f"{self.config['EXPERIMENT_ID']}_results.csv"
-            if output_file.exists():
-                results_df = pd.read_csv(output_file, index_col=0, parse_dates=True)
-            else:
-                results_df = pd.DataFrame(index=q_sim_daily.index)
-            
-            # Add SUMMA results
-            results_df['SUMMA_discharge_cms'] = q_sim_daily
-            
-            # Save updated results
-            results_df.to_csv(output_file)
-            
-            return output_file
+            # Add SUMMA results to the experiment results store
+            return ResultsStore(self.config, self.logger).append('SUMMA', 'discharge_cms', q_sim_daily, attrs={'units': 'm3/s'})
             
         except Exception as e:
             self.logger.error(f"Error extracting SUMMA streamflow: {str(e)}")
@@ -2144,9 +2144,17 @@ class SummaRunner:
                 grus_per_job = 1
                 self.logger.info("Setting default of 1 GRU per job")
 
-        # Calculate number of array jobs needed
+        # Build cost-balanced contiguous GRU blocks, one per array task
         n_array_jobs = -(-total_grus // grus_per_job)  # Ceiling division
-        
+        partitioner = GRUPartitioner(
+            attributes_file=settings_path / self.config.get('SETTINGS_SUMMA_ATTRIBUTES'),
+            cost_file=settings_path / 'gru_costs.csv',
+            logger=self.logger
+        )
+        gru_costs = partitioner.estimate_costs()
+        gru_blocks = partitioner.partition(gru_costs, n_array_jobs)
+        partition_file = partitioner.write_partitions(gru_blocks, summa_log_path / 'gru_partitions.txt')
+
         # Create SLURM script
         slurm_script = self._create_slurm_script(
             summa_path=summa_path,
@@ -2155,9 +2163,9 @@ class SummaRunner:
             filemanager=filemanager,
             summa_log_path=summa_log_path,
             summa_out_path=summa_out_path,
-            total_grus=total_grus,
-            grus_per_job=grus_per_job,
-            n_array_jobs=n_array_jobs - 1  # SLURM arrays are 0-based
+            partition_file=partition_file,
+            n_array_jobs=len(gru_blocks) - 1,  # SLURM arrays are 0-based
+            sentinel_dir=summa_log_path / 'task_status'
         )
         
         # Write SLURM script
@@ -2169,10 +2177,9 @@ class SummaRunner:
         # Submit job
         
         try:
-            
-            cmd = f"sbatch {script_path}"
-            result = subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
-            job_id = result.stdout.strip().split()[-1]
+            monitor = self._get_job_monitor(summa_log_path / 'task_status')
+            array_indices = list(range(len(gru_blocks)))
+            job_id = monitor.submit(script_path, array_indices)
             self.logger.info(f"Submitted SLURM array job with ID: {job_id}")
             
             # Backup settings if required
@@ -2180,12 +2187,16 @@ class SummaRunner:
                 backup_path = summa_out_path / "run_settings"
                 self._backup_settings(settings_path, backup_path)
                 
-            # Wait for SLURM job to complete
-            while True:
-                result = subprocess.run(f"squeue -j {job_id}", shell=True, capture_output=True, text=True)
-                if result.stdout.count('\n') <= 1:  # Only header line remains
-                    break
-                time.sleep(60)  # Check every minute
+            # Wait for all array tasks to complete and report failed tasks
+            finished = monitor.wait(job_id, array_indices)
+            failed_tasks = monitor.report(job_id, finished)
+            if failed_tasks:
+                self.logger.warning(f"{len(failed_tasks)} of {len(array_indices)} SUMMA array tasks failed: {failed_tasks}")
+
+            # Learn per-GRU costs from the wall times of successful tasks for the next partitioning
+            task_elapsed = {task: elapsed for task, elapsed in monitor.elapsed.get(job_id, {}).items()
+                            if task not in failed_tasks}
+            partitioner.update_costs(gru_blocks, task_elapsed, gru_costs)
             
             self.logger.info("SUMMA parallel run completed, starting output merge")
             
@@ -2195,9 +2206,25 @@ class SummaRunner:
             self.logger.error(f"Error in parallel SUMMA workflow: {str(e)}")
             raise
 
+    def _get_job_monitor(self, sentinel_dir: Path) -> SlurmJobMonitor:
+        """
+        Create a job monitor for parallel SUMMA array jobs.
+
+        Args:
+            sentinel_dir (Path): Directory in which array tasks write their exit codes.
+
+        Returns:
+            SlurmJobMonitor: Monitor using SLURM, or local processes if SETTINGS_SUMMA_SCHEDULER is 'local'.
+        """
+        if self.config.get('SETTINGS_SUMMA_SCHEDULER', 'slurm') == 'local':
+            scheduler = LocalScheduler()
+        else:
+            scheduler = SlurmScheduler()
+        return SlurmJobMonitor(self.logger, scheduler=scheduler, sentinel_dir=sentinel_dir)
+
     def _create_slurm_script(self, summa_path: Path, summa_exe: str, settings_path: Path, 
                             filemanager: str, summa_log_path: Path, summa_out_path: Path,
-                            total_grus: int, grus_per_job: int, n_array_jobs: int) -> str:
+                            partition_file: Path, n_array_jobs: int, sentinel_dir: Path) -> str:
         
         script = f"""#!/bin/bash
 #SBATCH --cpus-per-task={self.config.get('SETTINGS_SUMMA_CPUS_PER_TASK')}
@@ -2211,36 +2238,25 @@ class SummaRunner:
 #SBATCH --error={summa_log_path}/summa_%A_%a.err
 #SBATCH --array=0-{n_array_jobs}
 
+# Record the exit code of this task for the job monitor
+{sentinel_command(sentinel_dir)}
 # Create required directories
 mkdir -p {summa_out_path}
 mkdir -p {summa_log_path}
 
-# Calculate GRU range for this job
-gru_start=$(( ({grus_per_job} * $SLURM_ARRAY_TASK_ID) + 1 ))
-gru_end=$(( gru_start + {grus_per_job} - 1 ))
+# Read the GRU block of this task, one "<start> <count>" line per array task
+read gru_start gru_count <<< "$(sed -n "$((SLURM_ARRAY_TASK_ID + 1))p" {partition_file})"
 
-# Ensure we don't exceed total GRUs
-if [ $gru_end -gt {total_grus} ]; then
-    gru_end={total_grus}
-fi
+echo "Processing $gru_count GRUs starting at GRU $gru_start"
 
-echo "Processing GRUs $gru_start to $gru_end"
+# Run SUMMA
+{summa_path}/{summa_exe} -g $gru_start $gru_count -m {settings_path}/{filemanager}
 
-# Process each GRU in the range
-for gru in $(seq $gru_start $gru_end); do
-    echo "Starting GRU $gru"
-    
-    # Run SUMMA
-    {summa_path}/{summa_exe} -g $gru 1 -m {settings_path}/{filemanager}
-    
-    exit_code=$?
-    if [ $exit_code -ne 0 ]; then
-        echo "SUMMA failed for GRU $gru with exit code $exit_code"
-        exit 1
-    fi
-    
-    echo "Completed GRU $gru"
-done
+exit_code=$?
+if [ $exit_code -ne 0 ]; then
+    echo "SUMMA failed for GRUs $gru_start to $((gru_start + gru_count - 1)) with exit code $exit_code"
+    exit 1
+fi
 
 echo "Completed all GRUs for this job"
 """
@@ -13,26 +13,17 @@ import pandas as pd
 import numpy as np
 import geopandas   as      gpd
 from alive_progress import alive_bar #progress bar
+from utils.models_utils.network_topology_utils import topological_order
 
 ############################
 # sort geofabric from upstream to downstream
 def sort_geofabric(geofabric, basinID, nextDownID):
-    # find the subbasin order
-    geofabric['n_ds_subbasins'] = 0
-    for index, row in geofabric.iterrows():
-        n_ds_subbasins = 0
-        nextID = row[nextDownID]
-        nextID_index = np.where(geofabric[basinID]==nextID)[0]
-
-        while (len(nextID_index>0) or nextID > 0) :
-            n_ds_subbasins += 1
-            nextID = geofabric[nextDownID][nextID_index[0]]
-            nextID_index = np.where(geofabric[basinID]==nextID)[0]
-            
-        geofabric.loc[index, 'n_ds_subbasins']= n_ds_subbasins
-
-    # Sort the DataFrame by 'n_ds_subbasins' in descending order
-    geofabric = geofabric.sort_values(by='n_ds_subbasins', ascending=False, ignore_index=True)
+    # count the subbasins downstream of every subbasin, walking upstream from all outlets at once
+    order, depth = topological_order(geofabric[basinID].values, geofabric[nextDownID].values, return_depth=True)
+    geofabric['n_ds_subbasins'] = depth
+
+    # Sort by 'n_ds_subbasins' in descending order
+    geofabric = geofabric.iloc[order].reset_index(drop=True)
     return geofabric
 
 ############################
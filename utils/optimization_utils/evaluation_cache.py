@@ -0,0 +1,131 @@
+# evaluation_cache.py
+import json
+from pathlib import Path
+from typing import List, Tuple, Dict, Any, Optional
+import numpy as np # type: ignore
+
+
+class EvaluationCache:
+    """
+    A persistent cache mapping quantised parameter vectors to model evaluation results.
+
+    Parameter vectors are normalised by their calibration bounds and rounded to a fixed
+    number of decimals before being used as keys, so vectors that only differ by floating
+    point noise (e.g. after bound clipping) share a single model run. Successful results
+    are appended to a JSON lines file so that restarted calibrations reuse earlier runs.
+    The first line of the file is a signature of the calibration setup (parameter names,
+    bounds, periods, metrics and model); a file with a different signature is discarded.
+
+    Attributes:
+        cache_file (Path): Path to the JSON lines file backing the cache.
+        signature (Dict[str, Any]): Calibration setup the cached results are valid for.
+        bounds (np.ndarray): Array of (lower, upper) bounds for each parameter.
+        decimals (int): Number of decimals kept when quantising normalised parameters.
+        logger (logging.Logger): Logger for this class.
+        hits (int): Number of cache hits since initialisation.
+        entries (Dict[Tuple[int, ...], Dict[str, Any]]): Cached results keyed by quantised parameters.
+    """
+
+    def __init__(self, cache_file: Path, bounds: List[Tuple[float, float]], decimals: int, logger: Any,
+                 signature: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the EvaluationCache and load any previously stored entries.
+
+        Args:
+            cache_file (Path): Path to the JSON lines file backing the cache.
+            bounds (List[Tuple[float, float]]): List of (lower, upper) bounds for each parameter.
+            decimals (int): Number of decimals kept when quantising normalised parameters.
+            logger (logging.Logger): Logger for this class.
+            signature (Optional[Dict[str, Any]]): Calibration setup the cached results are valid for.
+        """
+        self.cache_file = Path(cache_file)
+        self.signature = json.loads(json.dumps(signature or {}, default=str))
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.decimals = decimals
+        self.logger = logger
+        self.hits = 0
+        self.entries: Dict[Tuple[int, ...], Dict[str, Any]] = {}
+        self._scale = 10 ** decimals
+        self._span = np.where(self.bounds[:, 1] > self.bounds[:, 0], self.bounds[:, 1] - self.bounds[:, 0], 1.0)
+        self.load()
+
+    def key(self, params: np.ndarray) -> Tuple[int, ...]:
+        """
+        Quantise a parameter vector into a hashable cache key.
+
+        Args:
+            params (np.ndarray): Parameter vector in model units.
+
+        Returns:
+            Tuple[int, ...]: Normalised parameters rounded to the configured number of decimals.
+        """
+        normalised = (np.asarray(params, dtype=float) - self.bounds[:, 0]) / self._span
+        return tuple(np.rint(normalised * self._scale).astype(np.int64).tolist())
+
+    def load(self) -> None:
+        """Load cached entries from disk, discarding the file if it was written for a different setup."""
+        if not self.cache_file.exists():
+            return
+
+        with open(self.cache_file, 'r') as f:
+            try:
+                header = json.loads(f.readline())
+            except json.JSONDecodeError:
+                header = {}
+            if header.get('signature') != self.signature:
+                self.logger.warning(f"Evaluation cache {self.cache_file} was written for a different calibration setup, discarding it")
+                self.entries = {}
+                self.cache_file.unlink()
+                return
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if len(entry.get('params', [])) != len(self.bounds):
+                    continue
+                self.entries[self.key(entry['params'])] = entry
+
+        self.logger.info(f"Loaded {len(self.entries)} cached evaluations from {self.cache_file}")
+
+    def get(self, params: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Look up a previously evaluated parameter vector.
+
+        Args:
+            params (np.ndarray): Parameter vector in model units.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached result, or None if the vector has not been evaluated.
+        """
+        entry = self.entries.get(self.key(params))
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def add(self, params: List[float], result: Dict[str, Any]) -> None:
+        """
+        Store a successful evaluation in memory and append it to the cache file.
+
+        Failed runs are not cached, since failures are often caused by transient system issues.
+
+        Args:
+            params (List[float]): Parameter vector in model units.
+            result (Dict[str, Any]): Result dictionary returned by the worker.
+        """
+        if not result or not result.get('calib_metrics'):
+            return
+
+        entry = {
+            'params': [float(p) for p in params],
+            'calib_metrics': {k: float(v) for k, v in result['calib_metrics'].items()},
+            'eval_metrics': {k: float(v) for k, v in (result.get('eval_metrics') or {}).items()},
+        }
+        self.entries[self.key(params)] = entry
+
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        if not self.cache_file.exists():
+            with open(self.cache_file, 'w') as f:
+                f.write(json.dumps({'signature': self.signature}) + '\n')
+        with open(self.cache_file, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
@@ -15,14 +15,19 @@ import geopandas as gpd # type: ignore
 import rasterio # type: ignore
 from rasterstats import zonal_stats # type: ignore
 from datetime import datetime
+import time
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from utils.evaluation_util.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE, get_KGEnp # type: ignore
 from utils.configHandling_utils.logging_utils import setup_logger # type: ignore
 from utils.optimization_utils.optimization_config import Config # type: ignore
+from utils.optimization_utils.trial_params_utils import TrialParamWriter # type: ignore
+from utils.dataHandling_utils.observation_store_utils import load_observations # type: ignore
 
+# Return code reported when a model executable is killed after exceeding its timeout (as GNU timeout)
+TIMEOUT_RETURN_CODE = 124
 
-def run_summa(summa_path, summa_exe, filemanager_path, log_path, log_name, local_rank):
+def run_summa(summa_path, summa_exe, filemanager_path, log_path, log_name, local_rank, timeout=None):
     """
     Run SUMMA model.
 
@@ -33,9 +38,10 @@ def run_summa(summa_path, summa_exe, filemanager_path, log_path, log_name, local
     log_path (Path): Path to store log files
     log_name (str): Name of the log file
     local_rank (int): Rank of the current process
+    timeout (float): Wall time limit in seconds after which SUMMA is killed, None for no limit
 
     Returns:
-    int: Return code of the SUMMA process
+    int: Return code of the SUMMA process, TIMEOUT_RETURN_CODE if it was killed after the timeout
     """
     # Ensure log directory exists
     log_path.mkdir(parents=True, exist_ok=True)
@@ -45,11 +51,14 @@ def run_summa(summa_path, summa_exe, filemanager_path, log_path, log_name, local
 
     # Run SUMMA
     with open(log_path / log_name, 'w') as log_file:
-        summa_result = subprocess.run(summa_command, check=False, stdout=log_file, stderr=subprocess.STDOUT, text=True)
+        try:
+            summa_result = subprocess.run(summa_command, check=False, stdout=log_file, stderr=subprocess.STDOUT, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return TIMEOUT_RETURN_CODE
     
     return summa_result.returncode
 
-def run_mizuroute(mizuroute_path, mizuroute_exe, control_path, log_path, log_name, local_rank):
+def run_mizuroute(mizuroute_path, mizuroute_exe, control_path, log_path, log_name, local_rank, timeout=None):
     """
     Run mizuRoute model.
 
@@ -60,9 +69,10 @@ def run_mizuroute(mizuroute_path, mizuroute_exe, control_path, log_path, log_nam
     log_path (Path): Path to store log files
     log_name (str): Name of the log file
     local_rank (int): Rank of the current process
+    timeout (float): Wall time limit in seconds after which mizuRoute is killed, None for no limit
 
     Returns:
-    int: Return code of the mizuRoute process
+    int: Return code of the mizuRoute process, TIMEOUT_RETURN_CODE if it was killed after the timeout
     """
     # Ensure log directory exists
     log_path.mkdir(parents=True, exist_ok=True)
@@ -72,7 +82,10 @@ def run_mizuroute(mizuroute_path, mizuroute_exe, control_path, log_path, log_nam
 
     # Run mizuRoute
     with open(log_path / log_name, 'w') as log_file:
-        mizuroute_result = subprocess.run(mizuroute_command, check=False, stdout=log_file, stderr=subprocess.STDOUT, text=True)
+        try:
+            mizuroute_result = subprocess.run(mizuroute_command, check=False, stdout=log_file, stderr=subprocess.STDOUT, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return TIMEOUT_RETURN_CODE
     
     return mizuroute_result.returncode
 
@@ -381,19 +394,29 @@ class ModelRunner:
         current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
         log_file = log_dir / f'confluence_optimization_{config.domain_name}_{current_time}.log'
         self.logger = setup_logger('confluence_optimization', log_file)
+        self.timed_out = False
+        self.deadline = None
+        self.run_paths = None
+        self.param_writer = None
 
-    def run_models(self, local_param_values: list, basin_param_values: list) -> Optional[Path]:
+    def run_models(self, local_param_values: list, basin_param_values: list, timeout: Optional[float] = None) -> Optional[Path]:
         """
         Run SUMMA and mizuRoute models with given parameter values.
+
+        If a timeout is given, it applies to the whole evaluation. A run that exceeds it is
+        killed and not retried, so that a pathological parameter set cannot hold the rank.
         
         Args:
             local_param_values (list): Values for local parameters.
             basin_param_values (list): Values for basin parameters.
+            timeout (Optional[float]): Wall time limit in seconds for the evaluation, None for no limit.
         
         Returns:
             Optional[Path]: Path to mizuRoute output if successful, None otherwise.
         """
         max_retries = 50
+        self.timed_out = False
+        self.deadline = time.time() + timeout if timeout else None
         original_local_params = local_param_values.copy()
         original_basin_params = basin_param_values.copy()
 
@@ -405,36 +428,34 @@ class ModelRunner:
                     basin_param_values = self.generate_new_params(original_basin_params, self.config.basin_bounds)
                     self.logger.info(f"Retry {attempt} with new parameters: local={local_param_values}, basin={basin_param_values}")
 
-                # Prepare model run directories and settings
-                rank_experiment_id = f"{self.config.experiment_id}_rank{self.rank}"
-                rank_specific_path, mizuroute_rank_specific_path, summa_destination_settings_path, mizuroute_destination_settings_path = prepare_model_run(
-                    self.config.root_path, self.config.domain_name, self.config.experiment_id, rank_experiment_id, self.rank,
-                    local_param_values, basin_param_values, self.config.params_to_calibrate, self.config.basin_params_to_calibrate,
-                    self.config.local_bounds_dict, self.config.basin_bounds_dict, self.config.filemanager_name, self.config.mizu_control_file
-                )
-
-                # Update parameter files with new values
-                update_param_files(
-                    local_param_values, 
-                    basin_param_values, 
-                    self.config.params_to_calibrate, 
-                    self.config.basin_params_to_calibrate,
-                    summa_destination_settings_path / "localParamInfo.txt",
-                    summa_destination_settings_path / "basinParamInfo.txt",
-                    self.config.local_bounds_dict,
-                    self.config.basin_bounds_dict
-                )
+                # Prepare model run directories and settings once per rank, later evaluations reuse them
+                if self.run_paths is None:
+                    rank_experiment_id = f"{self.config.experiment_id}_rank{self.rank}"
+                    self.run_paths = prepare_model_run(
+                        self.config.root_path, self.config.domain_name, self.config.experiment_id, rank_experiment_id, self.rank,
+                        local_param_values, basin_param_values, self.config.params_to_calibrate, self.config.basin_params_to_calibrate,
+                        self.config.local_bounds_dict, self.config.basin_bounds_dict, self.config.filemanager_name, self.config.mizu_control_file
+                    )
+                    self.param_writer = TrialParamWriter(self.run_paths[2] / "trialParams.nc", self.logger)
+                rank_specific_path, mizuroute_rank_specific_path, summa_destination_settings_path, mizuroute_destination_settings_path = self.run_paths
+
+                # Update parameter values for this evaluation
+                self.apply_params(local_param_values, basin_param_values, summa_destination_settings_path)
                 
                 self.logger.info(f"Rank {self.rank} starting model run attempt {attempt + 1}")
                 self.logger.info(f"Rank {self.rank} prepared model run. SUMMA path: {rank_specific_path}, mizuRoute path: {mizuroute_rank_specific_path}")
                 
                 # Run SUMMA model
                 summa_success = self.run_summa(rank_specific_path, summa_destination_settings_path, attempt, local_param_values, basin_param_values)
+                if self.timed_out:
+                    return None
                 if not summa_success:
                     continue
                 
                 # Run mizuRoute model
                 mizuroute_success = self.run_mizuroute(mizuroute_rank_specific_path, mizuroute_destination_settings_path, attempt)
+                if self.timed_out:
+                    return None
                 if not mizuroute_success:
                     continue
                 
@@ -469,6 +490,51 @@ class ModelRunner:
                     break
         return new_params
 
+    def apply_params(self, local_param_values: list, basin_param_values: list, summa_destination_settings_path: Path) -> None:
+        """
+        Apply parameter values to the rank-specific SUMMA settings.
+
+        Parameters that are present in trialParams.nc are overwritten in place, since SUMMA gives
+        them precedence over the parameter info files. The remaining parameters are written to
+        the default values in localParamInfo.txt and basinParamInfo.txt.
+
+        Args:
+            local_param_values (list): Values for local parameters.
+            basin_param_values (list): Values for basin parameters.
+            summa_destination_settings_path (Path): Path to the rank-specific SUMMA settings.
+        """
+        bounds_dict = {**self.config.local_bounds_dict, **self.config.basin_bounds_dict}
+        param_values = dict(zip(self.config.params_to_calibrate, local_param_values))
+        param_values.update(dict(zip(self.config.basin_params_to_calibrate, basin_param_values)))
+        param_values = {param: float(np.clip(value, *bounds_dict[param])) for param, value in param_values.items()}
+
+        written = set(self.param_writer.write_values(param_values))
+
+        local_params = [p for p in self.config.params_to_calibrate if p not in written]
+        basin_params = [p for p in self.config.basin_params_to_calibrate if p not in written]
+        if local_params or basin_params:
+            update_param_files(
+                [param_values[p] for p in local_params],
+                [param_values[p] for p in basin_params],
+                local_params,
+                basin_params,
+                summa_destination_settings_path / "localParamInfo.txt",
+                summa_destination_settings_path / "basinParamInfo.txt",
+                self.config.local_bounds_dict,
+                self.config.basin_bounds_dict
+            )
+
+    def remaining_time(self) -> Optional[float]:
+        """
+        Get the time left before the current evaluation times out.
+
+        Returns:
+            Optional[float]: Remaining time in seconds, or None if the evaluation has no timeout.
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.time(), 0.0)
+
     def run_summa(self, rank_specific_path: Path, summa_destination_settings_path: Path, 
                   attempt: int, local_param_values: list, basin_param_values: list) -> bool:
         """
@@ -491,8 +557,14 @@ class ModelRunner:
         summa_log_path = rank_specific_path / "SUMMA_logs"
         summa_log_name = f"summa_log_attempt{attempt}.txt"
         
-        summa_return_code = run_summa(summa_path, summa_exe, filemanager_path, summa_log_path, summa_log_name, self.rank)
+        summa_return_code = run_summa(summa_path, summa_exe, filemanager_path, summa_log_path, summa_log_name, self.rank,
+                                      timeout=self.remaining_time())
         
+        if summa_return_code == TIMEOUT_RETURN_CODE:
+            self.timed_out = True
+            self.logger.warning(f"SUMMA run on rank {self.rank} exceeded its timeout and was killed")
+            return False
+
         if summa_return_code != 0:
             all_param_values = dict(zip(self.config.params_to_calibrate, local_param_values))
             all_param_values.update(dict(zip(self.config.basin_params_to_calibrate, basin_param_values)))
@@ -524,8 +596,14 @@ class ModelRunner:
         mizuroute_log_path = mizuroute_rank_specific_path / "mizuroute_logs"
         mizuroute_log_name = f"mizuroute_log_attempt{attempt}.txt"
         
-        mizuroute_return_code = run_mizuroute(mizuroute_path, mizuroute_exe, mizuroute_control_path, mizuroute_log_path, mizuroute_log_name, self.rank)
+        mizuroute_return_code = run_mizuroute(mizuroute_path, mizuroute_exe, mizuroute_control_path, mizuroute_log_path, mizuroute_log_name, self.rank,
+                                              timeout=self.remaining_time())
         
+        if mizuroute_return_code == TIMEOUT_RETURN_CODE:
+            self.timed_out = True
+            self.logger.warning(f"mizuRoute run on rank {self.rank} exceeded its timeout and was killed")
+            return False
+
         if mizuroute_return_code != 0:
             self.logger.error(f"mizuRoute run failed with return code: {mizuroute_return_code}")
             return False
@@ -672,8 +750,7 @@ class ModelEvaluator:
         sim_df = sim_df.resample('d').mean()
 
         # Read observation data
-        obs_df = pd.read_csv(obs_file_path, index_col='datetime', parse_dates=True)
-        obs_df = obs_df['discharge_cms'].resample('d').mean()
+        obs_df = load_observations(obs_file_path, 'daily')
         print(f"sim_df: {sim_df}")
         print(f"obs_df: {obs_df}")
 
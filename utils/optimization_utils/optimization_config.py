@@ -40,6 +40,11 @@ class Config:
     ngsize: int
     dds_r: float
     diagnostic_frequency: int
+    use_evaluation_cache: bool
+    cache_decimals: int
+    timeout_factor: float
+    timeout_min_samples: int
+    speculative_dispatch: bool
     # Add any other necessary attributes
 
 def read_from_confluence_config(file_path: Path, setting: str) -> Any:
@@ -105,6 +110,11 @@ def initialize_config(rank: int, comm: MPI.Comm, confluence_config_path) -> Conf
         ngsize = config.get('NGSIZE')
         dds_r = float(config.get('DDS_R'))
         diagnostic_frequency = int(config.get('DIAGNOSTIC_FREQUENCY'))
+        use_evaluation_cache = bool(config.get('OPTIMIZATION_CACHE', True))
+        cache_decimals = int(config.get('OPTIMIZATION_CACHE_DECIMALS', 6))
+        timeout_factor = float(config.get('OPTIMIZATION_TIMEOUT_FACTOR', 3.0))
+        timeout_min_samples = int(config.get('OPTIMIZATION_TIMEOUT_MIN_SAMPLES', 5))
+        speculative_dispatch = bool(config.get('OPTIMIZATION_SPECULATIVE_DISPATCH', True))
  
         # Read and process local_bounds_dict and basin_bounds_dict
         local_parameters_file = Path(root_path) / f'domain_{domain_name}/settings/SUMMA/localParamInfo.txt'
@@ -155,6 +165,11 @@ def initialize_config(rank: int, comm: MPI.Comm, confluence_config_path) -> Conf
         ngsize = None
         dds_r = None
         diagnostic_frequency = None
+        use_evaluation_cache = None
+        cache_decimals = None
+        timeout_factor = None
+        timeout_min_samples = None
+        speculative_dispatch = None
 
     config = Config(
         root_path=comm.bcast(root_path, root=0),
@@ -188,6 +203,11 @@ def initialize_config(rank: int, comm: MPI.Comm, confluence_config_path) -> Conf
         ngsize=comm.bcast(ngsize, root=0),
         dds_r=comm.bcast(dds_r, root=0),
         diagnostic_frequency=comm.bcast(diagnostic_frequency, root=0),
+        use_evaluation_cache=comm.bcast(use_evaluation_cache, root=0),
+        cache_decimals=comm.bcast(cache_decimals, root=0),
+        timeout_factor=comm.bcast(timeout_factor, root=0),
+        timeout_min_samples=comm.bcast(timeout_min_samples, root=0),
+        speculative_dispatch=comm.bcast(speculative_dispatch, root=0),
     )
 
     return config
\ No newline at end of file
@@ -4,18 +4,24 @@ from pathlib import Path
 from typing import List, Tuple, Dict, Any
 import numpy as np # type: ignore
 from datetime import datetime
-from typing import Union
+from typing import Union, Optional
 import sys
 from collections import deque
 import argparse
+import time
 
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
 from utils.configHandling_utils.logging_utils import setup_logger # type: ignore
 from utils.optimization_utils.optimisation_utils import run_nsga2, run_nsga3, run_moead, run_smsemoa, run_mopso, get_algorithm_kwargs, run_de, run_dds, run_basin_hopping, run_pso, run_sce_ua, run_borg_moea # type: ignore
 from utils.optimization_utils.results_utils import Results # type: ignore
-from utils.optimization_utils.parallel_utils import Worker # type: ignore
+from utils.optimization_utils.parallel_utils import Worker, RuntimeMonitor # type: ignore
 from utils.optimization_utils.ostrich_util import OstrichOptimizer # type: ignore
 from utils.optimization_utils.optimization_config import initialize_config # type: ignore
+from utils.optimization_utils.evaluation_cache import EvaluationCache # type: ignore
+
+# Seconds between MPI probes for results, and between straggler checks while workers are idle
+POLL_INTERVAL = 0.05
+STRAGGLER_CHECK_INTERVAL = 1.0
 
 class Optimizer:
 
@@ -33,6 +39,10 @@ class Optimizer:
         logger (logging.Logger): Logger for this optimizer.
         iteration_count (int): Counter for optimization iterations.
         iteration_results_file (Optional[str]): Path to the file storing iteration results.
+        evaluation_cache (Optional[EvaluationCache]): Cache of previously evaluated parameter sets (master only).
+        runtime_monitor (RuntimeMonitor): Runtime statistics used for adaptive timeouts and straggler detection.
+        generation (int): Counter of calls to parallel_objective_function, used to discard stale results.
+        busy_workers (Dict[int, Tuple[Tuple[int, int], float]]): Task id and dispatch time for each busy worker.
     """
 
     def __init__(self, config: Dict[str, Any], comm: MPI.Comm, rank: int):
@@ -63,6 +73,16 @@ class Optimizer:
         
         self.results.iteration_results_file = self.comm.bcast(self.results.iteration_results_file, root=0)
 
+        self.evaluation_cache = None
+        if self.rank == 0 and config.use_evaluation_cache:
+            cache_file = Path(config.root_path) / f'domain_{config.domain_name}' / 'optimisation' / f'{config.experiment_id}_evaluation_cache.jsonl'
+            self.evaluation_cache = EvaluationCache(cache_file, config.all_bounds, config.cache_decimals, self.logger,
+                                                    signature=self.cache_signature())
+
+        self.runtime_monitor = RuntimeMonitor(config.timeout_factor, config.timeout_min_samples)
+        self.generation = 0
+        self.busy_workers = {}
+
     def run_optimization(self) -> Union[Tuple[List[float], float], Tuple[List[List[float]], List[List[float]]]]:
         """
         Run the optimization process.
@@ -97,51 +117,135 @@ class Optimizer:
 
         return result
 
-    def parallel_objective_function(self, all_params: np.ndarray) -> np.ndarray:
+    def cache_signature(self) -> Dict[str, Any]:
+        """
+        Describe the calibration setup that cached evaluations are valid for.
+
+        Returns:
+            Dict[str, Any]: Parameter names and bounds, calibration and evaluation periods, metrics and model setup.
+        """
+        return {
+            'params': list(self.config.all_params),
+            'bounds': [[float(lower), float(upper)] for lower, upper in self.config.all_bounds],
+            'calib_period': [str(t) for t in self.config.calib_period],
+            'eval_period': [str(t) for t in self.config.eval_period],
+            'metric': self.config.optimization_metric,
+            'metrics': list(self.config.optimization_metrics),
+            'model': {'summa_exe': str(self.config.summa_exe), 'filemanager': str(self.config.filemanager_name),
+                      'mizu_control_file': str(self.config.mizu_control_file), 'sim_reach_ID': str(self.config.sim_reach_ID),
+                      'obs_file_path': str(self.config.obs_file_path)},
+        }
+
+    def objective_values(self, result: Dict[str, Any]) -> List[float]:
+        """
+        Convert a worker result into objective values to be minimised.
+
+        Args:
+            result (Dict[str, Any]): Result dictionary returned by a worker or the evaluation cache.
+
+        Returns:
+            List[float]: One objective value per optimization metric, inf if the run failed.
+        """
+        if not result or not result.get('calib_metrics'):
+            return [float('inf')] * len(self.config.optimization_metrics)
+        return [-result['calib_metrics'].get(metric, float('-inf')) if metric in ['KGE', 'KGEp', 'KGEnp', 'NSE'] else result['calib_metrics'].get(metric, float('inf')) for metric in self.config.optimization_metrics]
+
+    def parallel_objective_function(self, all_params: np.ndarray, use_cache: bool = True) -> np.ndarray:
+        evaluation_cache = self.evaluation_cache if use_cache else None
         self.logger.info(f"parallel_objective_function called with {len(all_params)} parameter sets")
         num_workers = self.size - 1
         all_params = np.atleast_2d(all_params)
-        task_queue = deque(enumerate(all_params))
         results = [None] * len(all_params)
-        active_workers = set()
+        task_queue = deque()
+        duplicates = {}
         requests = []
 
-        # Initial distribution of tasks
-        for i in range(1, min(num_workers + 1, len(all_params) + 1)):
-            if task_queue:
+        # Answer repeated parameter sets from the cache and dispatch each unique set only once
+        pending_keys = {}
+        for idx, params in enumerate(all_params):
+            if evaluation_cache is None:
+                task_queue.append((idx, params))
+                continue
+            cached = evaluation_cache.get(params)
+            if cached is not None:
+                results[idx] = self.objective_values(cached)
+                # Cache hits are still evaluations of the optimiser, keep them in the iteration history
+                self.results.process_iteration_results(list(params), cached)
+                continue
+            key = evaluation_cache.key(params)
+            if key in pending_keys:
+                duplicates.setdefault(pending_keys[key], []).append(idx)
+                continue
+            pending_keys[key] = idx
+            task_queue.append((idx, params))
+
+        if evaluation_cache is not None:
+            n_duplicates = sum(len(v) for v in duplicates.values())
+            self.logger.info(f"{len(all_params) - len(task_queue) - n_duplicates} parameter sets answered from cache, "
+                             f"{n_duplicates} duplicates within batch, {len(task_queue)} sent to workers")
+
+        self.generation += 1
+        pending = {idx for idx, _ in task_queue}
+        speculated = set()
+
+        # Workers that are not still busy with a previous generation start idle
+        idle_workers = {worker_rank for worker_rank in range(1, num_workers + 1) if worker_rank not in self.busy_workers}
+        last_straggler_check = 0.0
+
+        while pending:
+            # Hand queued tasks to idle workers, then duplicate stragglers onto the workers left idle.
+            # Idle workers are re-checked on a timer, so stragglers that only pass the threshold
+            # after the queue ran dry are still re-dispatched.
+            while idle_workers and task_queue:
+                worker_rank = idle_workers.pop()
                 idx, params = task_queue.popleft()
-                self.logger.info(f"Master sending initial parameters to worker {i}")
-                req = self.comm.isend((idx, params.tolist()), dest=i)
-                requests.append(req)
-                active_workers.add(i)
-
-        while active_workers or task_queue:
-            if active_workers:
-                status = MPI.Status()
-                worker_result = self.comm.recv(source=MPI.ANY_SOURCE, status=status)
-                worker_rank = status.Get_source()
-                self.logger.info(f"Master received result from worker {worker_rank}")
-                
-                if worker_result is not None and isinstance(worker_result, tuple):
-                    idx, params, result = worker_result
+                self.logger.info(f"Master sending parameters to worker {worker_rank}")
+                requests.append(self.dispatch(worker_rank, idx, params))
+            if self.config.speculative_dispatch and idle_workers and time.time() - last_straggler_check >= STRAGGLER_CHECK_INTERVAL:
+                last_straggler_check = time.time()
+                while idle_workers:
+                    straggler = self.find_straggler(pending, speculated)
+                    if straggler is None:
+                        break
+                    worker_rank = idle_workers.pop()
+                    speculated.add(straggler)
+                    self.logger.info(f"Master speculatively re-dispatching index {straggler} to idle worker {worker_rank}")
+                    requests.append(self.dispatch(worker_rank, straggler, all_params[straggler]))
+
+            status = MPI.Status()
+            if not self.comm.Iprobe(source=MPI.ANY_SOURCE, status=status):
+                time.sleep(POLL_INTERVAL)
+                continue
+            worker_rank = status.Get_source()
+            worker_result = self.comm.recv(source=worker_rank)
+            self.busy_workers.pop(worker_rank, None)
+            idle_workers.add(worker_rank)
+            self.logger.info(f"Master received result from worker {worker_rank}")
+
+            if worker_result is not None and isinstance(worker_result, tuple):
+                (generation, idx), params, result = worker_result
+                if result.get('calib_metrics') is not None:
+                    self.runtime_monitor.record(result['runtime'])
+
+                if generation != self.generation or idx not in pending:
+                    # Result of a speculative duplicate whose original already completed
+                    self.logger.info(f"Master discarding superseded result for index {idx} from worker {worker_rank}")
+                else:
+                    pending.discard(idx)
+                    if result.get('timed_out'):
+                        self.logger.warning(f"Evaluation {idx} timed out after {result['runtime']:.0f} s, assigning penalty objective")
                     if 'calib_metrics' in result:
-                        obj_values = [-result['calib_metrics'].get(metric, float('-inf')) if metric in ['KGE', 'KGEp', 'KGEnp', 'NSE'] else result['calib_metrics'].get(metric, float('inf')) for metric in self.config.optimization_metrics]
-                        results[idx] = obj_values
-                        if self.rank == 0:
+                        results[idx] = self.objective_values(result)
+                        if self.rank == 0 and result['calib_metrics'] is not None:
                             self.results.process_iteration_results(params, result)
+                            if evaluation_cache is not None:
+                                evaluation_cache.add(params, result)
                     else:
                         results[idx] = [float('inf')] * len(self.config.optimization_metrics)
-                else:
-                    results[idx] = [float('inf')] * len(self.config.optimization_metrics)
-
-                # Assign new task to the worker that just finished
-                if task_queue:
-                    idx, params = task_queue.popleft()
-                    self.logger.info(f"Master sending new parameters to worker {worker_rank}")
-                    req = self.comm.isend((idx, params.tolist()), dest=worker_rank)
-                    requests.append(req)
-                else:
-                    active_workers.remove(worker_rank)
+                    for duplicate_idx in duplicates.pop(idx, []):
+                        results[duplicate_idx] = results[idx]
+                        if result.get('calib_metrics') is not None:
+                            self.results.process_iteration_results(list(all_params[duplicate_idx]), result)
 
         # Wait for all requests to complete
         MPI.Request.waitall(requests)
@@ -149,6 +253,47 @@ class Optimizer:
         self.logger.info(f"Master completed parallel evaluation")
         return np.array(results)
 
+    def dispatch(self, worker_rank: int, idx: int, params: np.ndarray) -> MPI.Request:
+        """
+        Send a parameter set of the current generation to a worker.
+
+        Args:
+            worker_rank (int): Rank of the worker to send the task to.
+            idx (int): Index of the parameter set in the current batch.
+            params (np.ndarray): Parameter values to evaluate.
+
+        Returns:
+            MPI.Request: Request handle of the non-blocking send.
+        """
+        self.busy_workers[worker_rank] = ((self.generation, idx), time.time())
+        return self.comm.isend(((self.generation, idx), params.tolist(), self.runtime_monitor.timeout()), dest=worker_rank)
+
+    def find_straggler(self, pending: set, speculated: set) -> Optional[int]:
+        """
+        Find the longest running outstanding evaluation that is worth duplicating.
+
+        Args:
+            pending (set): Indices of the current generation that have no result yet.
+            speculated (set): Indices that have already been duplicated.
+
+        Returns:
+            Optional[int]: Index of the evaluation to duplicate, or None if there is no straggler.
+        """
+        now = time.time()
+        candidates = [(now - start, idx) for (generation, idx), start in self.busy_workers.values()
+                      if generation == self.generation and idx in pending and idx not in speculated]
+        if not candidates:
+            return None
+        elapsed, idx = max(candidates)
+        return idx if self.runtime_monitor.is_straggler(elapsed) else None
+
+    def drain_workers(self) -> None:
+        """Wait for workers that are still running speculative duplicates and discard their results."""
+        while self.busy_workers:
+            status = MPI.Status()
+            self.comm.recv(source=MPI.ANY_SOURCE, status=status)
+            self.busy_workers.pop(status.Get_source(), None)
+
     def run_single_objective_optimization(self) -> Tuple[List[float], float]:
         """
         Run single-objective optimization.
@@ -286,8 +431,8 @@ def main() -> None:
             for param, value in zip(config.all_params, best_params):
                 logger.info(f"{param}: {value:.6e}")
 
-            # Run final evaluation with best parameters
-            final_result = optimizer.parallel_objective_function([best_params])[0]
+            # Run final evaluation with best parameters, bypassing the cache so the model is actually re-run
+            final_result = optimizer.parallel_objective_function([best_params], use_cache=False)[0]
             
             logger.info("Final performance metrics:")
             logger.info(f"Calibration: {final_result['calib_metrics']}")
@@ -308,6 +453,7 @@ def main() -> None:
             logger.info(f"Total optimization time: {end_time - start_time}")
             
             # Send termination signal to workers
+            optimizer.drain_workers()
             for i in range(1, size):
                 comm.send(None, dest=i)
     else:
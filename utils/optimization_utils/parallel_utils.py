@@ -6,6 +6,73 @@ from utils.optimization_utils.opt_model_utils import ModelRunner, ModelEvaluator
 from utils.configHandling_utils.logging_utils import setup_logger # type: ignore
 from utils.optimization_utils.optimisation_utils import calculate_objective_value # type: ignore 
 from datetime import datetime
+from collections import deque
+from typing import Optional
+import time
+import numpy as np # type: ignore
+
+class RuntimeMonitor:
+    """
+    Track the distribution of model runtimes to derive adaptive per-evaluation timeouts.
+
+    The timeout is a multiple of a high quantile of recent successful runtimes, so it adapts
+    to the domain and machine without a hand-tuned wall time. No timeout is issued until
+    enough runs have completed to estimate the distribution.
+
+    Attributes:
+        timeout_factor (float): Multiplier applied to the runtime quantile. Values <= 0 disable timeouts.
+        min_samples (int): Number of completed runs required before timeouts are issued.
+        quantile (float): Runtime quantile used as the reference for the timeout.
+        min_timeout (float): Lower limit on issued timeouts in seconds.
+        runtimes (deque): Most recent successful runtimes in seconds.
+    """
+
+    def __init__(self, timeout_factor: float, min_samples: int, quantile: float = 0.9,
+                 min_timeout: float = 60.0, window: int = 200):
+        """
+        Initialize the RuntimeMonitor.
+
+        Args:
+            timeout_factor (float): Multiplier applied to the runtime quantile. Values <= 0 disable timeouts.
+            min_samples (int): Number of completed runs required before timeouts are issued.
+            quantile (float): Runtime quantile used as the reference for the timeout.
+            min_timeout (float): Lower limit on issued timeouts in seconds.
+            window (int): Number of most recent runtimes kept.
+        """
+        self.timeout_factor = timeout_factor
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.min_timeout = min_timeout
+        self.runtimes = deque(maxlen=window)
+
+    def record(self, runtime: float) -> None:
+        """Record the runtime of a successful model evaluation."""
+        self.runtimes.append(runtime)
+
+    def timeout(self) -> Optional[float]:
+        """
+        Get the timeout for the next evaluation.
+
+        Returns:
+            Optional[float]: Timeout in seconds, or None if timeouts are disabled or not yet learned.
+        """
+        if self.timeout_factor <= 0 or len(self.runtimes) < self.min_samples:
+            return None
+        return max(self.min_timeout, self.timeout_factor * float(np.quantile(self.runtimes, self.quantile)))
+
+    def is_straggler(self, elapsed: float) -> bool:
+        """
+        Check whether an outstanding evaluation runs longer than a typical evaluation.
+
+        Args:
+            elapsed (float): Time in seconds since the evaluation was dispatched.
+
+        Returns:
+            bool: True if the evaluation has exceeded the median runtime.
+        """
+        if len(self.runtimes) < self.min_samples:
+            return False
+        return elapsed > float(np.median(self.runtimes))
 
 class Worker:
     """
@@ -54,19 +121,23 @@ class Worker:
             if task is None:
                 self.logger.info(f"Worker {self.rank} received termination signal")
                 break
-            idx, params = task
-            self.logger.info(f"Worker {self.rank} received parameters for index {idx}")
-            result = self.evaluate_params(params)
+            idx, params, timeout = task
+            self.logger.info(f"Worker {self.rank} received parameters for index {idx} (timeout: {timeout})")
+            start_time = time.time()
+            result = self.evaluate_params(params, timeout)
+            result['runtime'] = time.time() - start_time
+            result['timed_out'] = self.model_runner.timed_out
             self.logger.info(f"Worker {self.rank} completed evaluation. Sending results back to master")
             self.comm.send((idx, params, result), dest=0)
         self.logger.info(f"Worker {self.rank} shutting down")
 
-    def evaluate_params(self, params):
+    def evaluate_params(self, params, timeout: Optional[float] = None):
         """
         Evaluate a set of parameters by running the model and calculating metrics.
 
         Args:
             params (List[float]): List of parameter values to evaluate.
+            timeout (Optional[float]): Wall time limit in seconds for the model runs, None for no limit.
 
         Returns:
             Dict[str, Any]: A dictionary containing evaluation results, including
@@ -75,7 +146,7 @@ class Worker:
         self.logger.info(f"Worker {self.rank} starting parameter evaluation")
         try:
             #self.logger.info(f"Worker {self.rank} received params: {params}")
-            model_output_path = self.run_models(params)
+            model_output_path = self.run_models(params, timeout)
             if model_output_path is None:
                 return {'params': params, 'calib_metrics': None, 'eval_metrics': None, 'objective': float('inf')}
             
@@ -84,19 +155,20 @@ class Worker:
             self.logger.error(f"Worker {self.rank} error in evaluate_params: {str(e)}", exc_info=True)
             return {'params': params, 'calib_metrics': None, 'eval_metrics': None, 'objective': float('inf')}
 
-    def run_models(self, params):
+    def run_models(self, params, timeout: Optional[float] = None):
         """
         Run the hydrological models with the given parameters.
 
         Args:
             params (List[float]): List of parameter values to use in the model run.
+            timeout (Optional[float]): Wall time limit in seconds for the model runs, None for no limit.
 
         Returns:
             Optional[Path]: Path to the model output if successful, None otherwise.
         """
         local_params, basin_params = self.model_runner.split_params(params)
         #self.logger.info(f"Worker {self.rank} split params: local={local_params}, basin={basin_params}")
-        model_output_path = self.model_runner.run_models(local_params, basin_params)
+        model_output_path = self.model_runner.run_models(local_params, basin_params, timeout=timeout)
         if model_output_path is None:
             self.logger.warning(f"Worker {self.rank} model run failed")
             return None
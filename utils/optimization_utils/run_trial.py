@@ -8,10 +8,6 @@ import subprocess
 import xarray as xr # type: ignore
 import numpy as np # type: ignore
 import datetime
-import pandas as pd # type: ignore
-import tempfile
-import shutil
-import time
 import glob
 
 
@@ -31,8 +27,15 @@ sys.path.append(str(Path('/Users/darrieythorsson/compHydro/code/CONFLUENCE').res
 
 from utils.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE, get_KGEnp # type: ignore   
 from utils.config_utils import ConfigManager # type: ignore
+from utils.dataHandling_utils.observation_store_utils import load_observations # type: ignore
+from utils.optimization_utils.trial_params_utils import TrialParamWriter # type: ignore
+from utils.models_utils.slurm_utils import SlurmJobMonitor, SlurmScheduler, LocalScheduler, sentinel_command # type: ignore
+from utils.models_utils.gru_partition_utils import GRUPartitioner # type: ignore
 
-def prepare_summa_job_script(config, rank):
+# Trial parameter writers, kept per file so the a priori arrays are only read once per process
+_trial_param_writers: Dict[Path, TrialParamWriter] = {}
+
+def prepare_summa_job_script(config, rank, partition_file):
     script_content = f"""#!/bin/bash
 
 #SBATCH --cpus-per-task={config.get('SETTINGS_SUMMA_CPUS_PER_TASK')}
@@ -41,22 +44,14 @@ def prepare_summa_job_script(config, rank):
 #SBATCH --job-name=SUMMA_Rank{rank}
 #SBATCH --output=SUMMA_Rank{rank}_%j.out
 
+{sentinel_command(get_task_status_path(config, rank))}
 module load gcc/9.3.0
 module load netcdf-fortran
 module load openblas
 module load caf
 
-gru_max={config.get('SETTINGS_SUMMA_GRU_COUNT')}
-gru_count={config.get('SETTINGS_SUMMA_GRU_PER_JOB')}
-
-offset=$SLURM_ARRAY_TASK_ID
-gru_start=$(( 1 + gru_count*offset ))
-check=$(( $gru_start + $gru_count ))
-
-if [ $check -gt $gru_max ]
-then
-  gru_count=$((gru_max - gru_start + 1))
-fi
+# Read the GRU block of this task, one "<start> <count>" line per array task
+read gru_start gru_count <<< "$(sed -n "$((SLURM_ARRAY_TASK_ID + 1))p" {partition_file})"
 
 summa_command="{config.get('SETTINGS_SUMMA_PARALLEL_EXE')} -g $gru_start $gru_count -m {config.get('SETTINGS_SUMMA_FILEMANAGER')} --caf.scheduler.max-threads=$SLURM_CPUS_PER_TASK"
 $summa_command > {config.get('CONFLUENCE_DATA_DIR')}/domain_{config.get('DOMAIN_NAME')}/simulations/{config.get('EXPERIMENT_ID')}/SUMMA/summa_log_rank{rank}_$SLURM_ARRAY_TASK_ID.txt
@@ -68,28 +63,41 @@ $summa_command > {config.get('CONFLUENCE_DATA_DIR')}/domain_{config.get('DOMAIN_
     
     return script_file
 
-def submit_summa_array_job(config, rank):
-    job_script = prepare_summa_job_script(config, rank)
-    result = subprocess.run(['sbatch', '--array=0-3', str(job_script)], capture_output=True, text=True)
-    job_id = parse_job_id(result.stdout)
+def get_task_status_path(config, rank):
+    return get_rank_specific_path(Path(config.get('CONFLUENCE_DATA_DIR')) / f"domain_{config.get('DOMAIN_NAME')}",
+                                  config.get('EXPERIMENT_ID'), "SUMMA", rank) / "task_status"
+
+def get_job_monitor(config, rank):
+    if config.get('SETTINGS_SUMMA_SCHEDULER', 'slurm') == 'local':
+        scheduler = LocalScheduler()
+    else:
+        scheduler = SlurmScheduler()
+    return SlurmJobMonitor(logger, scheduler=scheduler, sentinel_dir=get_task_status_path(config, rank))
+
+def partition_summa_grus(config, rank):
+    settings_path = get_summa_settings_path(config, rank)
+    partitioner = GRUPartitioner(settings_path / config.get('SETTINGS_SUMMA_ATTRIBUTES'),
+                                 settings_path / 'gru_costs.csv', logger)
+    gru_costs = partitioner.estimate_costs()
+    grus_per_job = config.get('SETTINGS_SUMMA_GRU_PER_JOB')
+    grus_per_job = 1 if grus_per_job == 'default' else int(grus_per_job)
+    n_tasks = -(-len(gru_costs) // grus_per_job)  # Ceiling division
+    gru_blocks = partitioner.partition(gru_costs, n_tasks)
+    partition_file = partitioner.write_partitions(gru_blocks, get_task_status_path(config, rank).parent / 'gru_partitions.txt')
+    return partitioner, gru_costs, gru_blocks, partition_file
+
+def submit_summa_array_job(config, rank, monitor, gru_blocks, partition_file):
+    job_script = prepare_summa_job_script(config, rank, partition_file)
+    array_indices = list(range(len(gru_blocks)))
+    job_id = monitor.submit(job_script, array_indices)
     logger.info(f"Submitted SUMMA array job for rank {rank} with job ID: {job_id}")
-    return job_id
-
-def parse_job_id(stdout):
-    # Extract job ID from SLURM output
-    for line in stdout.split('\n'):
-        if "Submitted batch job" in line:
-            return line.split()[-1]
-    return None
-
-def wait_for_summa_completion(job_id):
-    logger.info(f"Waiting for SUMMA job {job_id} to complete...")
-    while True:
-        result = subprocess.run(['squeue', '-j', job_id], capture_output=True, text=True)
-        if job_id not in result.stdout:
-            break
-        time.sleep(60)  # Check every minute
+    return job_id, array_indices
+
+def wait_for_summa_completion(job_id, array_indices, monitor):
+    finished = monitor.wait(job_id, array_indices)
+    failed_tasks = monitor.report(job_id, finished)
     logger.info(f"SUMMA job {job_id} completed")
+    return not failed_tasks
 
 def post_process_summa_output(config, rank):
     logger.info("Post-processing SUMMA output")
@@ -154,9 +162,15 @@ def post_process_summa_output(config, rank):
 
 def run_summa(config, rank):
     if config.get('SETTINGS_SUMMA_USE_PARALLEL_SUMMA'):
-        job_id = submit_summa_array_job(config, rank)
-        wait_for_summa_completion(job_id)
-        post_process_summa_output(config)
+        monitor = get_job_monitor(config, rank)
+        partitioner, gru_costs, gru_blocks, partition_file = partition_summa_grus(config, rank)
+        job_id, array_indices = submit_summa_array_job(config, rank, monitor, gru_blocks, partition_file)
+        if not wait_for_summa_completion(job_id, array_indices, monitor):
+            logger.error(f"SUMMA array job {job_id} had failed tasks for rank {rank}")
+            return False
+        partitioner.update_costs(gru_blocks, monitor.elapsed.get(job_id, {}), gru_costs)
+        post_process_summa_output(config, rank)
+        return True
     else:
         # Existing serial SUMMA run logic
         summa_exe = f"{config['CONFLUENCE_DATA_DIR']}/installs/summa/bin/{config['SUMMA_EXE']}"
@@ -265,8 +279,7 @@ def evaluate_model(config, rank):
             obs_file = str(Path(config['CONFLUENCE_DATA_DIR']) / f"domain_{config['DOMAIN_NAME']}" / 'observations'/ 'streamflow' / 'preprocessed' / f"{config['DOMAIN_NAME']}_streamflow_processed.csv")
         else:
             obs_file = obs_file
-        obs_df = pd.read_csv(obs_file, index_col='datetime', parse_dates=True)
-        obs_df = obs_df['discharge_cms'].resample('h').mean()
+        obs_df = load_observations(obs_file, 'hourly')
 
         logger.info(obs_df, 'observations')
         logger.info(sim_df, 'simulations')
@@ -355,34 +368,21 @@ def update_trial_params(config, rank):
     trial_param_file_priori = trial_param_file.with_name(f"{trial_param_file.stem}.priori.nc")
 
     try:
-        # Load data from both files
-        with xr.open_dataset(trial_param_file_priori) as src, xr.open_dataset(trial_param_file) as dst:
-            src_data = src.load()
-            dst_data = dst.load()
-
-        # Update parameters
-        for param, multiplier in zip(all_params, multipliers):
-            if param in src_data.variables and param in dst_data.variables:
-                old_value = dst_data[param][:].mean().item()
-                new_value = src_data[param][:] * multiplier
-                
-                # Ensure the new value is within valid range
-                param_min = float(src_data[param].attrs.get('valid_min', -np.inf))
-                param_max = float(src_data[param].attrs.get('valid_max', np.inf))
-                new_value = np.clip(new_value, param_min, param_max)
-                
-                dst_data[param][:] = new_value
-                new_value = dst_data[param][:].mean().item()
-                logger.info(f"Updated parameter {param}: old={old_value:.6e}, new={new_value:.6e}, multiplier={multiplier:.6e}")
+        writer = _trial_param_writers.get(trial_param_file)
+        if writer is None:
+            writer = TrialParamWriter(trial_param_file, logger, priori_file=trial_param_file_priori)
+            _trial_param_writers[trial_param_file] = writer
+
+        # Overwrite only the calibrated variables in place
+        param_multipliers = dict(zip(all_params, multipliers))
+        updated = writer.write_multipliers(param_multipliers)
+
+        for param, multiplier in param_multipliers.items():
+            if param in updated:
+                logger.info(f"Updated parameter {param}: multiplier={multiplier:.6e}")
             else:
                 logger.warning(f"Parameter {param} not found in trial parameter file or priori file")
 
-        # Write to a temporary file and replace the original
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.nc') as tmp_file:
-            dst_data.to_netcdf(tmp_file.name)
-        
-        shutil.move(tmp_file.name, trial_param_file)
-
         logger.info("Trial parameters updated successfully")
         return True
 
@@ -0,0 +1,97 @@
+# trial_params_utils.py
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import numpy as np # type: ignore
+import netCDF4 as nc4 # type: ignore
+
+
+class TrialParamWriter:
+    """
+    Write calibrated parameter values into a preallocated SUMMA trialParams file in place.
+
+    The variable layout of the trialParams file and the a priori parameter arrays are read
+    once and kept in memory. Each evaluation then only opens the existing file and overwrites
+    the calibrated variables through netCDF4, instead of loading, scaling and rewriting the
+    whole dataset. The file is closed after every write so that SUMMA can open it while the
+    writer is idle (HDF5 file locking prevents readers while a file is open for writing).
+
+    Attributes:
+        trial_param_file (Path): Path to the trialParams file that is updated in place.
+        logger (logging.Logger): Logger for this class.
+        variables (List[str]): Parameter variables present in the trialParams file.
+        priori (Dict[str, np.ndarray]): A priori parameter arrays, used for multiplier updates.
+        valid_range (Dict[str, Tuple[float, float]]): Valid (min, max) of each a priori parameter.
+    """
+
+    index_variables = ('hruId', 'gruId', 'hru2gruId')
+
+    def __init__(self, trial_param_file: Path, logger: Any, priori_file: Optional[Path] = None):
+        """
+        Initialize the TrialParamWriter and cache the file layout and a priori values.
+
+        Args:
+            trial_param_file (Path): Path to the trialParams file that is updated in place.
+            logger (logging.Logger): Logger for this class.
+            priori_file (Optional[Path]): Path to the a priori trialParams file, required for multiplier updates.
+        """
+        self.trial_param_file = Path(trial_param_file)
+        self.logger = logger
+        self.priori = {}
+        self.valid_range = {}
+
+        with nc4.Dataset(self.trial_param_file, 'r') as ds:
+            self.variables = [v for v in ds.variables if v not in self.index_variables]
+
+        if priori_file is not None:
+            with nc4.Dataset(priori_file, 'r') as ds:
+                for name, var in ds.variables.items():
+                    if name in self.index_variables:
+                        continue
+                    self.priori[name] = np.asarray(var[:], dtype=float)
+                    self.valid_range[name] = (float(getattr(var, 'valid_min', -np.inf)),
+                                              float(getattr(var, 'valid_max', np.inf)))
+            self.logger.info(f"Cached {len(self.priori)} a priori parameter arrays from {priori_file}")
+
+    def write_values(self, param_values: Dict[str, float]) -> List[str]:
+        """
+        Overwrite parameters present in the trialParams file with spatially uniform values.
+
+        Args:
+            param_values (Dict[str, float]): Parameter values keyed by SUMMA parameter name.
+
+        Returns:
+            List[str]: Names of the parameters written to the file. Parameters that are not
+                       in the file are left to the caller (e.g. the parameter info files).
+        """
+        to_write = {name: value for name, value in param_values.items() if name in self.variables}
+        if not to_write:
+            return []
+
+        with nc4.Dataset(self.trial_param_file, 'r+') as ds:
+            for name, value in to_write.items():
+                ds.variables[name][:] = value
+
+        return list(to_write)
+
+    def write_multipliers(self, multipliers: Dict[str, float]) -> List[str]:
+        """
+        Overwrite parameters with their cached a priori values scaled by a multiplier.
+
+        Scaled values are clipped to the valid range stored in the a priori file.
+
+        Args:
+            multipliers (Dict[str, float]): Multipliers keyed by SUMMA parameter name.
+
+        Returns:
+            List[str]: Names of the parameters written to the file.
+        """
+        to_write = {name: m for name, m in multipliers.items() if name in self.variables and name in self.priori}
+        if not to_write:
+            return []
+
+        with nc4.Dataset(self.trial_param_file, 'r+') as ds:
+            for name, multiplier in to_write.items():
+                param_min, param_max = self.valid_range[name]
+                ds.variables[name][:] = np.clip(self.priori[name] * multiplier, param_min, param_max)
+
+        return list(to_write)
@@ -18,6 +18,8 @@ from matplotlib.patches import Patch # type: ignore
 
 sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
 from utils.evaluation_util.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE, get_KGEnp # type: ignore
+from utils.dataHandling_utils.observation_store_utils import load_observations # type: ignore
+from utils.geospatial_utils.attribute_table_utils import read_attributes # type: ignore
 
 
 class VisualizationReporter:
@@ -56,10 +58,7 @@ class VisualizationReporter:
             obs_data = []
             for obs_name, obs_file in obs_files:
                 try:
-                    df = pd.read_csv(obs_file, parse_dates=['datetime'])
-                    df['datetime'] = pd.to_datetime(df['datetime'])
-                    df.set_index('datetime', inplace=True)
-                    df = df['discharge_cms'].resample('h').mean()
+                    df = load_observations(obs_file, 'hourly', self.logger)
                     obs_data.append((obs_name, df))
                 except Exception as e:
                     self.logger.warning(f"Could not read observation file {obs_file}: {str(e)}")
@@ -510,9 +509,7 @@ class VisualizationReporter:
             # Read observation data
             obs_data = []
             for obs_name, obs_file in obs_files:
-                df = pd.read_csv(obs_file, parse_dates=['datetime'])
-                df.set_index('datetime', inplace=True)
-                df = df['discharge_cms'].resample('h').mean()
+                df = load_observations(obs_file, 'hourly', self.logger)
                 obs_data.append((obs_name, df))
 
             # Read simulation data
@@ -1202,8 +1199,7 @@ class VisualizationReporter:
             obs_start = None
             obs_end = None
             for obs_name, obs_file in obs_files:
-                obs_df = pd.read_csv(obs_file, parse_dates=['datetime'])
-                obs_df.set_index('datetime', inplace=True)
+                obs_df = load_observations(obs_file, 'native', self.logger).to_frame()
                 obs_data.append((obs_name, obs_df))
                 
                 # Update overall observation time range
@@ -1238,10 +1234,10 @@ class VisualizationReporter:
                             if basin_name == 'default':
                                 basin_name = f"{self.config.get('DOMAIN_NAME')}_riverBasins_delineate.shp"
                             basin_path = self._get_file_path('RIVER_BASINS_PATH', 'shapefiles/river_basins', basin_name)
-                            basin_gdf = gpd.read_file(basin_path)
+                            basin_areas = read_attributes(basin_path, ['GRU_area'], self.logger)
                             
                             # Convert units from mm/day to cms
-                            area_km2 = basin_gdf['GRU_area'].sum() / 1e6
+                            area_km2 = basin_areas['GRU_area'].sum() / 1e6
                             sim_series = sim_series * area_km2 / 86.4
                             
                             sim_data.append((model_name, sim_series))
@@ -15,6 +15,7 @@ import matplotlib.dates as mdates # type: ignore
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from utils.evaluation_util.calculate_sim_stats import get_KGE, get_KGEp, get_NSE, get_MAE, get_RMSE, get_KGEnp # type: ignore
+from utils.dataHandling_utils.observation_store_utils import load_observations # type: ignore
 
 class resultMapper:
     def __init__(self, config, logger):
@@ -98,17 +99,13 @@ class TimeseriesVisualizer:
             if not obs_file_path.exists():
                 raise FileNotFoundError(f"Observations file not found: {obs_file_path}")
 
-            obs_df = pd.read_csv(obs_file_path)
+            obs_df = load_observations(obs_file_path, 'daily', self.logger)
             
-            # Check if observations DataFrame is empty
+            # Check if observations are empty
             if obs_df.empty:
                 self.logger.error("Observations file is empty")
                 raise ValueError("Observations file contains no data")
             
-            obs_df['datetime'] = pd.to_datetime(obs_df['datetime'], format='mixed', dayfirst=True)
-            obs_df.set_index('datetime', inplace=True)
-            obs_df = obs_df['discharge_cms'].resample('D').mean()
-            
             # Combine into single dataframe
             results_df = sim_df.copy()
             print(f'{results_df}')
@@ -506,13 +503,7 @@ class BenchmarkVizualiser:
                 self.logger.warning(f"Observed data file not found: {obs_path}")
                 return pd.DataFrame()
                 
-            obs_df = pd.read_csv(obs_path, parse_dates=['datetime'])
-            obs_df.set_index('datetime', inplace=True)
-            
-            # Ensure we have the discharge column
-            if 'discharge_cms' not in obs_df.columns:
-                self.logger.warning("No 'discharge_cms' column found in observed data")
-                return pd.DataFrame()
+            obs_df = load_observations(obs_path, 'native', self.logger).to_frame()
                 
             return obs_df[['discharge_cms']].copy()
             